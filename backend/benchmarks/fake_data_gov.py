@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the data.gov.in resource API.
+Serves the bundled CSVs (synthetic data where none is bundled) as paginated
+JSON in the same shape as https://api.data.gov.in/resource/<id>, so
+/sync-official can be exercised offline. Point the backend at it with
+DATA_GOV_BASE_URL=http://127.0.0.1:<port>/resource/
+
+Usage (from backend/): python -m benchmarks.fake_data_gov [--port 8002] [--rows 20000]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.synthetic import generate_dataset
+from services.api_sync import RESOURCES
+
+DATASETS_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "UIDAIHackathonDataSets")
+DEFAULT_ROWS = 20_000
+MAX_PAGE_SIZE = 1000
+
+
+def bundled_csv(kind: str):
+    matches = sorted(glob.glob(os.path.join(DATASETS_DIR, f"api_data_aadhar_{kind}", "*.csv")))
+    return matches[0] if matches else None
+
+
+def default_datasets(rows: int = DEFAULT_ROWS) -> dict:
+    """resource id -> DataFrame: the bundled CSV for each dataset, or synthetic rows."""
+    datasets = {}
+    for kind, resource_id in RESOURCES.items():
+        path = bundled_csv(kind)
+        df = pd.read_csv(path, nrows=rows) if path else generate_dataset(kind, rows)
+        datasets[resource_id] = df
+    return datasets
+
+
+class FakeDataGovServer:
+    """Threaded HTTP server answering /resource/<id>?limit=&offset= from in-memory frames."""
+
+    def __init__(self, datasets: dict, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0):
+        # The real API returns every field as a string
+        self.records = {rid: df.astype(str).to_dict("records") for rid, df in datasets.items()}
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/resource/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-data-gov", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def page(self, resource_id: str, limit: int, offset: int) -> dict:
+        records = self.records[resource_id]
+        limit = max(0, min(limit, MAX_PAGE_SIZE))
+        chunk = records[offset:offset + limit]
+        return {"status": "ok", "total": len(records), "count": len(chunk),
+                "limit": str(limit), "offset": str(offset), "records": chunk}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.requests += 1
+                url = urlparse(self.path)
+                resource_id = url.path.rstrip("/").rsplit("/", 1)[-1]
+                params = parse_qs(url.query)
+                if not url.path.startswith("/resource/") or resource_id not in fake.records:
+                    return self._send(404, {"status": "error", "message": "Resource not found"})
+                if not params.get("api-key"):
+                    return self._send(403, {"status": "error", "message": "Missing api-key"})
+                try:
+                    limit = int(params.get("limit", ["10"])[0])
+                    offset = int(params.get("offset", ["0"])[0])
+                except ValueError:
+                    return self._send(400, {"status": "error", "message": "Invalid limit/offset"})
+                if fake.latency_ms:
+                    time.sleep(fake.latency_ms / 1000)
+                self._send(200, fake.page(resource_id, limit, offset))
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="records served per resource")
+    parser.add_argument("--latency-ms", type=float, default=0, help="artificial delay per page")
+    args = parser.parse_args()
+
+    server = FakeDataGovServer(default_datasets(args.rows), port=args.port, latency_ms=args.latency_ms).start()
+    print(f"🛰️  Fake data.gov.in serving {len(server.records)} resources at {server.base_url}")
+    print(f"   export DATA_GOV_BASE_URL={server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
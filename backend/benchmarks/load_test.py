@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Test
+Starts the API (uvicorn, in a scratch working directory so uploads and syncs
+never touch backend/data) plus a local fake data.gov.in, drives a weighted mix
+of concurrent requests and reports p50/p95/p99 latency and throughput per
+endpoint.
+
+Usage (from backend/):
+  python -m benchmarks.load_test --duration 30 --concurrency 8
+  python -m benchmarks.load_test --mix dashboard=60,chat=40 --save load.json
+  python -m benchmarks.load_test --url http://127.0.0.1:8001   # existing server
+"""
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fake_data_gov import FakeDataGovServer, default_datasets
+from benchmarks.synthetic import generate_dataset
+
+ENDPOINTS = ("dashboard", "chat", "report", "upload", "sync")
+DEFAULT_MIX = "dashboard=50,chat=25,report=15,upload=5,sync=5"
+DEFAULT_PORT = 8011
+READY_TIMEOUT_S = 120
+CHAT_QUERIES = [
+    "status of lucknow", "top 5 districts by gap", "compare states by efficiency",
+    "how can we improve biometric coverage?", "which states have the most critical districts",
+]
+UPLOAD_ROWS = 500
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}'. Choose from: {', '.join(ENDPOINTS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentiles(latencies: list) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2)}
+
+
+def summarize(samples: list, elapsed_s: float) -> dict:
+    """samples: (endpoint, seconds, ok). Per-endpoint and overall latency/throughput."""
+    grouped = defaultdict(list)
+    for endpoint, seconds, ok in samples:
+        grouped[endpoint].append((seconds, ok))
+        grouped["_all"].append((seconds, ok))
+    summary = {}
+    for endpoint, rows in sorted(grouped.items()):
+        summary[endpoint] = {
+            "requests": len(rows),
+            "errors": sum(1 for _, ok in rows if not ok),
+            "rps": round(len(rows) / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+            **percentiles([s for s, _ in rows]),
+        }
+    return summary
+
+
+# --- Traffic ---
+
+class Traffic:
+    """One request per endpoint kind. Each returns True on an expected status code."""
+
+    def __init__(self, base_url: str, seed: int = 0):
+        self.base_url = base_url.rstrip("/")
+        self.rng = random.Random(seed)
+        self.districts = []
+        enrol = generate_dataset("enrolment", UPLOAD_ROWS, seed=seed)
+        bio = generate_dataset("biometric", UPLOAD_ROWS, seed=seed)
+        self.upload_files = {
+            "enrolment_file": enrol.to_csv(index=False).encode(),
+            "biometric_file": bio.to_csv(index=False).encode(),
+        }
+
+    def dashboard(self, session):
+        response = session.get(f"{self.base_url}/initial-data", timeout=120)
+        if response.ok and not self.districts:
+            self.districts = response.json().get("districts", [])[:200]
+        return response.ok
+
+    def chat(self, session):
+        response = session.post(f"{self.base_url}/chat", json={"query": self.rng.choice(CHAT_QUERIES)}, timeout=60)
+        return response.ok
+
+    def report(self, session):
+        if not self.districts:
+            return self.dashboard(session)
+        d = self.rng.choice(self.districts)
+        payload = {k: d.get(k) for k in ("state", "district", "expected_updates", "actual_updates",
+                                          "pending_updates", "gap_percentage", "status")}
+        response = session.post(f"{self.base_url}/generate-report", json=payload, timeout=120)
+        return response.ok
+
+    def upload(self, session):
+        files = {name: (f"{name}.csv", io.BytesIO(data), "text/csv") for name, data in self.upload_files.items()}
+        response = session.post(f"{self.base_url}/upload", files=files, timeout=300)
+        return response.ok
+
+    def sync(self, session):
+        response = session.post(f"{self.base_url}/sync-official", timeout=300)
+        return response.ok
+
+
+
+def drive(base_url: str, mix: dict, duration_s: float, concurrency: int, seed: int = 0) -> dict:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        traffic = Traffic(base_url, seed + worker_id)
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                endpoint = rng.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    ok = getattr(traffic, endpoint)(session)
+                except requests.RequestException:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    samples.append((endpoint, elapsed, ok))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return summarize(samples, time.perf_counter() - start)
+
+
+# --- Server lifecycle ---
+
+def prepare_workdir() -> str:
+    """Scratch copy of the files the server reads at start-up."""
+    workdir = tempfile.mkdtemp(prefix="satark-load-")
+    os.makedirs(os.path.join(workdir, "data"))
+    for name in ("initial_data.json", "knowledge_base.txt"):
+        src = os.path.join(BACKEND_DIR, "data", name)
+        if os.path.exists(src):
+            shutil.copy2(src, os.path.join(workdir, "data", name))
+    if os.path.isdir(os.path.join(BACKEND_DIR, "models")):
+        shutil.copytree(os.path.join(BACKEND_DIR, "models"), os.path.join(workdir, "models"))
+    return workdir
+
+
+def start_api(port: int, workdir: str, data_gov_url: str) -> subprocess.Popen:
+    env = dict(os.environ, DATA_GOV_BASE_URL=data_gov_url, PYTHONPATH=BACKEND_DIR)
+    env.setdefault("ARTIFACT_BUNDLE_DIR", os.path.join(workdir, "artifacts"))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def wait_ready(base_url: str, timeout_s: float = READY_TIMEOUT_S):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"API at {base_url} not ready after {timeout_s:.0f}s")
+
+
+def print_summary(summary: dict):
+    print(f"\n{'endpoint':<12}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, s in summary.items():
+        label = "TOTAL" if endpoint == "_all" else endpoint
+        print(f"{label:<12}{s['requests']:>10}{s['errors']:>8}{s['rps']:>9}"
+              f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,... (" + ", ".join(ENDPOINTS) + ")")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--url", help="drive an already running API instead of starting one")
+    parser.add_argument("--fake-rows", type=int, default=20_000, help="records per fake data.gov.in resource")
+    parser.add_argument("--fake-latency-ms", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the summary to this JSON file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    fake = api = workdir = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            fake = FakeDataGovServer(default_datasets(args.fake_rows), latency_ms=args.fake_latency_ms).start()
+            workdir = prepare_workdir()
+            base_url = f"http://127.0.0.1:{args.port}"
+            print(f"🚀 Starting API on {base_url} (workdir {workdir}, data.gov.in -> {fake.base_url})")
+            api = start_api(args.port, workdir, fake.base_url)
+        wait_ready(base_url)
+
+        print(f"🔥 {args.duration:.0f}s of traffic, {args.concurrency} concurrent clients, mix {mix}")
+        summary = drive(base_url, mix, args.duration, args.concurrency, args.seed)
+        print_summary(summary)
+
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump({"duration_s": args.duration, "concurrency": args.concurrency,
+                           "mix": mix, "endpoints": summary}, f, indent=2)
+            print(f"💾 Summary saved to {args.save}")
+    finally:
+        if api is not None:
+            api.terminate()
+            api.wait(timeout=30)
+        if fake is not None:
+            fake.stop()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Hot-Path Benchmarks
+Times CSV parsing per dataset, clean_dataframe, smart_merge, process_data, model
+predict, agent queries and report rendering on synthetic data (see benchmarks/synthetic.py), writes the
+results as JSON and flags regressions against a saved baseline.
+
+Usage (from backend/):
+  python -m benchmarks.run_benchmarks --sizes 10k,1m --save benchmarks/baselines/baseline.json
+  python -m benchmarks.run_benchmarks --sizes 10k --compare benchmarks/baselines/baseline.json
+  python -m benchmarks.run_benchmarks --sizes 1m --memory    # peak allocation per case
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.synthetic import generate_frames, parse_size
+from services.processing import clean_dataframe, smart_merge, process_data
+from services.schemas import SCHEMAS, read_dataset
+
+DEFAULT_SIZES = "10k,1m"
+DEFAULT_REPEAT = 3
+# A case regresses when its median is this much slower than the baseline...
+DEFAULT_THRESHOLD = 0.25
+# ...and at least this many seconds slower (sub-millisecond cases are too noisy)
+MIN_REGRESSION_SECONDS = 0.005
+
+MODEL_PATH = os.path.join(BACKEND_DIR, "models", "isolation_forest.joblib")
+KB_PATH = os.path.join(BACKEND_DIR, "data", "knowledge_base.txt")
+
+
+def load_model():
+    """The shipped model if present, otherwise one fitted on a small synthetic set."""
+    if os.path.exists(MODEL_PATH):
+        import joblib
+        return joblib.load(MODEL_PATH)
+    enrol, bio, demo = generate_frames(10_000, seed=1)
+    return process_data(enrol, bio, demo)["model"]
+
+
+def time_case(run, setup=None, repeat: int = DEFAULT_REPEAT, measure_memory: bool = False) -> dict:
+    """
+    Runs setup() untimed, then times run(*args); repeated. Returns min/median seconds.
+    With measure_memory, one extra run under tracemalloc records the peak allocation.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        run(*args)
+        timings.append(time.perf_counter() - start)
+    result = {"min_s": round(min(timings), 6), "median_s": round(statistics.median(timings), 6), "repeat": repeat}
+
+    if measure_memory:
+        args = setup() if setup else ()
+        tracemalloc.start()
+        try:
+            run(*args)
+            result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def size_cases(n_rows: int, model):
+    """(name, run, setup) for every case that scales with the dataset size."""
+    enrol, bio, demo = generate_frames(n_rows)
+    half = n_rows // 2
+    cleaned_head = smart_merge(None, enrol.iloc[:half].copy())
+    # Masters as the server holds them: merged, cleaned, typed and marked
+    prepared = [smart_merge(None, df.copy()) for df in (enrol, bio, demo)]
+    features = np.random.default_rng(0).random((n_rows, 3)) * [1000, 100, 500]
+    feature_frame = pd.DataFrame(features, columns=['pending_updates', 'gap_percentage', 'demo_updates'])
+
+    from services.rag_agent import SatarkAgent
+    warm_agent = SatarkAgent(KB_PATH, enrol, bio, demo)
+    warm_agent.query("status of patna")  # builds the district index once
+    districts = clean_dataframe(enrol.head(50).copy())['district'].unique().tolist()
+    queries = [f"status of {d}" for d in districts[:20]] + ["top 5 districts by gap", "compare states by efficiency"]
+
+    return [
+        ("clean_dataframe", lambda df: clean_dataframe(df), lambda: (enrol.copy(),)),
+        ("smart_merge", lambda existing, new: smart_merge(existing, new),
+         lambda: (cleaned_head.copy(), enrol.iloc[half:].copy())),
+        ("process_data", lambda: process_data(enrol, bio, demo, model=model), None),
+        ("process_data_prepared", lambda: process_data(*prepared, model=model), None),
+        ("model_predict", lambda: model.predict(feature_frame), None),
+        ("agent_index_build", lambda agent: agent.query("status of patna"),
+         lambda: (SatarkAgent(KB_PATH, enrol, bio, demo),)),
+        ("agent_query_batch", lambda: warm_agent.query_batch(queries), None),
+    ]
+
+
+def parse_cases(n_rows: int):
+    """(name, run, setup, csv bytes): schema-typed parsing of each dataset next to pandas' default inference."""
+    cases = []
+    for kind, df in zip(SCHEMAS, generate_frames(n_rows)):
+        data = df.to_csv(index=False).encode()
+        cases.append((f"parse_{kind}", lambda data=data, kind=kind: read_dataset(data, kind), None, len(data)))
+        cases.append((f"parse_{kind}_default", lambda data=data: pd.read_csv(io.BytesIO(data)), None, len(data)))
+    return cases
+
+
+def fixed_cases():
+    """Cases independent of dataset size."""
+    from services.report_generator import generate_report, render_chart
+    district = {"state": "Bihar", "district": "Patna", "expected_updates": 12000, "actual_updates": 4000,
+                "pending_updates": 8000, "gap_percentage": 66.7, "status": "CRITICAL"}
+
+    def uncached():
+        render_chart.cache_clear()
+        return ()
+
+    return [
+        ("generate_report", lambda: generate_report(district), uncached),
+        ("generate_report_cached_chart", lambda: generate_report(district), None),
+    ]
+
+
+def _report(key: str, result: dict):
+    peak = f"{result['peak_mb']:10.2f} MB peak" if "peak_mb" in result else ""
+    throughput = f"{result['mb_per_s']:8.1f} MB/s" if "mb_per_s" in result else ""
+    print(f"⏱️  {key:<34} {result['median_s'] * 1000:10.2f} ms {peak}{throughput}")
+
+
+def run_benchmarks(sizes: list, repeat: int = DEFAULT_REPEAT, measure_memory: bool = False) -> dict:
+    model = load_model()
+    results = {}
+    for name, run, setup in fixed_cases():
+        results[name] = time_case(run, setup, repeat, measure_memory)
+        _report(name, results[name])
+
+    for n_rows in sizes:
+        print(f"🧪 Generating {n_rows:,} synthetic rows per dataset...")
+        for name, run, setup, n_bytes in parse_cases(n_rows):
+            key = f"{name}@{n_rows}"
+            result = time_case(run, setup, repeat, measure_memory)
+            results[key] = dict(result, rows=n_rows, mb_per_s=round(n_bytes / (1024 * 1024) / result["median_s"], 1))
+            _report(key, results[key])
+        for name, run, setup in size_cases(n_rows, model):
+            key = f"{name}@{n_rows}"
+            results[key] = dict(time_case(run, setup, repeat, measure_memory), rows=n_rows)
+            _report(key, results[key])
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """Cases present in both runs whose median slowed down beyond the threshold."""
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if not base or base["median_s"] <= 0:
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        if ratio > 1 + threshold and result["median_s"] - base["median_s"] >= MIN_REGRESSION_SECONDS:
+            regressions.append({"case": key, "baseline_s": base["median_s"],
+                                "current_s": result["median_s"], "ratio": round(ratio, 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts, e.g. 10k,1m,10m")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--memory", action="store_true", help="also record peak allocations (tracemalloc)")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    current = run_benchmarks(sizes, args.repeat, args.memory)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"💾 Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for r in regressions:
+                print(f"   {r['case']:<34} {r['baseline_s'] * 1000:.2f} ms -> {r['current_s'] * 1000:.2f} ms (x{r['ratio']})")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Sharded process_data Scaling
+Times process_data on prepared synthetic masters with 1..N workers (1 is the
+serial path) and reports the speed-up over serial. Each worker count is warmed
+once first, so pool start-up and the cached name encodings are not timed.
+
+Usage (from backend/):
+  python -m benchmarks.shard_scaling --rows 1m --max-workers 8
+  python -m benchmarks.shard_scaling --rows 1m --save benchmarks/baselines/shard_scaling.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.run_benchmarks import DEFAULT_REPEAT, load_model, time_case
+from benchmarks.synthetic import generate_frames, parse_size
+from services.processing import process_data, smart_merge
+
+
+def run_scaling(n_rows: int, max_workers: int, repeat: int = DEFAULT_REPEAT) -> dict:
+    model = load_model()
+    masters = [smart_merge(None, df) for df in generate_frames(n_rows)]
+    results = {}
+    for workers in range(1, max_workers + 1):
+        run = lambda: process_data(*masters, model=model, workers=workers)
+        run()
+        result = time_case(run, repeat=repeat)
+        result["speedup"] = round(results["1"]["median_s"] / result["median_s"], 2) if results else 1.0
+        results[str(workers)] = result
+        print(f"⏱️  {workers:>2} worker(s) {result['median_s'] * 1000:10.2f} ms   x{result['speedup']}")
+    return {
+        "meta": {"created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "rows": n_rows,
+                 "python": platform.python_version(), "cpu_count": os.cpu_count()},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1m", help="rows per dataset, e.g. 500k, 1m, 10m")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--save", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    # Every worker count should take the sharded path, however small the run
+    import services.sharding
+    services.sharding.MIN_SHARDED_ROWS = 0
+
+    results = run_scaling(parse_size(args.rows), args.max_workers, args.repeat)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Synthetic datasets shaped like the data.gov.in Aadhaar CSVs (enrolment,
+biometric and demographic: date, state, district, pincode, age columns).
+
+Generation is vectorised so 10M-row frames take seconds rather than minutes,
+and seeded so every benchmark run sees identical data.
+"""
+import numpy as np
+import pandas as pd
+
+STATES = [
+    "Andhra Pradesh", "Assam", "Bihar", "Chhattisgarh", "Gujarat", "Haryana", "Jharkhand",
+    "Karnataka", "Kerala", "Madhya Pradesh", "Maharashtra", "Odisha", "Punjab", "Rajasthan",
+    "Tamil Nadu", "Telangana", "Uttar Pradesh", "Uttarakhand", "West Bengal", "Delhi",
+]
+DISTRICTS_PER_STATE = 36
+
+_SYLLABLES = ["ka", "ra", "pu", "na", "ga", "bad", "li", "sha", "to", "mi", "dar", "ve",
+              "lo", "ja", "ni", "han", "so", "tri", "bel", "gar"]
+
+# Variants clean_dataframe has to repair; a small share of rows use them
+_STATE_VARIANTS = {"Odisha": "Orissa", "West Bengal": "Westbengal", "Tamil Nadu": "Tamilnadu"}
+MESSY_FRACTION = 0.02
+
+AGE_COLUMNS = {
+    "enrolment": ["age_0_5", "age_5_17", "age_18_greater"],
+    "biometric": ["bio_age_5_17", "bio_age_17_"],
+    "demographic": ["demo_age_5_17", "demo_age_17_"],
+}
+
+
+def district_catalogue(seed: int = 0) -> pd.DataFrame:
+    """(state, district, pincode base) for every synthetic district; names are unique."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    seen = set()
+    for s, state in enumerate(STATES):
+        for d in range(DISTRICTS_PER_STATE):
+            while True:
+                parts = rng.choice(_SYLLABLES, size=rng.integers(2, 4))
+                name = "".join(parts).title()
+                if name not in seen:
+                    seen.add(name)
+                    break
+            rows.append((state, name, 110000 + s * 30000 + d * 500))
+    return pd.DataFrame(rows, columns=["state", "district", "pincode_base"])
+
+
+def generate_dataset(kind: str, n_rows: int, seed: int = 0, messy: bool = True) -> pd.DataFrame:
+    """One dataset ("enrolment", "biometric" or "demographic") with n_rows records."""
+    if kind not in AGE_COLUMNS:
+        raise ValueError(f"Unknown dataset kind: {kind}")
+    rng = np.random.default_rng(seed + list(AGE_COLUMNS).index(kind))
+    catalogue = district_catalogue()
+
+    # Skewed district sizes, like the real data (a few very large districts)
+    weights = rng.pareto(1.5, len(catalogue)) + 1
+    district_idx = rng.choice(len(catalogue), size=n_rows, p=weights / weights.sum())
+
+    # Draw indices into small lookup tables, then gather: no per-row Python work
+    state_names = catalogue["state"].to_numpy(dtype=object)
+    district_names = catalogue["district"].to_numpy(dtype=object)
+    states = state_names[district_idx]
+    districts = district_names[district_idx]
+    pincodes = catalogue["pincode_base"].to_numpy()[district_idx] + rng.integers(0, 500, n_rows)
+    calendar = (pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(365), unit="D")).strftime("%d-%m-%Y")
+    dates = np.asarray(calendar, dtype=object)[rng.integers(0, 365, n_rows)]
+
+    if messy:
+        # Lower-cased/padded names and legacy state spellings, as seen in uploaded files
+        messy_states = np.array([_STATE_VARIANTS.get(s, s) for s in state_names], dtype=object)
+        messy_districts = np.array([f"  {d.lower()} " for d in district_names], dtype=object)
+        swap = rng.random(n_rows) < MESSY_FRACTION
+        states[swap] = messy_states[district_idx[swap]]
+        swap = rng.random(n_rows) < MESSY_FRACTION
+        districts[swap] = messy_districts[district_idx[swap]]
+
+    data = {
+        "date": dates,
+        "state": states,
+        "district": districts,
+        "pincode": pincodes,
+    }
+    for i, col in enumerate(AGE_COLUMNS[kind]):
+        data[col] = rng.poisson(3 + 4 * i, n_rows)
+    return pd.DataFrame(data)
+
+
+def generate_frames(n_rows: int, seed: int = 0, messy: bool = True):
+    """(enrolment, biometric, demographic) frames with n_rows records each."""
+    return tuple(generate_dataset(kind, n_rows, seed, messy) for kind in AGE_COLUMNS)
+
+
+def parse_size(text: str) -> int:
+    """'10k' -> 10000, '1m' -> 1000000, '2500' -> 2500."""
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    number = text[:-1] if multiplier > 1 else text
+    return int(float(number) * multiplier)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Build the Warm-Start Artifact Bundle
+Runs during Docker build (after train_model.py). Packs everything the server
+would otherwise compute on its first requests - model, district aggregates,
+serialized dashboard response and agent indexes - into one versioned
+directory with a manifest of content hashes.
+"""
+import json
+import os
+import sys
+import pandas as pd
+
+from services.artifacts import build_bundle, source_fingerprints
+
+DATA_DIR = "data"
+SOURCE_PATHS = {
+    "enrolment": os.path.join(DATA_DIR, "master_enrolment.pkl"),
+    "biometric": os.path.join(DATA_DIR, "master_biometric.pkl"),
+    "demographic": os.path.join(DATA_DIR, "master_demographic.pkl"),
+    "model": "models/isolation_forest.joblib",
+}
+INITIAL_DATA_PATH = os.path.join(DATA_DIR, "initial_data.json")
+KB_PATH = os.path.join(DATA_DIR, "knowledge_base.txt")
+BUNDLE_DIR = os.getenv("ARTIFACT_BUNDLE_DIR", "artifacts")
+
+
+def load_optional_pickle(path):
+    if os.path.exists(path):
+        print(f"📂 Loading {path}...")
+        return pd.read_pickle(path)
+    print(f"ℹ️  Not found (optional): {path}")
+    return None
+
+
+def main():
+    print("📦 Building warm-start artifact bundle...")
+
+    model = None
+    if os.path.exists(SOURCE_PATHS["model"]):
+        import joblib
+        model = joblib.load(SOURCE_PATHS["model"])
+
+    enrol_df = load_optional_pickle(SOURCE_PATHS["enrolment"])
+    bio_df = load_optional_pickle(SOURCE_PATHS["biometric"])
+    demo_df = load_optional_pickle(SOURCE_PATHS["demographic"])
+
+    # Dashboard response: computed exactly as /initial-data would, with the shipped model
+    if enrol_df is not None and bio_df is not None:
+        from services.processing import process_data
+        print("🔄 Running analysis on master datasets...")
+        dashboard = process_data(enrol_df, bio_df, demographic_data=demo_df, model=model)
+        if "error" in dashboard:
+            print(f"❌ Analysis failed: {dashboard['error']}")
+            return False
+        dashboard.pop("model", None)
+        # Backlog forecasts, as current_analysis adds them
+        from services.forecast import forecast_districts
+        from services.timeline import DATASETS, DailyCube, daily_sums
+        masters = {"enrolment": enrol_df, "biometric": bio_df, "demographic": demo_df}
+        forecast_districts(dashboard["districts"],
+                           DailyCube({dataset: daily_sums(masters[dataset], col) for dataset, col, _ in DATASETS}))
+        dashboard['dataset_info'] = {
+            "enrolment_records": len(enrol_df),
+            "biometric_records": len(bio_df),
+            "source": "artifact_bundle"
+        }
+    elif os.path.exists(INITIAL_DATA_PATH):
+        print(f"ℹ️  No master datasets; bundling {INITIAL_DATA_PATH} as the dashboard response.")
+        with open(INITIAL_DATA_PATH) as f:
+            dashboard = json.load(f)
+    else:
+        print("❌ Neither master datasets nor initial data found. Nothing to bundle.")
+        return False
+
+    # Agent indexes: fitted TF-IDF plus the district aggregate table
+    from services.rag_agent import SatarkAgent
+    agent = SatarkAgent(KB_PATH, enrol_df, bio_df, demo_df)
+    agent_index = agent.export_index()
+
+    manifest = build_bundle(BUNDLE_DIR, dashboard, model=model, agent_index=agent_index,
+                            sources=source_fingerprints(SOURCE_PATHS))
+
+    print(f"✅ Bundle written to {BUNDLE_DIR}/")
+    for name, info in manifest["files"].items():
+        print(f"   {name:<22} {info['bytes']:>10,} bytes  sha256={info['sha256'][:12]}")
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        print("⚠️  Artifact bundle not built; the server will compute on first request.")
+        sys.exit(0)
@@ -1,21 +1,40 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Request, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
 import uvicorn
-import io
 import pandas as pd
-import joblib
 import json
 import os
 import shutil
+import re
+import threading
+import time
+from contextlib import contextmanager
 
 # Import from refactored processing module
-from services.processing import process_data, smart_merge
-from services.report_generator import generate_report
-from services.api_sync import sync_all_official_data
+# Plotting (matplotlib/fpdf), scikit-learn, joblib and requests are imported on
+# first use and preloaded in the background after start-up (see services/preload.py)
+from services.processing import process_data, smart_merge, prepare_frame
+from services.schemas import SchemaError, read_dataset
+from services.uploads import read_upload, expand_upload, classify, parse_entries
+from services.ledger import UploadLedger, unseen_rows
+from services.sqlstore import SqlStore, SQLITE_PATH
+from services.shared_masters import SharedMasters
+from services.rollup import RollupCube, LEVELS as ROLLUP_LEVELS, DEFAULT_PINCODE_LIMIT, MAX_PINCODE_LIMIT, pincode_sums
+from services.timeline import DailyCube, daily_sums, parse_day, DATASETS as TIMELINE_DATASETS
+from services.forecast import forecast_districts
+from services.report_cache import ReportCache
+from services.bulk_reports import select_districts, stream_zip, build_merged_pdf, shutdown_pool, BULK_FORMATS, MAX_BULK_REPORTS
 from services.rag_agent import SatarkAgent
+from services.preload import preload_in_background, PRELOAD_TIMINGS
+from services.startup import StartupTracker
+from services.artifacts import ArtifactBundle, BundleError, source_fingerprints
+from services.metrics import REGISTRY, REQUEST_SECONDS, DATASET_ROWS, DATASET_BYTES, PROCESS_RSS_BYTES, CONTENT_TYPE, stage_timer
+from services import memory
+from services.tracing import start_trace, span, TRACE_HEADER
 
 app = FastAPI(title="Aadhaar Satark API")
 
@@ -30,6 +49,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Incoming trace ids are only reused if they look like ids (they are echoed back in a header)
+TRACE_ID_PATTERN = re.compile(r'^[A-Za-z0-9-]{8,64}$')
+
+@app.middleware("http")
+async def trace_and_time_requests(request: Request, call_next):
+    """
+    Opens a root tracing span per request (id returned in X-Trace-Id) and records
+    latency per route template (not raw path, to keep label cardinality bounded).
+    """
+    if SHARED is not None:
+        # Another worker process may have published new masters since this one's last request
+        refresh_shared()
+    incoming = request.headers.get(TRACE_HEADER)
+    trace_id = incoming if incoming and TRACE_ID_PATTERN.match(incoming) else None
+    start = time.perf_counter()
+    status = 500
+    with start_trace(f"{request.method} {request.url.path}", trace_id=trace_id) as root:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers[TRACE_HEADER] = root.trace.trace_id
+            return response
+        finally:
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            root.set(route=route, status=status)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=route,
+                status=status
+            )
+
 class DistrictReportRequest(BaseModel):
     state: str
     district: str
@@ -38,18 +89,62 @@ class DistrictReportRequest(BaseModel):
     pending_updates: int
     gap_percentage: float
     status: str
+    forecast: Optional[dict] = None
 
 @app.get("/health")
 def health_check():
     """Simple health check endpoint."""
     return {"status": "ok"}
 
+@app.get("/ready")
+def readiness_check():
+    """Per-stage start-up progress. 200 once loading has finished, 503 while it is running."""
+    snapshot = STARTUP.snapshot()
+    snapshot["preload"] = dict(PRELOAD_TIMINGS)
+    return JSONResponse(content=snapshot, status_code=200 if STARTUP.ready else 503)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition: stage timings/rows, request latency, dataset sizes."""
+    sizes = master_sizes()
+    for name, df in master_frames().items():
+        DATASET_ROWS.set(sizes[name], dataset=name)
+        DATASET_BYTES.set(memory.frame_bytes(df), dataset=name)
+    PROCESS_RSS_BYTES.set(memory.process_rss_bytes())
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/memory")
+def memory_report():
+    """Deep memory usage of the masters, model and agent indexes, per-stage peaks and the budget."""
+    datasets = {name: memory.frame_bytes(df) for name, df in master_frames().items()}
+    return {
+        "process": {"rss_mb": memory.mb(memory.process_rss_bytes()), "peak_rss_mb": memory.mb(memory.process_peak_rss_bytes())},
+        "datasets_mb": {name: memory.mb(size) for name, size in datasets.items()},
+        "datasets_total_mb": memory.mb(sum(datasets.values())),
+        "model_mb": memory.mb(memory.object_bytes(TRAINED_MODEL)),
+        "agent_mb": {name: memory.mb(size) for name, size in memory.agent_bytes(AGENT).items()},
+        "stage_peak_mb": {stage: memory.mb(size) for stage, size in memory.stage_peaks().items()},
+        "stage_tracing": memory.TRACE_STAGE_MEMORY,
+        "budget": {
+            "limit_mb": memory.mb(memory.MEMORY_BUDGET_BYTES) if memory.MEMORY_BUDGET_BYTES else None,
+            "policy": memory.MEMORY_BUDGET_POLICY,
+            "csv_memory_factor": memory.CSV_MEMORY_FACTOR,
+            "pending_spills": len(memory.pending_spills()),
+        },
+    }
+
 # Globals for Persistence
 TRAINED_MODEL = None
 GLOBAL_ENROL_DF = None
 GLOBAL_BIO_DF = None
 GLOBAL_DEMO_DF = None
 AGENT = None
+# Where the masters live: "pandas" (pickled frames in the globals above), "sqlite"
+# (embedded database, see STORE) or "shared" (memory-mapped files every uvicorn
+# worker maps read-only, see SHARED)
+MASTER_STORE = os.getenv("MASTER_STORE", "pandas").lower()
+STORE = None
+SHARED = None
 
 DATA_DIR = "data"
 ENROL_PATH = os.path.join(DATA_DIR, "master_enrolment.pkl")
@@ -57,122 +152,588 @@ BIO_PATH = os.path.join(DATA_DIR, "master_biometric.pkl")
 DEMO_PATH = os.path.join(DATA_DIR, "master_demographic.pkl")
 MODEL_PATH = "models/isolation_forest.joblib"
 INITIAL_DATA_PATH = "data/initial_data.json"
+BUNDLE_DIR = os.getenv("ARTIFACT_BUNDLE_DIR", "artifacts")
+
+# Files already merged into the masters (content hashes), and the analysis of the
+# masters as the last upload left them; repeats of those files are answered from it
+LEDGER = UploadLedger(os.path.join(DATA_DIR, "upload_ledger.json"))
+LAST_UPLOAD_ANALYSIS = None
+
+# Bumped on every data change; derived tables remember the generation they were built from
+DATA_GENERATION = 0
+
+# Tables derived from the masters (rollup cube, daily timeline, window model): name -> (generation, table),
+# built on first use after each change
+DERIVED = {}
+DERIVED_LOCK = threading.Lock()
+
+# Warm-start bundle built at image build time (build_artifacts.py). Its dashboard
+# response is served until the first data change.
+BUNDLE = None
+WARM_DASHBOARD = False
+
+# Content-addressed PDF cache (memory LRU + optional disk tier)
+REPORT_CACHE = ReportCache(
+    max_bytes=int(os.getenv("REPORT_CACHE_MAX_MB", 64)) * 1024 * 1024,
+    disk_dir=os.getenv("REPORT_CACHE_DIR") or None,
+    disk_max_bytes=int(os.getenv("REPORT_CACHE_DISK_MAX_MB", 512)) * 1024 * 1024
+)
+
+DATA_STAGES = ("enrolment", "biometric", "demographic")
+STARTUP = StartupTracker(["bundle", "model", *DATA_STAGES, "agent"])
 
 @app.on_event("startup")
-async def load_artifacts():
-    global TRAINED_MODEL, GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF, AGENT
+async def start_background_loading():
+    """
+    Returns immediately so the server starts listening; artifacts load on a
+    background thread. Until the masters are in, reads fall back to initial_data.json.
+    """
+    preload_in_background()
+    memory.start_stage_tracing()
+    STARTUP.begin()
+    threading.Thread(target=load_artifacts, name="satark-startup", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_report_workers():
+    """Stops the bulk report worker processes so they do not outlive the server."""
+    shutdown_pool()
+
+def _load_master(stage, path, label):
+    """Loads one master pickle inside its startup stage. Returns None if missing or unreadable."""
+    if not os.path.exists(path):
+        STARTUP.skip(stage, f"{path} not found")
+        return None
+    loaded = None
+    with STARTUP.stage(stage):
+        print(f"📂 Loading {label} Master from {path}...")
+        loaded = pd.read_pickle(path)
+    return loaded
+
+def bundle_sources():
+    return source_fingerprints({"enrolment": ENROL_PATH, "biometric": BIO_PATH, "demographic": DEMO_PATH, "model": MODEL_PATH})
+
+def load_artifacts():
+    """Staged loader: bundle -> model -> masters -> agent. A failed stage never leaves globals half-populated."""
+    global TRAINED_MODEL, GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF, AGENT, BUNDLE, WARM_DASHBOARD, STORE, SHARED
     try:
         os.makedirs(DATA_DIR, exist_ok=True)
+
+        # 0. Warm-start bundle (only trusted if built from the files on disk right now)
+        bundle_current = False
+        if os.path.exists(os.path.join(BUNDLE_DIR, "manifest.json")):
+            with STARTUP.stage("bundle"):
+                print(f"📦 Mapping artifact bundle from {BUNDLE_DIR}...")
+                BUNDLE = ArtifactBundle(BUNDLE_DIR)
+                bundle_current = BUNDLE.matches_sources(bundle_sources())
+                WARM_DASHBOARD = bundle_current
+                if not bundle_current:
+                    print("ℹ️ Bundle predates the current datasets; using its text index only.")
+        else:
+            STARTUP.skip("bundle", f"{BUNDLE_DIR}/manifest.json not found")
         
         # 1. Load Model
-        if os.path.exists(MODEL_PATH):
-            print(f"🧠 Loading Trained Model from {MODEL_PATH}...")
-            TRAINED_MODEL = joblib.load(MODEL_PATH)
+        if bundle_current and BUNDLE.has("model.joblib"):
+            with STARTUP.stage("model"):
+                TRAINED_MODEL = BUNDLE.load_model()
+        elif os.path.exists(MODEL_PATH):
+            with STARTUP.stage("model"):
+                print(f"🧠 Loading Trained Model from {MODEL_PATH}...")
+                import joblib
+                TRAINED_MODEL = joblib.load(MODEL_PATH)
+        else:
+            STARTUP.skip("model", f"{MODEL_PATH} not found")
             
-        # 2. Load Master Datasets (if they exist)
-        if os.path.exists(ENROL_PATH):
-            print(f"📂 Loading Enrolment Master from {ENROL_PATH}...")
-            try:
-                GLOBAL_ENROL_DF = pd.read_pickle(ENROL_PATH)
-            except Exception as e:
-                print(f"⚠️ Error loading Enrolment Master: {e}")
-                
-        if os.path.exists(BIO_PATH):
-            print(f"📂 Loading Biometric Master from {BIO_PATH}...")
-            try:
-                GLOBAL_BIO_DF = pd.read_pickle(BIO_PATH)
-            except Exception as e:
-                print(f"⚠️ Error loading Biometric Master: {e}")
-
-        if os.path.exists(DEMO_PATH):
-            print(f"📂 Loading Demographic Master from {DEMO_PATH}...")
-            try:
-                GLOBAL_DEMO_DF = pd.read_pickle(DEMO_PATH)
-            except Exception as e:
-                print(f"⚠️ Error loading Demographic Master: {e}")
+        # 2. Load Master Datasets (if they exist), then publish them together
+        if MASTER_STORE == "sqlite":
+            STORE = open_sql_store()
+        elif MASTER_STORE == "shared":
+            SHARED = open_shared_masters()
+            map_shared()
+        else:
+            enrol_df = _load_master("enrolment", ENROL_PATH, "Enrolment")
+            bio_df = _load_master("biometric", BIO_PATH, "Biometric")
+            demo_df = _load_master("demographic", DEMO_PATH, "Demographic")
+            GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF = enrol_df, bio_df, demo_df
+        LEDGER.load(master_sizes())
             
         # 3. Initialize RAG Agent
-        print("🤖 Initializing RAG Agent...")
-        AGENT = SatarkAgent("data/knowledge_base.txt", GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF)
+        with STARTUP.stage("agent"):
+            print("🤖 Initializing RAG Agent...")
+            index = BUNDLE.agent_index(include_districts=bundle_current) if BUNDLE is not None else None
+            AGENT = SatarkAgent("data/knowledge_base.txt", GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF, index=index, store=STORE)
         
-        print("✅ System Initialization Complete. Persistence Layer Active.")
+        print(f"✅ System Initialization Complete ({STARTUP.snapshot()['status']}). Persistence Layer Active.")
                 
     except Exception as e:
         print(f"⚠️ Warning: Failed to load artifacts: {e}")
+    finally:
+        STARTUP.finish()
+
+def open_sql_store():
+    """The SQLite master store. Pickled masters from the pandas mode are imported once into an empty table."""
+    store = SqlStore(SQLITE_PATH)
+    for stage, path in zip(DATA_STAGES, (ENROL_PATH, BIO_PATH, DEMO_PATH)):
+        if store.row_count(stage) == 0 and os.path.exists(path):
+            with STARTUP.stage(stage):
+                print(f"📂 Importing {path} into {store.path}...")
+                store.upsert(stage, pd.read_pickle(path))
+        else:
+            STARTUP.skip(stage, f"records held in {store.path}")
+    return store
+
+def open_shared_masters():
+    """The shared master files. The first worker to start publishes the pickled masters into them."""
+    shared = SharedMasters()
+    with shared.writer():
+        if shared.map() is None:
+            shared.publish({
+                "enrolment": _load_master("enrolment", ENROL_PATH, "Enrolment"),
+                "biometric": _load_master("biometric", BIO_PATH, "Biometric"),
+                "demographic": _load_master("demographic", DEMO_PATH, "Demographic"),
+            })
+        else:
+            for stage in DATA_STAGES:
+                STARTUP.skip(stage, f"mapped from {shared.path} (version {shared.version})")
+    return shared
+
+def map_shared():
+    """Points the globals at the currently published shared masters."""
+    global GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF
+    frames = SHARED.map() or {}
+    GLOBAL_ENROL_DF = frames.get("enrolment")
+    GLOBAL_BIO_DF = frames.get("biometric")
+    GLOBAL_DEMO_DF = frames.get("demographic")
+
+def refresh_shared():
+    """Remaps after another worker's mutation; everything derived from the old masters is dropped."""
+    if not SHARED.changed():
+        return
+    with stage_timer("shared_remap"):
+        map_shared()
+        invalidate_derived()
+        LEDGER.load(master_sizes())
+        if AGENT:
+            AGENT.update_data(GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF)
+
+@contextmanager
+def master_writes():
+    """
+    Serializes master mutations across worker processes in shared mode: the
+    latest published masters are mapped first, so no other worker's write is
+    lost. A no-op in the other modes.
+    """
+    if SHARED is None:
+        yield
+        return
+    with SHARED.writer():
+        refresh_shared()
+        yield
+
+def require_data_loaded():
+    """Writes must wait for the masters, otherwise the loader would overwrite them."""
+    if STARTUP.loading and any(STARTUP.stages[s]["status"] in ("pending", "running") for s in DATA_STAGES):
+        raise HTTPException(status_code=503, detail="Datasets are still loading. Please retry shortly.", headers={"Retry-After": "5"})
+
+def master_frames():
+    return {"enrolment": GLOBAL_ENROL_DF, "biometric": GLOBAL_BIO_DF, "demographic": GLOBAL_DEMO_DF}
+
+def master_sizes():
+    """Rows per master dataset, wherever the masters are held."""
+    if STORE is not None:
+        return STORE.row_counts()
+    return {dataset: len(df) if df is not None else 0 for dataset, df in master_frames().items()}
+
+def analyze_masters():
+    """
+    process_data over the masters (None until enrolment and biometric data
+    exist). With the SQLite store the district sums are computed in SQL.
+    """
+    sizes = master_sizes()
+    if STORE is None and (GLOBAL_ENROL_DF is None or GLOBAL_BIO_DF is None):
+        return None
+    if STORE is not None and not (sizes["enrolment"] and sizes["biometric"]):
+        return None
+    with span("analyze") as analyze:
+        if STORE is not None:
+            result = STORE.analyze(TRAINED_MODEL)
+        else:
+            result = process_data(
+                GLOBAL_ENROL_DF,
+                GLOBAL_BIO_DF,
+                demographic_data=GLOBAL_DEMO_DF,
+                model=TRAINED_MODEL
+            )
+        analyze.set(districts=len(result.get("districts", [])))
+    if "model" in result: result.pop("model")
+    return result
+
+def enforce_memory_budget(uploads: list):
+    """
+    Projects the footprint of merging `uploads` (classified UploadFileEntry CSVs).
+    Over budget: raises 413, or with MEMORY_BUDGET_POLICY=spill writes the files
+    to the spill directory and returns their spill ids. Returns None when within budget.
+    """
+    current = sum(memory.frame_bytes(df) for df in master_frames().values())
+    projected = memory.projected_upload_bytes(current, [len(u.data) for u in uploads])
+    if not memory.over_budget(projected):
+        return None
+
+    print(f"⚠️ Upload would need ~{memory.mb(projected)} MB (budget {memory.mb(memory.MEMORY_BUDGET_BYTES)} MB)")
+    if memory.MEMORY_BUDGET_POLICY == "spill":
+        return [memory.spill_upload(u.dataset, u.data, u.fingerprint, u.name) for u in uploads]
+    raise HTTPException(
+        status_code=413,
+        detail=f"Upload would raise dataset memory to ~{memory.mb(projected)} MB, above the {memory.mb(memory.MEMORY_BUDGET_BYTES)} MB budget."
+    )
+
+def invalidate_derived():
+    """Called after every data change: precomputed responses no longer describe the masters."""
+    global WARM_DASHBOARD, LAST_UPLOAD_ANALYSIS, DATA_GENERATION
+    WARM_DASHBOARD = False
+    LAST_UPLOAD_ANALYSIS = None
+    DATA_GENERATION += 1
+
+def save_ledger():
+    try:
+        LEDGER.save(master_sizes())
+    except OSError as e:
+        print(f"❌ Error Saving Upload Ledger: {e}")
+
+def record_applied(applied: list, file_reports: list):
+    """Adds the parsed files to the upload ledger and persists it."""
+    for (dataset, digest, name), report in zip(applied, file_reports):
+        LEDGER.record(dataset, digest, name, report["rows"])
+    save_ledger()
+
+def unchanged_upload_response(file_reports: list, start_time: float):
+    """An upload that changed no master: the analysis of the current data, without re-running it if cached."""
+    result = LAST_UPLOAD_ANALYSIS or current_analysis()
+    if result is None:
+        raise HTTPException(status_code=404, detail="No analysis available. Please upload files or run training.")
+    result = dict(result)
+    result['processing_time_ms'] = round((time.time() - start_time) * 1000, 2)
+    result['files'] = file_reports
+    result['rows_applied'] = {}
+    result['upload_status'] = "unchanged"
+    return JSONResponse(content=result)
 
 def save_state():
     """Helper to save current global DFs to disk"""
+    rows = sum(len(df) for df in (GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF) if df is not None)
     try:
-        if GLOBAL_ENROL_DF is not None:
-            GLOBAL_ENROL_DF.to_pickle(ENROL_PATH)
-        if GLOBAL_BIO_DF is not None:
-            GLOBAL_BIO_DF.to_pickle(BIO_PATH)
-        if GLOBAL_DEMO_DF is not None:
-            GLOBAL_DEMO_DF.to_pickle(DEMO_PATH)
+        with stage_timer("save_state", rows=rows):
+            if SHARED is not None:
+                # Publish for every worker, then drop this process's private copy for the mapped one
+                SHARED.publish(master_frames())
+                map_shared()
+                return
+            if GLOBAL_ENROL_DF is not None:
+                GLOBAL_ENROL_DF.to_pickle(ENROL_PATH)
+            if GLOBAL_BIO_DF is not None:
+                GLOBAL_BIO_DF.to_pickle(BIO_PATH)
+            if GLOBAL_DEMO_DF is not None:
+                GLOBAL_DEMO_DF.to_pickle(DEMO_PATH)
         print("💾 State saved successfully.")
     except Exception as e:
         print(f"❌ Error Saving State: {e}")
 
-@app.get("/initial-data")
-async def get_initial_data():
+def current_analysis():
     """
-    Returns the processed analysis. 
+    Returns the processed analysis (or None if nothing is available).
     If Global DFs are loaded, calculate fresh from them.
     Else fall back to initial_data.json.
     """
-    # Priority: Real-time Global Data > Static JSON
-    if GLOBAL_ENROL_DF is not None and GLOBAL_BIO_DF is not None:
-        try:
-            print("🚀 Generating fresh insights from Persistent Store...")
-            result = process_data(
-                GLOBAL_ENROL_DF, 
-                GLOBAL_BIO_DF, 
-                demographic_data=GLOBAL_DEMO_DF,
-                model=TRAINED_MODEL
-            )
-            if "model" in result: result.pop("model")
-            
+    # Priority: Warm-start bundle > Real-time Global Data > Static JSON
+    if WARM_DASHBOARD and BUNDLE is not None:
+        return BUNDLE.dashboard()
+
+    try:
+        result = analyze_masters()
+        if result is not None:
+            print("🚀 Generated fresh insights from Persistent Store...")
+            add_forecasts(result)
             # Add metadata
+            sizes = master_sizes()
             result['dataset_info'] = {
-                "enrolment_records": len(GLOBAL_ENROL_DF),
-                "biometric_records": len(GLOBAL_BIO_DF),
+                "enrolment_records": sizes["enrolment"],
+                "biometric_records": sizes["biometric"],
                 "source": "persistent_store"
             }
-            return JSONResponse(content=result)
-        except Exception as e:
-            print(f"⚠️ generation error: {e}. Falling back to static file.")
+            return result
+    except Exception as e:
+        print(f"⚠️ generation error: {e}. Falling back to static file.")
             
     # Fallback
     if os.path.exists(INITIAL_DATA_PATH):
         with open(INITIAL_DATA_PATH, "r") as f:
-            return JSONResponse(content=json.load(f))
+            return json.load(f)
             
-    return {"error": "No data available. Please upload files or run training."}
+    return None
+
+def derived_table(name: str, build):
+    """A table derived from the masters, built by build() (None: no data) on first use after each change."""
+    with DERIVED_LOCK:
+        cached = DERIVED.get(name)
+        if cached is None or cached[0] != DATA_GENERATION:
+            # A change while building bumps the generation again, so a stale table is rebuilt on next use
+            generation = DATA_GENERATION
+            table = build()
+            if table is None:
+                return None
+            cached = DERIVED[name] = (generation, table)
+        return cached[1]
+
+def masters_present():
+    return STORE is not None or any(df is not None for df in master_frames().values())
+
+def current_rollup():
+    """The rollup cube of the current masters (None if there are none)."""
+    def build():
+        if STORE is not None:
+            return RollupCube.from_pincode_sums(STORE.pincode_sums())
+        if masters_present():
+            return RollupCube.from_pincode_sums(pincode_sums(GLOBAL_ENROL_DF, GLOBAL_BIO_DF))
+        return None
+    return derived_table("rollup", build)
+
+def current_timeline():
+    """The daily prefix-sum cube of the current masters (None if there are none)."""
+    def build():
+        if STORE is not None:
+            return DailyCube({dataset: STORE.daily_sums(dataset, col) for dataset, col, _ in TIMELINE_DATASETS})
+        if masters_present():
+            return DailyCube({dataset: daily_sums(master_frames()[dataset], col) for dataset, col, _ in TIMELINE_DATASETS})
+        return None
+    return derived_table("timeline", build)
+
+def add_forecasts(result: dict, end=None, timeline=None):
+    """
+    Adds each district's projected backlog clearance (biometric throughput
+    through `end`) to its record. Needs the daily timeline, so it is built on
+    first use after a change; uploads do not wait for it.
+    """
+    if result.get("districts"):
+        forecast_districts(result["districts"], timeline or current_timeline(), end)
+
+def window_model(timeline):
+    """
+    The model windows are scored with: TRAINED_MODEL, else an Isolation Forest
+    fitted once per data change on the all-time view, so window requests only predict.
+    """
+    if TRAINED_MODEL is not None:
+        return TRAINED_MODEL
+    return derived_table("window_model", lambda: timeline.analyze(model=None).get("model"))
+
+def window_analysis(date_from: Optional[str], date_to: Optional[str]):
+    """The analysis restricted to records dated within [from, to] (either bound optional)."""
+    try:
+        start = parse_day(date_from) if date_from else None
+        end = parse_day(date_to) if date_to else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    require_data_loaded()
+    timeline = current_timeline()
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="No data available. Please upload files or run training.")
+
+    with span("analyze") as analyze:
+        result = timeline.analyze(start, end, model=window_model(timeline))
+        analyze.set(districts=len(result.get("districts", [])))
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    result.pop("model", None)
+    add_forecasts(result, end, timeline)
+    iso = lambda day: day.isoformat() if day else None
+    result['window'] = {"from": iso(start or timeline.first), "to": iso(end or timeline.last),
+                        "data_from": iso(timeline.first), "data_to": iso(timeline.last)}
+    return result
+
+@app.get("/rollup/{level}")
+def get_rollup(level: str, state: Optional[str] = None, district: Optional[str] = None):
+    """
+    One level of the rollup (nation, state, district or pincode), optionally
+    only the rows under a state and/or district, e.g. /rollup/district?state=Bihar.
+    """
+    if level not in ROLLUP_LEVELS:
+        raise HTTPException(status_code=404, detail=f"Unknown level '{level}'. Use one of: {', '.join(ROLLUP_LEVELS)}")
+    require_data_loaded()
+    cube = current_rollup()
+    if cube is None:
+        raise HTTPException(status_code=404, detail="No data available. Please upload files or run training.")
+    rows = cube.records(level, state=state, district=district)
+    return {"level": level, "count": len(rows), "rows": rows}
+
+@app.get("/district/{state}/{district}/pincodes")
+def get_district_pincodes(
+    state: str,
+    district: str,
+    top: Optional[int] = Query(None, ge=1, le=MAX_PINCODE_LIMIT),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PINCODE_LIMIT, ge=1, le=MAX_PINCODE_LIMIT)
+):
+    """
+    A district's pincodes by descending pending updates: the top `top`, or a
+    page of `limit` starting at `offset`. Served from the rollup's drilldown index.
+    """
+    require_data_loaded()
+    cube = current_rollup()
+    if cube is None:
+        raise HTTPException(status_code=404, detail="No data available. Please upload files or run training.")
+    if top is not None:
+        offset, limit = 0, top
+    found = cube.pincodes(state, district, offset=offset, limit=limit)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"No pincode data for {district}, {state}")
+    total, rows = found
+    return {"state": rows[0]["state"] if rows else state, "district": rows[0]["district"] if rows else district,
+            "total_pincodes": total, "offset": offset, "limit": limit, "rows": rows}
+
+@app.get("/initial-data")
+def get_initial_data(
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to")
+):
+    """
+    Returns the processed analysis (persistent store first, static JSON as fallback).
+    With from/to (YYYY-MM-DD or DD-MM-YYYY) only records dated in that window
+    count, e.g. /initial-data?from=2025-12-01&to=2025-12-31. A plain def: the
+    window analysis and a cold current_analysis() run on the threadpool, not
+    the event loop.
+    """
+    if date_from or date_to:
+        return JSONResponse(content=window_analysis(date_from, date_to))
+
+    if WARM_DASHBOARD and BUNDLE is not None:
+        # Serialized at build time: no parsing, no computation
+        return Response(content=BUNDLE.dashboard_bytes[:], media_type="application/json")
+
+    result = current_analysis()
+    if result is None:
+        return {"error": "No data available. Please upload files or run training."}
+    return JSONResponse(content=result)
+
+def spills_within_budget(spills: list) -> list:
+    """
+    The longest run of spills (oldest first) whose merge keeps the in-memory
+    masters within the memory budget, projected as for an upload. All of them
+    with the SQLite store, where merges never load the masters.
+    """
+    if STORE is not None:
+        return spills
+    current = sum(memory.frame_bytes(df) for df in master_frames().values())
+    for n in range(len(spills)):
+        if memory.over_budget(memory.projected_upload_bytes(current, [s["bytes"] for s in spills[:n + 1]])):
+            return spills[:n]
+    return spills
+
+def read_spill(spill: dict):
+    """A spilled upload parsed in chunks of SPILL_MERGE_CHUNK_ROWS rows."""
+    return read_dataset(memory.spill_path(spill["id"]), spill["dataset"], chunksize=memory.SPILL_MERGE_CHUNK_ROWS)
+
+@app.get("/spill")
+def list_spills():
+    """Uploads spilled over the memory budget and not merged yet."""
+    return {"pending": [{k: s[k] for k in ("id", "dataset", "file", "bytes", "spilled_at")} for s in memory.pending_spills()]}
+
+@app.post("/spill/merge")
+def merge_spills():
+    """
+    Merges the pending spilled uploads (oldest first) that fit the memory
+    budget into the masters and removes them. The SQLite store upserts chunk
+    by chunk; in memory, each dataset's spills go through one smart_merge.
+    Files that fail to parse stay pending and are reported; 413 when not even
+    the oldest spill fits the budget.
+    """
+    global GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF
+    require_data_loaded()
+    merged, failed, batches = [], [], {}
+    with master_writes():
+        pending = memory.pending_spills()
+        spills = spills_within_budget(pending)
+        if pending and not spills:
+            raise HTTPException(status_code=413, detail="Merging the pending spills would still exceed the memory budget; they stay pending.")
+        done = []
+        for spill in spills:
+            chunks, rows = [], 0
+            try:
+                for chunk in read_spill(spill):
+                    rows += len(chunk)
+                    if STORE is not None:
+                        STORE.upsert(spill["dataset"], chunk)
+                    else:
+                        chunks.append(chunk)
+            except (SchemaError, ValueError, OSError) as e:
+                failed.append({"id": spill["id"], "dataset": spill["dataset"], "error": str(e)})
+                continue
+            batches.setdefault(spill["dataset"], []).extend(chunks)
+            done.append((spill, rows))
+
+        # One merge per dataset for all of its spills
+        if "enrolment" in batches:
+            GLOBAL_ENROL_DF = smart_merge(GLOBAL_ENROL_DF, pd.concat(batches["enrolment"], ignore_index=True))
+        if "biometric" in batches:
+            GLOBAL_BIO_DF = smart_merge(GLOBAL_BIO_DF, pd.concat(batches["biometric"], ignore_index=True))
+        if "demographic" in batches:
+            GLOBAL_DEMO_DF = smart_merge(GLOBAL_DEMO_DF, pd.concat(batches["demographic"], ignore_index=True))
+
+        # Which earlier records were overwritten is not tracked; their files must apply again
+        for dataset in {spill["dataset"] for spill, _ in done}:
+            LEDGER.forget(dataset)
+        for spill, rows in done:
+            LEDGER.record(spill["dataset"], spill["fingerprint"], spill["file"], rows)
+            memory.remove_spill(spill["id"])
+            merged.append({"id": spill["id"], "dataset": spill["dataset"], "rows": rows})
+        if merged:
+            invalidate_derived()
+            save_state()
+            save_ledger()
+            if AGENT:
+                AGENT.update_data(GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF)
+    remaining = [s["id"] for s in memory.pending_spills()]
+    return {"merged": merged, "failed": failed, "pending": remaining, "dataset_rows": master_sizes()}
 
 @app.post("/sync-official")
 async def sync_official():
     global GLOBAL_ENROL_DF, GLOBAL_BIO_DF
+    require_data_loaded()
     
     # Initialize if None (Fallbacks to handle empty start)
-    if GLOBAL_ENROL_DF is None: GLOBAL_ENROL_DF = pd.DataFrame()
-    if GLOBAL_BIO_DF is None: GLOBAL_BIO_DF = pd.DataFrame()
+    if STORE is None:
+        if GLOBAL_ENROL_DF is None: GLOBAL_ENROL_DF = pd.DataFrame()
+        if GLOBAL_BIO_DF is None: GLOBAL_BIO_DF = pd.DataFrame()
     
     try:
-        results = sync_all_official_data(GLOBAL_ENROL_DF, GLOBAL_BIO_DF)
-        GLOBAL_ENROL_DF = results["enrolment"]
-        GLOBAL_BIO_DF = results["biometric"]
+        from services.api_sync import sync_all_official_data
+        with master_writes():
+            if STORE is not None:
+                # Only the fetched records are merged in memory; the store upserts them
+                results = sync_all_official_data(None, None)
+                for dataset in ("enrolment", "biometric"):
+                    if results[dataset] is not None:
+                        STORE.upsert(dataset, results[dataset])
+            else:
+                results = sync_all_official_data(GLOBAL_ENROL_DF, GLOBAL_BIO_DF)
+                GLOBAL_ENROL_DF = results["enrolment"]
+                GLOBAL_BIO_DF = results["biometric"]
+            invalidate_derived()
+            # Synced records may overwrite uploaded ones
+            LEDGER.forget()
+            save_ledger()
+            save_state()
         
         # Update Agent
         if AGENT:
-             AGENT.update_data(GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF)
-        
-        save_state()
+            with stage_timer("agent_update"):
+                AGENT.update_data(GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF)
         
+        sizes = master_sizes()
         return {
             "status": "success",
             "message": "Official Data Synced successfully",
-            "enrolment_size": len(GLOBAL_ENROL_DF),
-            "biometric_size": len(GLOBAL_BIO_DF)
+            "enrolment_size": sizes["enrolment"],
+            "biometric_size": sizes["biometric"]
         }
     except Exception as e:
         print(f"❌ Sync Error: {e}")
@@ -180,59 +741,112 @@ async def sync_official():
 
 @app.post("/upload")
 async def upload_files(
-    enrolment_file: UploadFile = File(None),
-    biometric_file: UploadFile = File(None),
-    demographic_file: UploadFile = File(None)
+    enrolment_file: List[UploadFile] = File(None),
+    biometric_file: List[UploadFile] = File(None),
+    demographic_file: List[UploadFile] = File(None),
+    files: List[UploadFile] = File(None)
 ):
-    global GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF
-    import time
+    """
+    Merges uploaded CSVs into the master datasets and re-runs the analysis.
+    Each dataset field takes one or more CSVs or ZIPs of CSVs; `files` takes
+    any mix, with each file's dataset detected from its header. All files are
+    parsed (in parallel) before one merge per dataset and a single persist.
+    """
+    global GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF, LAST_UPLOAD_ANALYSIS
+    require_data_loaded()
     start_time = time.time()
     try:
-        # 1. Read Uploaded Files (Handle Partial Uploads)
-        # Note: 'File' default is not None for File(...), so we check if provided
-        
-        updated = False
-        
-        if enrolment_file:
-            print("📥 Processing Enrolment Update...")
-            enrol_bytes = await enrolment_file.read()
-            if len(enrol_bytes) > 0:
-                new_enrol_df = pd.read_csv(io.BytesIO(enrol_bytes))
-                GLOBAL_ENROL_DF = smart_merge(GLOBAL_ENROL_DF, new_enrol_df)
-                updated = True
-        
-        if biometric_file:
-             print("📥 Processing Biometric Update...")
-             bio_bytes = await biometric_file.read()
-             if len(bio_bytes) > 0:
-                new_bio_df = pd.read_csv(io.BytesIO(bio_bytes))
-                GLOBAL_BIO_DF = smart_merge(GLOBAL_BIO_DF, new_bio_df)
-                updated = True
-                
-        if demographic_file:
-             print("📥 Processing Demographic Update...")
-             demo_bytes = await demographic_file.read()
-             if len(demo_bytes) > 0:
-                new_demo_df = pd.read_csv(io.BytesIO(demo_bytes))
-                GLOBAL_DEMO_DF = smart_merge(GLOBAL_DEMO_DF, new_demo_df)
-                updated = True
-
-        if not updated:
+        # 1. Read Uploaded Files (Handle Partial Uploads), expanding ZIPs into their CSVs
+        fields = (("enrolment", enrolment_file), ("biometric", biometric_file),
+                  ("demographic", demographic_file), (None, files))
+        entries = []
+        try:
+            for dataset, field_uploads in fields:
+                for upload in field_uploads or []:
+                    data, digest = await read_upload(upload)
+                    if len(data) > 0:
+                        print(f"📥 Processing {(dataset or 'bulk').title()} Update: {upload.filename}")
+                        entries += expand_upload(upload.filename or dataset or "upload", data, dataset, digest)
+            # Header checks before any parsing: a bad or unrecognised file (400) leaves the masters untouched
+            classify(entries)
+        except SchemaError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if not entries:
             return JSONResponse({"message": "No valid files received or empty files."}, status_code=400)
+
+        # Files already applied to the current masters (same content hash) are not parsed again
+        LEDGER.validate(master_sizes())
+        fresh, repeated, pending = [], [], set()
+        for entry in entries:
+            key = (entry.dataset, entry.fingerprint)
+            if LEDGER.seen(*key) or key in pending:
+                repeated.append({"file": entry.name, "dataset": entry.dataset, "bytes": len(entry.data),
+                                 "rows": LEDGER.rows(*key), "status": "already_applied"})
+            else:
+                fresh.append(entry)
+                pending.add(key)
+        if not fresh:
+            return unchanged_upload_response(repeated, start_time)
+
+        # Budget check before parsing: refuse (413) or spill to disk instead of risking an OOM kill
+        spilled = enforce_memory_budget(fresh)
+        if spilled:
+            return JSONResponse(status_code=202, content={
+                "message": "Upload exceeds the memory budget; files were spilled to disk. POST /spill/merge merges them in chunks.",
+                "spill_ids": spilled
+            })
+
+        try:
+            frames, file_reports = parse_entries(fresh)
+        except SchemaError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        applied = [(e.dataset, e.fingerprint, e.name) for e in fresh]
+        del entries, fresh
+
+        # Shared mode: merged under the cross-worker lock, against the latest published masters
+        with master_writes():
+            # Only rows the masters do not already hold verbatim are merged
+            masters = master_frames()
+            rows_applied = {}
+            for dataset in list(frames) if STORE is None else []:
+                new_rows, replaced = unseen_rows(masters[dataset], prepare_frame(frames[dataset]))
+                rows_applied[dataset] = len(new_rows)
+                if replaced:
+                    # Earlier files' records were overwritten; a repeat of one of them must be applied again
+                    LEDGER.forget(dataset)
+                if new_rows.empty:
+                    del frames[dataset]
+                else:
+                    frames[dataset] = new_rows
+            for report in file_reports:
+                report["status"] = "applied" if report["dataset"] in frames else "no_new_rows"
+
+            if not frames:
+                record_applied(applied, file_reports)
+                return unchanged_upload_response(file_reports + repeated, start_time)
+
+            # One upsert per dataset for all of its batches
+            if STORE is not None:
+                for dataset in list(frames):
+                    rows_applied[dataset] = STORE.upsert(dataset, frames.pop(dataset))
+                    # Which earlier records were overwritten is not tracked here; their files must apply again
+                    LEDGER.forget(dataset)
+            if "enrolment" in frames:
+                GLOBAL_ENROL_DF = smart_merge(GLOBAL_ENROL_DF, frames.pop("enrolment"))
+            if "biometric" in frames:
+                GLOBAL_BIO_DF = smart_merge(GLOBAL_BIO_DF, frames.pop("biometric"))
+            if "demographic" in frames:
+                GLOBAL_DEMO_DF = smart_merge(GLOBAL_DEMO_DF, frames.pop("demographic"))
+            invalidate_derived()
         
-        # 2. Save State (Persistence)
-        save_state()
+            # 2. Save State (Persistence)
+            save_state()
         
         # 3. Process (Run Analysis on Global Data)
-        result = process_data(
-            GLOBAL_ENROL_DF, 
-            GLOBAL_BIO_DF, 
-            demographic_data=GLOBAL_DEMO_DF,
-            model=TRAINED_MODEL
-        )
-        
-        if "model" in result:
-            result.pop("model") 
+        result = analyze_masters()
+        if result is None:
+            result = {"error": "Enrolment and biometric data are both required for the analysis"}
         
         if "error" in result:
              raise HTTPException(status_code=400, detail=result["error"])
@@ -243,34 +857,105 @@ async def upload_files(
         
         # Update Agent
         if AGENT:
-            AGENT.update_data(GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF)
+            with stage_timer("agent_update"):
+                AGENT.update_data(GLOBAL_ENROL_DF, GLOBAL_BIO_DF, GLOBAL_DEMO_DF)
         
+        sizes = master_sizes()
         result['dataset_info'] = {
-            "enrolment_records": len(GLOBAL_ENROL_DF) if GLOBAL_ENROL_DF is not None else 0,
-            "biometric_records": len(GLOBAL_BIO_DF) if GLOBAL_BIO_DF is not None else 0,
+            "enrolment_records": sizes["enrolment"],
+            "biometric_records": sizes["biometric"],
              "source": "live_update"
         }
+        LAST_UPLOAD_ANALYSIS = dict(result)
+        record_applied(applied, file_reports)
+        result['files'] = file_reports + repeated
+        result['rows_applied'] = rows_applied
+        result['upload_status'] = "applied"
              
         return JSONResponse(content=result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/generate-report")
-async def generate_pdf(report_request: DistrictReportRequest):
+async def generate_pdf(report_request: DistrictReportRequest, if_none_match: Optional[str] = Header(None)):
     try:
+        from services.report_generator import generate_report
         data = report_request.dict()
-        pdf_bytes = generate_report(data)
+        key = ReportCache.key_for(data)
+        etag = f'"{key}"'
+
+        # Client already holds this exact report
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers={'ETag': etag})
+
+        pdf_bytes = REPORT_CACHE.get(key)
+        cache_status = "HIT"
+        if pdf_bytes is None:
+            pdf_bytes = generate_report(data)
+            REPORT_CACHE.put(key, pdf_bytes)
+            cache_status = "MISS"
         
         headers = {
-            'Content-Disposition': f'attachment; filename="Report_{data["district"]}.pdf"'
+            'Content-Disposition': f'attachment; filename="Report_{data["district"]}.pdf"',
+            'ETag': etag,
+            'X-Cache': cache_status
         }
         return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class BulkReportRequest(BaseModel):
+    state: Optional[str] = None
+    status: Optional[str] = None
+    districts: Optional[List[str]] = None
+    format: str = "zip"
+
+@app.post("/generate-report/bulk")
+def generate_bulk_reports(request: BulkReportRequest):
+    """
+    Reports for every district in the current analysis matching the filters.
+    format="zip" streams one PDF per district; format="pdf" returns a single
+    merged PDF with a table of contents. A plain def: FastAPI runs it in its
+    threadpool, so rendering does not block the event loop.
+    """
+    if request.format not in BULK_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(BULK_FORMATS)}")
+
+    analysis = current_analysis()
+    if not analysis or "districts" not in analysis:
+        raise HTTPException(status_code=404, detail="No analysis available. Please upload files or run training.")
+
+    selected = select_districts(analysis["districts"], request.state, request.status, request.districts)
+    if not selected:
+        raise HTTPException(status_code=404, detail="No districts match the requested filters.")
+    if len(selected) > MAX_BULK_REPORTS:
+        raise HTTPException(status_code=400, detail=f"{len(selected)} districts selected; the limit is {MAX_BULK_REPORTS}.")
+
+    print(f"📚 Bulk report requested: {len(selected)} districts ({request.format})")
+    if request.format == "zip":
+        headers = {
+            'Content-Disposition': 'attachment; filename="Satark_Reports.zip"',
+            'X-Report-Count': str(len(selected))
+        }
+        return StreamingResponse(stream_zip(selected), media_type="application/zip", headers=headers)
+
+    try:
+        pdf_bytes, summary = build_merged_pdf(selected)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    headers = {
+        'Content-Disposition': 'attachment; filename="Satark_Reports.pdf"',
+        'X-Report-Count': str(summary["reports"]),
+        'X-Render-Time-Ms': str(summary["elapsed_ms"]),
+        'X-Reports-Per-Second': str(summary["reports_per_second"])
+    }
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
 class ChatRequest(BaseModel):
     query: str
 
@@ -281,6 +966,19 @@ async def chat_endpoint(request: ChatRequest):
         return AGENT.query(request.query)
     return {"answer": "Agent is initializing, please wait..."}
 
+# Queries per /chat/batch request (larger batches get a 422); room for one query per district
+MAX_CHAT_BATCH = int(os.getenv("MAX_CHAT_BATCH", 2000))
+
+class BatchChatRequest(BaseModel):
+    queries: List[str] = Field(..., max_length=MAX_CHAT_BATCH)
+
+@app.post("/chat/batch")
+def chat_batch_endpoint(request: BatchChatRequest):
+    """Answer many agent queries in a single routed pass"""
+    if AGENT:
+        return {"results": AGENT.query_batch(request.queries)}
+    return {"results": [{"answer": "Agent is initializing, please wait..."} for _ in request.queries]}
+
 
 # Mount the static directory (exported from Next.js)
 # Check if ../frontend/out exists (Production/Render)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Import-Time Profiler
+Reports how long a cold `import main` takes and which modules dominate it,
+using CPython's -X importtime output.
+
+Usage: python profile_imports.py [--module main] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Cold import of `main` must stay under this many seconds (override with IMPORT_TIME_BUDGET_S)
+IMPORT_TIME_BUDGET_S = float(os.getenv("IMPORT_TIME_BUDGET_S", 1.5))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_import(module: str = "main"):
+    """Imports `module` in a fresh interpreter. Returns (seconds, loaded heavy modules)."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = [m for m in ('matplotlib', 'sklearn', 'fpdf', 'seaborn', 'requests', 'joblib') if m in sys.modules]\n"
+        "print('IMPORT_TIME', elapsed, ','.join(heavy))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    line = next(l for l in out.stdout.splitlines() if l.startswith("IMPORT_TIME"))
+    parts = line.split()
+    return float(parts[1]), parts[2].split(",") if len(parts) > 2 else []
+
+
+def import_profile(module: str = "main"):
+    """Parses `python -X importtime` into (module, depth, self_us, cumulative_us) rows."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(parts[0]), int(parts[1])))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    elapsed, heavy = measure_import(args.module)
+    print(f"⏱️  Cold import of '{args.module}': {elapsed:.3f}s (budget {IMPORT_TIME_BUDGET_S:.2f}s)")
+    print(f"   Heavy modules loaded eagerly: {', '.join(heavy) or 'none'}")
+
+    rows = import_profile(args.module)
+    # Direct imports of the profiled module give the clearest picture of who pays for what
+    direct = sorted((r for r in rows if r[1] == 1), key=lambda r: r[3], reverse=True)
+
+    print(f"\n{'cumulative (ms)':>16}  {'self (ms)':>10}  module")
+    for name, _, self_us, cum_us in direct[:args.top]:
+        print(f"{cum_us / 1000:>16.1f}  {self_us / 1000:>10.1f}  {name}")
+
+    if elapsed > IMPORT_TIME_BUDGET_S:
+        print("\n❌ Import-time budget exceeded")
+        sys.exit(1)
+    print("\n✅ Within import-time budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,28 @@
+import argparse
 import os
 import pandas as pd
 import json
 from services.processing import process_data
+from services.schemas import read_dataset
 
 # Paths to the real datasets
-BASE_DIR = "/home/saurabh/aadhaar-satark/UIDAIHackathonDataSets"
+BASE_DIR = os.getenv("UIDAI_DATASETS_DIR", "/home/saurabh/aadhaar-satark/UIDAIHackathonDataSets")
 ENROL_DIR = os.path.join(BASE_DIR, "api_data_aadhar_enrolment")
 BIO_DIR = os.path.join(BASE_DIR, "api_data_aadhar_biometric")
+DEMO_DIR = os.path.join(BASE_DIR, "api_data_aadhar_demographic")
 
-def load_and_merge_csvs(directory):
-    all_files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.csv')]
+def csv_files(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.csv'))
+
+def load_and_merge_csvs(directory, kind):
+    all_files = csv_files(directory)
     print(f"Loading {len(all_files)} files from {directory}...")
     df_list = []
     for f in all_files:
         print(f" - Reading {os.path.basename(f)} ({os.path.getsize(f)/1024/1024:.2f} MB)")
-        df = pd.read_csv(f)
+        df = read_dataset(f, kind)
         df_list.append(df)
     
     if not df_list:
@@ -25,19 +33,46 @@ import joblib
 
 # ... (Previous imports)
 
+def run_out_of_core(workers, chunk_rows):
+    """Map-reduce over the CSVs: only per-district sums are ever held in memory."""
+    from services.mapreduce import process_files
+    enrol_files, bio_files, demo_files = csv_files(ENROL_DIR), csv_files(BIO_DIR), csv_files(DEMO_DIR)
+    print(f"🗺️  Out-of-core aggregation of {len(enrol_files) + len(bio_files) + len(demo_files)} files "
+          f"({workers or 'auto'} workers, {chunk_rows:,} rows per chunk)...")
+    result = process_files(enrol_files, bio_files, demo_files, workers=workers, chunk_rows=chunk_rows)
+    if "error" not in result:
+        info = result["dataset_info"]
+        print(f"   {info['enrolment_records'] + info['biometric_records'] + info['demographic_records']:,} records "
+              f"-> {result['summary']['processed_districts']} districts in {info['aggregation_ms'] / 1000:.1f}s")
+    return result
+
 def main():
+    parser = argparse.ArgumentParser(description="Analyse the UIDAI datasets and train the anomaly model.")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="aggregate CSVs chunk by chunk across worker processes instead of loading them all")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=250_000)
+    args = parser.parse_args()
+
     print("🚀 Starting Comprehensive Real Data Analysis & Training...")
-    
-    # ... (Loading data code same as before)
-    enrol_df = load_and_merge_csvs(ENROL_DIR)
-    bio_df = load_and_merge_csvs(BIO_DIR)
-    
-    # NEW: Load Demographic Data
-    DEMO_DIR = os.path.join(BASE_DIR, "api_data_aadhar_demographic")
-    demo_df = load_and_merge_csvs(DEMO_DIR)
-    
-    print("🧠 Training AI Model on 2.8M Records (Enrolment + Biometric + Demographic)...")
-    result = process_data(enrol_df, bio_df, demo_df) # No model passed = Training Mode
+
+    if args.out_of_core:
+        result = run_out_of_core(args.workers, args.chunk_rows)
+        enrol_df = bio_df = None
+    else:
+        # ... (Loading data code same as before)
+        enrol_df = load_and_merge_csvs(ENROL_DIR, "enrolment")
+        bio_df = load_and_merge_csvs(BIO_DIR, "biometric")
+        
+        # NEW: Load Demographic Data
+        demo_df = load_and_merge_csvs(DEMO_DIR, "demographic")
+        
+        print("🧠 Training AI Model on 2.8M Records (Enrolment + Biometric + Demographic)...")
+        result = process_data(enrol_df, bio_df, demo_df) # No model passed = Training Mode
+
+    if "error" in result:
+        print(f"❌ Analysis failed: {result['error']}")
+        return
     
     # Separate Model and Data
     model = result.pop('model')
@@ -51,9 +86,12 @@ def main():
         json.dump(result, f, indent=2)
         
     # NEW: Save Master Datasets for API Persistence
-    print("💾 Saving Master Datasets for Stateful API...")
-    enrol_df.to_pickle("data/master_enrolment.pkl")
-    bio_df.to_pickle("data/master_biometric.pkl")
+    if enrol_df is None:
+        print("ℹ️ Out-of-core mode keeps no record-level data; master datasets were not saved.")
+    else:
+        print("💾 Saving Master Datasets for Stateful API...")
+        enrol_df.to_pickle("data/master_enrolment.pkl")
+        bio_df.to_pickle("data/master_biometric.pkl")
     # demo_df.to_pickle("data/master_demographic.pkl") # Optional if needed
         
     print(f"💾 Persisting Model to {model_path}...")
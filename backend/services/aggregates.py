@@ -0,0 +1,125 @@
+import pandas as pd
+import numpy as np
+
+# Columns of the precomputed aggregate tables used by the agent
+METRIC_COLUMNS = ['expected_updates', 'actual_updates', 'pending_updates', 'gap_percentage', 'efficiency_index']
+
+
+def _district_groups(df: pd.DataFrame, data: pd.Series = None):
+    """
+    data (default: df's rows) grouped by (state, district), or None without a
+    district column. A frame with no state column is grouped by district alone,
+    under a missing state; rows without a district are dropped either way.
+    """
+    if df is None or df.empty or 'district' not in df.columns:
+        return None
+    data = pd.Series(0, index=df.index) if data is None else data
+    if 'state' in df.columns:
+        return data.groupby([df['state'], df['district']])
+    state = pd.Series(np.nan, index=df.index, dtype=object, name='state')
+    return data[df['district'].notna()].groupby([state, df['district']], dropna=False)
+
+
+def _sum_by(df: pd.DataFrame, col: str) -> pd.Series:
+    if df is None or col not in df.columns:
+        return pd.Series(dtype=float)
+    groups = _district_groups(df, pd.to_numeric(df[col], errors='coerce').fillna(0))
+    return groups.sum() if groups is not None else pd.Series(dtype=float)
+
+
+def classify_status(gap_percentage) -> np.ndarray:
+    """Vectorised version of the SAFE / MODERATE / CRITICAL thresholds used in process_data."""
+    gap = np.asarray(gap_percentage, dtype=float)
+    return np.select([gap > 50, gap > 20], ["CRITICAL", "MODERATE"], default="SAFE")
+
+
+def add_metrics(table: pd.DataFrame) -> pd.DataFrame:
+    """Derives pending, gap, efficiency and status from expected/actual columns (in place)."""
+    expected = table['expected_updates'].to_numpy(dtype=float)
+    actual = table['actual_updates'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gap = np.where(expected > 0, (expected - actual) / expected * 100, 0.0)
+        efficiency = np.where(expected > 0, actual / expected, 0.0)
+
+    table['pending_updates'] = np.clip(expected - actual, 0, None)
+    table['gap_percentage'] = np.clip(gap, 0, 100)
+    table['efficiency_index'] = efficiency
+    table['status'] = classify_status(table['gap_percentage'])
+    return table
+
+
+def build_district_table(enrol_df, bio_df, demo_df=None) -> pd.DataFrame:
+    """
+    One row per (state, district) with expected/actual/pending/gap/efficiency/status
+    and the number of demographic correction records. Computed with one groupby per dataset.
+    """
+    expected = _sum_by(enrol_df, 'age_5_17')
+    actual = _sum_by(bio_df, 'bio_age_5_17')
+    groups = _district_groups(demo_df)
+    corrections = groups.size() if groups is not None else None
+    return district_table_from_sums(expected, actual, corrections)
+
+
+def district_table_from_sums(expected: pd.Series, actual: pd.Series, corrections: pd.Series = None) -> pd.DataFrame:
+    """
+    The district table from per-(state, district) series: enrolment and
+    biometric totals and demographic record counts (None when there are none).
+    """
+    keys = ['state', 'district']
+    table = pd.concat([expected.rename('expected_updates'), actual.rename('actual_updates')], axis=1).fillna(0)
+    if table.empty:
+        return pd.DataFrame(columns=keys + METRIC_COLUMNS + ['status', 'corrections'])
+    table.index.names = keys
+
+    if corrections is not None:
+        table['corrections'] = corrections.reindex(table.index, fill_value=0)
+    else:
+        table['corrections'] = 0
+
+    return add_metrics(table.reset_index())
+
+
+def build_state_table(district_table: pd.DataFrame) -> pd.DataFrame:
+    """Rolls the district table up to one row per state. Pending is the sum of district backlogs."""
+    return rollup_districts(district_table, ['state'])
+
+
+def rollup_districts(district_table: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """
+    Rolls the district table up to one row per value of keys (a single row
+    for all districts when keys is empty). Pending is the sum of district backlogs.
+    """
+    if district_table.empty:
+        return pd.DataFrame(columns=keys + METRIC_COLUMNS + ['status', 'critical_districts', 'districts'])
+
+    grouped = district_table.groupby(keys or np.zeros(len(district_table), dtype=int))
+    table = grouped[['expected_updates', 'actual_updates', 'pending_updates']].sum()
+    table['critical_districts'] = grouped['status'].agg(lambda s: int((s == "CRITICAL").sum()))
+    table['districts'] = grouped.size()
+    table = table.reset_index(drop=not keys)
+
+    expected = table['expected_updates'].to_numpy(dtype=float)
+    pending = table['pending_updates'].to_numpy(dtype=float)
+    actual = table['actual_updates'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['gap_percentage'] = np.clip(np.where(expected > 0, pending / expected * 100, 0.0), 0, 100)
+        table['efficiency_index'] = np.where(expected > 0, actual / expected, 0.0)
+    table['status'] = classify_status(table['gap_percentage'])
+    return table
+
+
+def top_k_indices(values, k: int, descending: bool = True) -> np.ndarray:
+    """
+    Indices of the k best entries in sorted order. Uses argpartition so only the
+    selected k values are sorted (O(n + k log k) instead of a full sort).
+    """
+    keyed = np.asarray(values, dtype=float)
+    if descending:
+        keyed = -keyed
+    n = len(keyed)
+    if k <= 0 or n == 0:
+        return np.array([], dtype=int)
+    if k >= n:
+        return np.argsort(keyed, kind='stable')
+    part = np.argpartition(keyed, k - 1)[:k]
+    return part[np.argsort(keyed[part], kind='stable')]
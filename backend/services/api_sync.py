@@ -3,6 +3,9 @@ import pandas as pd
 from typing import Dict, List, Optional
 import os
 from .processing import smart_merge
+from .schemas import apply_schema
+from .metrics import stage_timer, STAGE_ROWS
+from .tracing import span
 
 # Resource IDs from Data.Gov.in
 RESOURCES = {
@@ -15,14 +18,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 API_KEY = os.getenv("DATA_GOV_API_KEY", "579b464db66ec23bdd000001cdd3946e44ce4aad7209ff7b23ac571b") # Fallback for demo
-BASE_URL = "https://api.data.gov.in/resource/"
+# Overridable so load tests can point sync at a local stand-in (benchmarks/fake_data_gov.py)
+BASE_URL = os.getenv("DATA_GOV_BASE_URL", "https://api.data.gov.in/resource/")
 
 TOTAL_RECORDS_TO_FETCH = 2000  # Fetch enough data to show impact, but don't slow down demo
 
-def fetch_data_gov_resource(resource_id: str, limit: int = 500) -> Optional[pd.DataFrame]:
+def fetch_data_gov_resource(resource_id: str, limit: int = 500, kind: str = None) -> Optional[pd.DataFrame]:
     """
     Fetches data from a specific Data.Gov.in resource with pagination.
-    Fetches up to TOTAL_RECORDS_TO_FETCH records.
+    Fetches up to TOTAL_RECORDS_TO_FETCH records. With kind, the records (all
+    strings in the API response) are typed by that dataset's schema.
     """
     all_records = []
     offset = 0
@@ -39,13 +44,15 @@ def fetch_data_gov_resource(resource_id: str, limit: int = 500) -> Optional[pd.D
         url = f"{BASE_URL}{resource_id}"
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            with stage_timer("sync_page_fetch"):
+                response = requests.get(url, params=params, timeout=10)
+                response.raise_for_status()
+                data = response.json()
             
             if 'records' in data and len(data['records']) > 0:
                 records = data['records']
                 all_records.extend(records)
+                STAGE_ROWS.inc(len(records), stage="sync_page_fetch")
                 print(f"   🔹 Fetched {len(records)} records (Total: {len(all_records)})")
                 
                 if len(records) < limit:
@@ -61,6 +68,8 @@ def fetch_data_gov_resource(resource_id: str, limit: int = 500) -> Optional[pd.D
             
     if all_records:
         df = pd.DataFrame(all_records)
+        if kind:
+            df = apply_schema(df, kind)
         print(f"✅ Successfully loaded {len(df)} records from {resource_id}")
         return df
         
@@ -71,13 +80,17 @@ def sync_all_official_data(master_enrol: pd.DataFrame, master_bio: pd.DataFrame)
     print("🚀 Starting sync with Data.Gov.in Official Portal...")
     
     # Enrolment
-    new_enrol = fetch_data_gov_resource(RESOURCES["enrolment"])
+    with span("sync_resource", dataset="enrolment") as fetch:
+        new_enrol = fetch_data_gov_resource(RESOURCES["enrolment"], kind="enrolment")
+        fetch.set(rows=len(new_enrol) if new_enrol is not None else 0)
     if new_enrol is not None:
         master_enrol = smart_merge(master_enrol, new_enrol)
         print(f"✅ Synced Enrolment: Added/Updated records.")
 
     # Biometric
-    new_bio = fetch_data_gov_resource(RESOURCES["biometric"])
+    with span("sync_resource", dataset="biometric") as fetch:
+        new_bio = fetch_data_gov_resource(RESOURCES["biometric"], kind="biometric")
+        fetch.set(rows=len(new_bio) if new_bio is not None else 0)
     if new_bio is not None:
         master_bio = smart_merge(master_bio, new_bio)
         print(f"✅ Synced Biometric: Added/Updated records.")
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import mmap
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import classify_status
+
+# Bump when the bundle layout changes; older bundles are then ignored
+BUNDLE_FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+
+DASHBOARD_FILE = "dashboard.json"
+MODEL_FILE = "model.joblib"
+AGENT_INDEX_FILE = "agent_index.joblib"
+DISTRICT_KEYS_FILE = "district_keys.json"
+DISTRICT_METRICS_FILE = "district_metrics.npy"
+DISTRICT_METRIC_COLUMNS = ['expected_updates', 'actual_updates', 'pending_updates',
+                           'gap_percentage', 'efficiency_index', 'corrections']
+
+
+class BundleError(Exception):
+    """Raised when a bundle is missing, from another format version or fails its hash check."""
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprints(paths: dict) -> dict:
+    """Cheap identity of the inputs (size + mtime), so start-up never has to hash the masters."""
+    fingerprints = {}
+    for name, path in paths.items():
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprints[name] = {"bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        else:
+            fingerprints[name] = None
+    return fingerprints
+
+
+def build_bundle(out_dir: str, dashboard: dict, model=None, agent_index: dict = None, sources: dict = None) -> dict:
+    """
+    Writes the warm-start bundle: serialized dashboard response, model, agent
+    indexes and the district aggregates as a memory-mappable array, plus a
+    manifest with the SHA-256 of every file. Returns the manifest.
+    """
+    import joblib
+
+    os.makedirs(out_dir, exist_ok=True)
+    files = []
+
+    with open(os.path.join(out_dir, DASHBOARD_FILE), 'wb') as f:
+        f.write(json.dumps(dashboard, separators=(',', ':')).encode('utf-8'))
+    files.append(DASHBOARD_FILE)
+
+    if model is not None:
+        joblib.dump(model, os.path.join(out_dir, MODEL_FILE))
+        files.append(MODEL_FILE)
+
+    if agent_index is not None:
+        table = agent_index.get("district_table")
+        text_index = {k: agent_index[k] for k in ("documents", "vectorizer", "tfidf_matrix")}
+        joblib.dump(text_index, os.path.join(out_dir, AGENT_INDEX_FILE))
+        files.append(AGENT_INDEX_FILE)
+
+        if table is not None:
+            with open(os.path.join(out_dir, DISTRICT_KEYS_FILE), 'w') as f:
+                json.dump(table[['state', 'district']].values.tolist(), f)
+            metrics = table[DISTRICT_METRIC_COLUMNS].to_numpy(dtype=np.float64)
+            np.save(os.path.join(out_dir, DISTRICT_METRICS_FILE), metrics)
+            files += [DISTRICT_KEYS_FILE, DISTRICT_METRICS_FILE]
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sources": sources or {},
+        "district_metric_columns": DISTRICT_METRIC_COLUMNS,
+        "files": {
+            name: {
+                "sha256": file_sha256(os.path.join(out_dir, name)),
+                "bytes": os.path.getsize(os.path.join(out_dir, name)),
+            }
+            for name in files
+        },
+    }
+    # Manifest last: a half-written bundle never has one
+    tmp_path = os.path.join(out_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_NAME))
+    return manifest
+
+
+class ArtifactBundle:
+    """
+    Read-only view of a bundle. The dashboard JSON is memory-mapped and served
+    as-is, the district metrics are a memory-mapped array and the model is
+    loaded with joblib's mmap mode, so nothing is recomputed at start-up.
+    """
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            raise BundleError(f"No bundle manifest at {manifest_path}")
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise BundleError(f"Unsupported bundle format {self.manifest.get('format_version')}")
+        if verify:
+            self.verify()
+
+        with open(os.path.join(path, DASHBOARD_FILE), 'rb') as f:
+            self._dashboard = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def has(self, name: str) -> bool:
+        return name in self.manifest["files"]
+
+    def verify(self):
+        for name, info in self.manifest["files"].items():
+            file_path = os.path.join(self.path, name)
+            if not os.path.exists(file_path) or file_sha256(file_path) != info["sha256"]:
+                raise BundleError(f"Bundle file {name} is missing or does not match the manifest")
+
+    def matches_sources(self, sources: dict) -> bool:
+        """True if the bundle was built from exactly these inputs."""
+        return self.manifest.get("sources") == sources
+
+    @property
+    def dashboard_bytes(self):
+        return self._dashboard
+
+    def dashboard(self) -> dict:
+        return json.loads(self._dashboard[:])
+
+    def load_model(self):
+        if not self.has(MODEL_FILE):
+            return None
+        import joblib
+        return joblib.load(os.path.join(self.path, MODEL_FILE), mmap_mode='r')
+
+    def district_table(self):
+        if not self.has(DISTRICT_METRICS_FILE):
+            return None
+        with open(os.path.join(self.path, DISTRICT_KEYS_FILE)) as f:
+            keys = json.load(f)
+        metrics = np.load(os.path.join(self.path, DISTRICT_METRICS_FILE), mmap_mode='r')
+        columns = self.manifest["district_metric_columns"]
+        table = pd.DataFrame(keys, columns=['state', 'district'])
+        for i, col in enumerate(columns):
+            table[col] = metrics[:, i]
+        table['status'] = classify_status(table['gap_percentage'])
+        return table
+
+    def agent_index(self, include_districts: bool = True):
+        if not self.has(AGENT_INDEX_FILE):
+            return None
+        import joblib
+        index = joblib.load(os.path.join(self.path, AGENT_INDEX_FILE))
+        index["district_table"] = self.district_table() if include_districts else None
+        return index
@@ -0,0 +1,160 @@
+import io
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Worker processes used for bulk rendering (spawned once, reused across requests)
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", os.cpu_count() or 1))
+# Below this many reports the pool start-up costs more than it saves
+MIN_PARALLEL_REPORTS = 4
+MAX_BULK_REPORTS = int(os.getenv("MAX_BULK_REPORTS", 1000))
+BULK_FORMATS = ("zip", "pdf")
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    # Bulk requests run on the threadpool; two first requests must not each start a pool
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: forking a threaded server process is not safe
+            _POOL = ProcessPoolExecutor(max_workers=REPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def shutdown_pool():
+    """Stops the report workers, if any were started. The next bulk request starts a new pool."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown()
+            _POOL = None
+
+
+def select_districts(districts: list, state: str = None, status: str = None, names: list = None) -> list:
+    """Filters analysis rows by state, status and/or district names (case-insensitive)."""
+    selected = districts
+    if state:
+        selected = [d for d in selected if str(d.get('state', '')).lower() == state.lower()]
+    if status:
+        selected = [d for d in selected if str(d.get('status', '')).upper() == status.upper()]
+    if names:
+        wanted = {n.lower() for n in names}
+        selected = [d for d in selected if str(d.get('district', '')).lower() in wanted]
+    return selected
+
+
+def report_filename(district_data: dict) -> str:
+    name = f"Report_{district_data.get('state', 'NA')}_{district_data.get('district', 'NA')}"
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name) + ".pdf"
+
+
+def _chart_args(d: dict) -> tuple:
+    return (d.get('district', 'N/A'), d.get('expected_updates', 0), d.get('actual_updates', 0))
+
+
+class BulkProgress:
+    """Counts finished reports and logs progress/throughput roughly every 10%."""
+
+    def __init__(self, total: int, label: str):
+        self.total = total
+        self.label = label
+        self.done = 0
+        self.start = time.perf_counter()
+        self._step = max(1, total // 10)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def per_second(self) -> float:
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    def advance(self):
+        self.done += 1
+        if self.done % self._step == 0 or self.done == self.total:
+            print(f"📄 {self.label}: {self.done}/{self.total} ({self.per_second:.1f} reports/sec)")
+
+    def summary(self) -> dict:
+        return {
+            "reports": self.done,
+            "elapsed_ms": round(self.elapsed * 1000, 2),
+            "reports_per_second": round(self.per_second, 2),
+            "workers": REPORT_WORKERS if self.total >= MIN_PARALLEL_REPORTS else 1,
+        }
+
+
+def _run(func, args_list: list, progress: BulkProgress):
+    """Yields (index, result) as work completes, across the process pool when worthwhile."""
+    if len(args_list) < MIN_PARALLEL_REPORTS or REPORT_WORKERS <= 1:
+        for i, args in enumerate(args_list):
+            result = func(*args)
+            progress.advance()
+            yield i, result
+        return
+
+    pool = _get_pool()
+    futures = {pool.submit(func, *args): i for i, args in enumerate(args_list)}
+    for future in as_completed(futures):
+        progress.advance()
+        yield futures[future], future.result()
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink so ZipFile emits entries as they are written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(districts: list):
+    """
+    Generator producing a ZIP archive (one PDF per district) incrementally, in
+    completion order. A summary.json with throughput figures is the last entry.
+    """
+    from .report_generator import generate_report
+
+    progress = BulkProgress(len(districts), "Bulk ZIP")
+    sink = _StreamBuffer()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for i, pdf_bytes in _run(generate_report, [(d,) for d in districts], progress):
+            archive.writestr(report_filename(districts[i]), pdf_bytes)
+            yield sink.drain()
+        archive.writestr("summary.json", json.dumps(progress.summary(), indent=2))
+    yield sink.drain()
+
+
+def build_merged_pdf(districts: list):
+    """
+    Single PDF with a table of contents. Charts (the expensive part) are rendered
+    across the pool; the document itself is assembled in this process.
+    Returns (pdf_bytes, summary).
+    """
+    from .report_generator import generate_combined_report, render_chart
+
+    progress = BulkProgress(len(districts), "Bulk PDF")
+    charts = [None] * len(districts)
+    for i, chart in _run(render_chart, [_chart_args(d) for d in districts], progress):
+        charts[i] = chart
+    pdf_bytes = generate_combined_report(districts, charts)
+    return pdf_bytes, progress.summary()
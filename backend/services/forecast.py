@@ -0,0 +1,94 @@
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+from .metrics import stage_timer
+
+# Holt (double exponential smoothing) weights for the level and the trend of daily throughput
+SMOOTHING_LEVEL = float(os.getenv("FORECAST_SMOOTHING_LEVEL", 0.3))
+SMOOTHING_TREND = float(os.getenv("FORECAST_SMOOTHING_TREND", 0.1))
+# Clearance further out than this is reported as not projected
+MAX_FORECAST_DAYS = int(os.getenv("MAX_FORECAST_DAYS", 3650))
+
+
+def holt(series: np.ndarray, alpha: float = SMOOTHING_LEVEL, beta: float = SMOOTHING_TREND):
+    """
+    Final (level, trend) of Holt's linear smoothing for every column of a
+    (days, districts) array at once: one vectorised update per day, no loop
+    over districts. Each column starts at its first non-zero day; days before
+    it are not counted as zero throughput.
+    """
+    n_days, n_series = series.shape
+    level = np.zeros(n_series)
+    trend = np.zeros(n_series)
+    started = np.zeros(n_series, dtype=bool)
+    for y in series:
+        first = ~started & (y > 0)
+        previous = level
+        level = np.where(started, alpha * y + (1 - alpha) * (level + trend), np.where(first, y, level))
+        trend = np.where(started, beta * (level - previous) + (1 - beta) * trend, trend)
+        started |= first
+    return level, trend
+
+
+def days_to_clear(pending: np.ndarray, level: np.ndarray, trend: np.ndarray, max_days: int = MAX_FORECAST_DAYS) -> np.ndarray:
+    """
+    Days until the cumulative projected throughput (level + h * trend on day h,
+    never below zero) covers pending. NaN where it never does within max_days.
+    """
+    pending = np.asarray(pending, dtype=float)
+    # Cumulative throughput after h days: a*h^2 + b*h, solved for pending
+    a, b = trend / 2, level + trend / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        disc = b * b + 4 * a * pending
+        root = np.where(a != 0, (-b + np.sqrt(disc)) / (2 * a), pending / b)
+        # A falling trend reaches zero throughput at -level/trend; past that the backlog stops shrinking
+        falling = trend < 0
+        stalls = falling & ((disc < 0) | (root > -level / trend))
+    days = np.where(stalls | ~np.isfinite(root) | (root < 0), np.nan, np.ceil(root - 1e-9))
+    days = np.where(pending <= 0, 0, days)
+    return np.where(days > max_days, np.nan, days)
+
+
+def attach_forecasts(records: list, throughput: np.ndarray, keys: list, last_day: date):
+    """
+    Adds a "forecast" to each district record (state, district, pending_updates):
+    smoothed daily biometric throughput, its trend, and the projected days and
+    date to clear the backlog. throughput is (days, districts) with districts
+    in the order of keys, ending on last_day. Records with no history get none.
+    """
+    if not records:
+        return records
+    with stage_timer("forecast", rows=len(records)):
+        column = {key: i for i, key in enumerate(keys)}
+        positions = np.array([column.get((r['state'], r['district']), -1) for r in records])
+        known = positions >= 0
+        if throughput.size == 0 or last_day is None:
+            known[:] = False
+        if known.any():
+            level, trend = holt(throughput[:, positions[known]])
+            pending = np.array([r['pending_updates'] for r in records], dtype=float)[known]
+            days = days_to_clear(pending, level, trend)
+        i = 0
+        for record, has_history in zip(records, known):
+            if not has_history:
+                record['forecast'] = None
+                continue
+            clear_days = None if np.isnan(days[i]) else int(days[i])
+            record['forecast'] = {
+                "daily_throughput": round(float(level[i]), 1),
+                "trend_per_day": round(float(trend[i]), 2),
+                "days_to_clear": clear_days,
+                "clear_by": (last_day + timedelta(days=clear_days)).isoformat() if clear_days is not None else None,
+            }
+            i += 1
+    return records
+
+
+def forecast_districts(records: list, cube, end: date = None):
+    """attach_forecasts from a DailyCube's biometric throughput through end (default: its last day)."""
+    if not records or cube is None or cube.first is None:
+        return records
+    series, last_day = cube.daily("biometric", end)
+    return attach_forecasts(records, series, list(cube.districts), last_day)
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+LEDGER_PATH = os.getenv("UPLOAD_LEDGER_PATH", os.path.join("data", "upload_ledger.json"))
+# A record's identity in the masters, as in smart_merge's dedup subset
+RECORD_KEY = ['state', 'district', 'pincode', 'date']
+
+_lock = threading.Lock()
+_hash_cache = {}
+
+
+class UploadLedger:
+    """
+    Fingerprints of the files already applied to each master dataset, so an
+    exact re-upload can be answered without parsing. Persisted next to the
+    masters along with their row counts; entries for a dataset are dropped when
+    its master on disk no longer has the row count they were recorded against.
+    """
+
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        self.files = {}
+        self.master_rows = {}
+
+    def load(self, masters: dict):
+        """masters: dataset -> the frame loaded at startup (or None), or its row count."""
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = {}
+        self.files = stored.get("files", {})
+        self.master_rows = stored.get("master_rows", {})
+        return self.validate(masters)
+
+    def validate(self, masters: dict):
+        """Drops the entries of any dataset whose master changed size since they were recorded."""
+        for dataset in list(self.files):
+            if self.master_rows.get(dataset) != _row_count(masters.get(dataset)):
+                self.forget(dataset)
+        return self
+
+    def save(self, masters: dict):
+        """Persists the ledger against the masters' current row counts."""
+        with _lock:
+            self.master_rows = {dataset: _row_count(df) for dataset, df in masters.items() if df is not None}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"files": self.files, "master_rows": self.master_rows}, f, indent=1)
+            os.replace(tmp, self.path)
+
+    def seen(self, dataset: str, file_fingerprint: str) -> bool:
+        return file_fingerprint in self.files.get(dataset, {})
+
+    def rows(self, dataset: str, file_fingerprint: str):
+        """Rows the file had when it was applied (None if it is not in the ledger)."""
+        return self.files.get(dataset, {}).get(file_fingerprint, {}).get("rows")
+
+    def record(self, dataset: str, file_fingerprint: str, name: str, rows: int):
+        self.files.setdefault(dataset, {})[file_fingerprint] = {
+            "file": name, "rows": rows, "applied_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    def forget(self, dataset: str = None):
+        """Earlier files no longer describe the master (records overwritten or replaced by a sync)."""
+        if dataset is None:
+            self.files.clear()
+        else:
+            self.files.pop(dataset, None)
+
+
+def _row_count(master) -> int:
+    # A master frame, or the row count of one held elsewhere (the SQL store)
+    if master is None:
+        return 0
+    return master if isinstance(master, int) else len(master)
+
+
+def _normalized(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    # Counts may be int64 in one frame and float64 in another; hash them alike
+    return pd.DataFrame({c: df[c].astype("float64") if pd.api.types.is_numeric_dtype(df[c]) else df[c]
+                         for c in columns})
+
+
+def _hashes(df: pd.DataFrame, columns: list) -> np.ndarray:
+    if not columns:
+        return np.zeros(len(df), dtype="uint64")
+    return pd.util.hash_pandas_object(_normalized(df, columns), index=False).to_numpy()
+
+
+def _contains(sorted_hashes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Binary search against the cached sorted array: O(n log N) per upload, no re-sort of the master
+    if not len(sorted_hashes):
+        return np.zeros(len(values), dtype=bool)
+    idx = np.minimum(np.searchsorted(sorted_hashes, values), len(sorted_hashes) - 1)
+    return sorted_hashes[idx] == values
+
+
+def _master_hashes(master: pd.DataFrame, columns: list, key_columns: list):
+    """
+    Sorted row and record-key hashes of a master, cached per frame object
+    (masters are replaced, not mutated).
+    """
+    cache_key = (id(master), tuple(columns), tuple(key_columns))
+    with _lock:
+        cached = _hash_cache.get(cache_key)
+        if cached is not None and cached[0]() is master and cached[1] == master.shape:
+            return cached[2], cached[3]
+    rows, keys = np.sort(_hashes(master, columns)), np.sort(_hashes(master, key_columns))
+    with _lock:
+        _hash_cache[cache_key] = (weakref.ref(master, lambda _, k=cache_key: _hash_cache.pop(k, None)),
+                                  master.shape, rows, keys)
+    return rows, keys
+
+
+def unseen_rows(master: pd.DataFrame, df: pd.DataFrame):
+    """
+    Rows of a prepared upload that the master does not already hold verbatim.
+    Returns (those rows, how many of them replace an existing record).
+    """
+    if master is None or master.empty or df.empty:
+        return df, 0
+    columns = [c for c in df.columns if c in master.columns]
+    key_columns = [c for c in RECORD_KEY if c in columns]
+    row_hashes, key_hashes = _master_hashes(master, columns, key_columns)
+    fresh = ~_contains(row_hashes, _hashes(df, columns))
+    if not fresh.any():
+        return df.iloc[:0], 0
+    replaced = int(_contains(key_hashes, _hashes(df, key_columns)[fresh]).sum())
+    return (df if fresh.all() else df[fresh]), replaced
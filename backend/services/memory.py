@@ -0,0 +1,189 @@
+import json
+import os
+import pickle
+import resource
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+
+import pandas as pd
+
+# 0 disables the budget. Otherwise uploads whose projected footprint exceeds it are refused or spilled.
+MEMORY_BUDGET_BYTES = int(float(os.getenv("MEMORY_BUDGET_MB", 0)) * 1024 * 1024)
+# "reject" (413) or "spill" (write the upload to SPILL_DIR; POST /spill/merge merges it in chunks)
+MEMORY_BUDGET_POLICY = os.getenv("MEMORY_BUDGET_POLICY", "reject").lower()
+SPILL_DIR = os.getenv("MEMORY_SPILL_DIR", os.path.join("data", "spill"))
+# Rows parsed at a time when a spilled file is merged
+SPILL_MERGE_CHUNK_ROWS = int(os.getenv("SPILL_MERGE_CHUNK_ROWS", 200_000))
+# In-memory size of a parsed CSV relative to its file size (object string columns dominate)
+CSV_MEMORY_FACTOR = float(os.getenv("CSV_MEMORY_FACTOR", 5))
+# Per-stage peak allocations need tracemalloc, which slows allocation-heavy code; opt in
+TRACE_STAGE_MEMORY = os.getenv("TRACE_STAGE_MEMORY", "0") == "1"
+
+_lock = threading.Lock()
+_frame_sizes = {}
+_stage_peaks = {}
+_local = threading.local()
+
+
+def frame_bytes(df) -> int:
+    """
+    Deep memory usage of a DataFrame (object columns included). Cached per frame
+    object: the masters are replaced, never mutated in place, after a merge.
+    """
+    if df is None:
+        return 0
+    key = id(df)
+    with _lock:
+        cached = _frame_sizes.get(key)
+        if cached is not None and cached[0]() is df and cached[2] == df.shape:
+            return cached[1]
+    size = int(df.memory_usage(deep=True, index=True).sum())
+    with _lock:
+        _frame_sizes[key] = (weakref.ref(df, lambda _, k=key: _frame_sizes.pop(k, None)), size, df.shape)
+    return size
+
+
+def object_bytes(obj) -> int:
+    """Serialized size, a close proxy for fitted models and vectorizers."""
+    if obj is None:
+        return 0
+    try:
+        return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+def agent_bytes(agent) -> dict:
+    """Memory held by the agent beyond the (shared) master frames."""
+    if agent is None:
+        return {"tfidf_matrix": 0, "vectorizer": 0, "aggregate_tables": 0}
+    matrix = agent.tfidf_matrix
+    matrix_bytes = sum(getattr(matrix, a).nbytes for a in ("data", "indices", "indptr")) if matrix is not None else 0
+    tables = sum(frame_bytes(t) for t in (agent._district_table, agent._state_table) if isinstance(t, pd.DataFrame))
+    return {"tfidf_matrix": matrix_bytes, "vectorizer": object_bytes(agent.vectorizer), "aggregate_tables": tables}
+
+
+def process_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def process_peak_rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# --- Per-stage peak allocations (tracemalloc) ---
+
+def start_stage_tracing():
+    if TRACE_STAGE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def stage_enter():
+    """Called by metrics.stage_timer. Nested stages fold their peak into the parent's."""
+    if not tracemalloc.is_tracing():
+        return
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    tracemalloc.reset_peak()
+    stack.append([current, current])
+
+
+def stage_exit(stage: str):
+    stack = getattr(_local, "stack", None)
+    if not stack or not tracemalloc.is_tracing():
+        return None
+    _, peak = tracemalloc.get_traced_memory()
+    start, seen = stack.pop()
+    peak = max(peak, seen)
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    delta = peak - start
+    with _lock:
+        _stage_peaks[stage] = max(_stage_peaks.get(stage, 0), delta)
+    return delta
+
+
+def stage_peaks() -> dict:
+    with _lock:
+        return dict(_stage_peaks)
+
+
+# --- Budget ---
+
+def projected_upload_bytes(current_bytes: int, upload_sizes: list) -> int:
+    """Estimated footprint after merging: current masters + parsed uploads (before dedup)."""
+    return current_bytes + int(sum(upload_sizes) * CSV_MEMORY_FACTOR)
+
+
+def over_budget(projected_bytes: int) -> bool:
+    return MEMORY_BUDGET_BYTES > 0 and projected_bytes > MEMORY_BUDGET_BYTES
+
+
+def spill_upload(dataset: str, data: bytes, fingerprint: str, name: str, spill_dir: str = None) -> str:
+    """
+    Writes raw upload bytes to the spill directory, with a metadata file next
+    to them. Returns the spill's id; paths never leave this module. A file
+    already pending is not spilled twice.
+    """
+    spill_dir = spill_dir or SPILL_DIR
+    for spill in pending_spills(spill_dir):
+        if (spill["dataset"], spill["fingerprint"]) == (dataset, fingerprint):
+            return spill["id"]
+    os.makedirs(spill_dir, exist_ok=True)
+    spill_id = uuid.uuid4().hex
+    with open(os.path.join(spill_dir, f"{spill_id}.csv"), "wb") as f:
+        f.write(data)
+    meta = {"id": spill_id, "dataset": dataset, "fingerprint": fingerprint, "file": name,
+            "bytes": len(data), "spilled_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "spilled_ns": time.time_ns()}
+    # The metadata is written last (atomically): a listed spill always has its complete CSV
+    tmp = os.path.join(spill_dir, f"{spill_id}.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(spill_dir, f"{spill_id}.json"))
+    return spill_id
+
+
+def pending_spills(spill_dir: str = None) -> list:
+    """Metadata of the spilled uploads not merged yet, oldest first."""
+    spill_dir = spill_dir or SPILL_DIR
+    if not os.path.isdir(spill_dir):
+        return []
+    spills = []
+    for entry in os.listdir(spill_dir):
+        if entry.endswith(".json"):
+            try:
+                with open(os.path.join(spill_dir, entry)) as f:
+                    spills.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    # spilled_at is to the second; spilled_ns orders spills made within the same one
+    return sorted(spills, key=lambda s: (s["spilled_at"], s.get("spilled_ns", 0), s["id"]))
+
+
+def spill_path(spill_id: str, spill_dir: str = None) -> str:
+    return os.path.join(spill_dir or SPILL_DIR, f"{spill_id}.csv")
+
+
+def remove_spill(spill_id: str, spill_dir: str = None):
+    """Drops a merged spill (metadata first, so it is never listed without its CSV)."""
+    for suffix in (".json", ".csv"):
+        try:
+            os.remove(os.path.join(spill_dir or SPILL_DIR, f"{spill_id}{suffix}"))
+        except FileNotFoundError:
+            pass
+
+
+def mb(n: int) -> float:
+    return round(n / (1024 * 1024), 2)
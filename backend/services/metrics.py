@@ -0,0 +1,181 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from . import memory
+from .tracing import span
+
+# Seconds. Prometheus client defaults plus longer buckets for full-dataset stages
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key in sorted(self._values):
+                lines += self._render_series(key, self._values[key])
+        return lines
+
+    def _render_series(self, key, value) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (non-cumulative), then sum and count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._values.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _render_series(self, key, series) -> list:
+        counts, total, count = series
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "satark_stage_duration_seconds", "Time spent in each analysis pipeline stage.", ["stage"]))
+STAGE_ROWS = REGISTRY.register(Counter(
+    "satark_stage_rows_total", "Rows processed by each analysis pipeline stage.", ["stage"]))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "satark_stage_errors_total", "Pipeline stages that raised.", ["stage"]))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "satark_http_request_duration_seconds", "HTTP request latency by route.", ["method", "route", "status"]))
+DATASET_ROWS = REGISTRY.register(Gauge(
+    "satark_dataset_rows", "Rows currently held in each master dataset.", ["dataset"]))
+DATASET_BYTES = REGISTRY.register(Gauge(
+    "satark_dataset_bytes", "Deep memory usage of each master dataset.", ["dataset"]))
+PROCESS_RSS_BYTES = REGISTRY.register(Gauge(
+    "satark_process_resident_bytes", "Resident set size of the API process."))
+STAGE_PEAK_BYTES = REGISTRY.register(Gauge(
+    "satark_stage_peak_bytes", "Largest traced allocation peak per stage (TRACE_STAGE_MEMORY=1).", ["stage"]))
+
+
+@contextmanager
+def stage_timer(stage: str, rows: int = None):
+    """
+    Times a pipeline stage into satark_stage_duration_seconds and counts its input
+    rows. The stage is also a tracing span; the span is yielded for extra attributes.
+    """
+    attributes = {"rows_in": rows} if rows is not None else {}
+    start = time.perf_counter()
+    memory.stage_enter()
+    stage_span = None
+    try:
+        with span(stage, **attributes) as stage_span:
+            yield stage_span
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+        peak = memory.stage_exit(stage)
+        if peak is not None:
+            STAGE_PEAK_BYTES.set(max(STAGE_PEAK_BYTES.value(stage=stage), peak), stage=stage)
+            if stage_span is not None:
+                stage_span.set(peak_bytes=peak)
+        if rows:
+            STAGE_ROWS.inc(rows, stage=stage)
@@ -0,0 +1,41 @@
+import importlib
+import os
+import threading
+import time
+
+# Modules that are expensive to import and not needed to answer /health
+HEAVY_MODULES = (
+    "services.report_generator",        # matplotlib + fpdf
+    "sklearn.ensemble",                 # IsolationForest (training mode)
+    "sklearn.feature_extraction.text",  # TF-IDF for the RAG agent
+    "joblib",
+    "services.api_sync",                # requests + python-dotenv
+)
+
+PRELOAD_ENABLED = os.getenv("PRELOAD_HEAVY_MODULES", "1") != "0"
+
+# module -> seconds taken by the background import (or the error message)
+PRELOAD_TIMINGS = {}
+
+
+def _preload(modules):
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            PRELOAD_TIMINGS[name] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            PRELOAD_TIMINGS[name] = f"error: {e}"
+    print(f"📦 Background preload finished: {PRELOAD_TIMINGS}")
+
+
+def preload_in_background(modules=HEAVY_MODULES):
+    """
+    Imports the heavy subsystems on a daemon thread so the first report, sync or
+    training call does not pay for them, without delaying server start-up.
+    """
+    if not PRELOAD_ENABLED:
+        return None
+    thread = threading.Thread(target=_preload, args=(modules,), name="satark-preload", daemon=True)
+    thread.start()
+    return thread
@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest
-import io
+import zlib
+
+from .metrics import stage_timer
+from .schemas import read_dataset
 
 # --- GLOBALS: CORRECTION DICTIONARIES ---
 STATE_CORRECTIONS = {
@@ -130,6 +132,15 @@ DISTRICT_COORDS = {
     "South Delhi": {"lat": 28.4817, "lng": 77.1873},
 }
 
+# --- SCHEMA MARKER ---
+# Frames that went through prepare_frame carry this in df.attrs (attrs survive
+# pickling, slicing and concat of equally-marked frames), so process_data can
+# skip re-cleaning and re-coercing them. Bump the version when cleaning changes.
+SCHEMA_MARKER = "satark_schema"
+SCHEMA_VERSION = 1
+COUNT_COLUMNS = ['age_0_5', 'age_5_17', 'age_18_greater', 'bio_age_5_17', 'bio_age_17_', 'demo_age_5_17', 'demo_age_17_']
+KEY_COLUMNS = ['state', 'district']
+
 # --- HELPER FUNCTIONS ---
 
 def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
@@ -139,6 +150,13 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     if df is None or df.empty:
         return df
 
+    with stage_timer("clean_dataframe", rows=len(df)) as stage:
+        df = _clean_dataframe(df)
+        stage.set(rows_out=len(df))
+        return df
+
+
+def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     # Standardize column names
     df.columns = [c.lower().strip() for c in df.columns]
 
@@ -169,6 +187,33 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def coerce_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """Numeric count columns with missing values as 0. Columns that already are numeric and complete are left alone."""
+    for col in COUNT_COLUMNS:
+        if col not in df.columns:
+            continue
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        elif df[col].hasnans:
+            df[col] = df[col].fillna(0)
+    return df
+
+
+def is_prepared(df) -> bool:
+    return isinstance(df, pd.DataFrame) and df.attrs.get(SCHEMA_MARKER) == SCHEMA_VERSION
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Cleans names, types the count columns and marks the frame as prepared."""
+    if df is None or is_prepared(df):
+        return df
+    df = clean_dataframe(df)
+    with stage_timer("to_numeric", rows=len(df)):
+        df = coerce_counts(df)
+    df.attrs[SCHEMA_MARKER] = SCHEMA_VERSION
+    return df
+
+
 def smart_merge(existing_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
     """
     Merges new data with existing data, handling deduplication.
@@ -176,14 +221,28 @@ def smart_merge(existing_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame
     - Keys: State, District, Pincode, Date (if available)
     - Conflict: Keep LAST (Assuming new upload is the latest source of truth for that record)
     """
-    # 1. Clean the new data to match the standard format of existing data
-    new_df = clean_dataframe(new_df)
+    rows_existing = len(existing_df) if existing_df is not None else 0
+    with stage_timer("smart_merge", rows=len(new_df) if new_df is not None else 0) as stage:
+        merged = _smart_merge(existing_df, new_df)
+        stage.set(rows_existing=rows_existing, rows_out=len(merged) if merged is not None else 0)
+        return merged
+
+
+def _smart_merge(existing_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+    # 1. Clean and type the new data to match the standard format of existing data
+    new_df = prepare_frame(new_df)
     
     if existing_df is None or existing_df.empty:
-        return new_df
+        # A first upload is deduplicated too, so the master never holds a key twice
+        if new_df is None:
+            return new_df
+        combined = new_df
+    else:
+        # Masters saved before the schema marker existed are prepared once here
+        existing_df = prepare_frame(existing_df)
         
-    # 2. Concatenate
-    combined = pd.concat([existing_df, new_df], ignore_index=True)
+        # 2. Concatenate
+        combined = pd.concat([existing_df, new_df], ignore_index=True)
     
     # 3. Define Deduplication Subset
     # We want to identify if a specific record (location + time) is being re-uploaded
@@ -194,170 +253,240 @@ def smart_merge(existing_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame
     # Remove columns that might not exist in subset for robustness (though we cleaned)
     subset = [c for c in subset if c in combined.columns]
     
-    # 4. Drop Duplicates (Keep Last = New Upload Overwrites Old)
-    combined.drop_duplicates(subset=subset, keep='last', inplace=True)
+    # 4. Drop Duplicates (Keep Last = New Upload Overwrites Old); not in place, a
+    # first upload may be the caller's frame
+    if subset:
+        combined = combined.drop_duplicates(subset=subset, keep='last')
+    combined.attrs[SCHEMA_MARKER] = SCHEMA_VERSION
     
     return combined
 
 
-def process_data(enrolment_data, biometric_data, demographic_data=None, model=None):
-    try:
-        # 1. Load Data (Handle Bytes or DataFrame)
-        if isinstance(enrolment_data, pd.DataFrame):
-            df_enrolment = enrolment_data.copy() # Copy to avoid mutating input if cached
-        else:
-            df_enrolment = pd.read_csv(io.BytesIO(enrolment_data))
+def _analysis_input(data, kind: str, count_col: str) -> pd.DataFrame:
+    """
+    Only the key and count columns process_data needs. Prepared frames are used
+    as-is (a column selection, no copy); anything else is projected first, then
+    cleaned and typed, so the caller's frame is never modified. Bytes are parsed
+    with the dataset schema, reading just those columns.
+    """
+    if isinstance(data, pd.DataFrame):
+        if is_prepared(data):
+            return data[[c for c in KEY_COLUMNS + [count_col] if c in data.columns]]
+        df = data.copy(deep=False)
+    else:
+        df = read_dataset(data, kind, columns=KEY_COLUMNS + [count_col])
+
+    df.columns = [str(c).lower().strip() for c in df.columns]
+    df = df[[c for c in KEY_COLUMNS + [count_col] if c in df.columns]]
+    return prepare_frame(df)
+
+
+def district_sums(df: pd.DataFrame, count_col: str, name: str = None) -> pd.DataFrame:
+    """(state, district) totals of one count column, optionally renamed."""
+    sums = df.groupby(KEY_COLUMNS)[count_col].sum().reset_index()
+    return sums.rename(columns={count_col: name}) if name else sums
+
+
+def aggregate_inputs(df_enrolment, df_biometric, df_demographic):
+    """
+    Per (state, district) sums of the prepared inputs: the "map" half of the
+    analysis. Partial results from separate chunks can be added together
+    (see services/mapreduce.py) before analyze_aggregates.
+    """
+    input_rows = len(df_enrolment) + len(df_biometric) + len(df_demographic)
+    # 3. Aggregate by District
+    # We group by State+District to get the Total Counts for the Dashboard
+    with stage_timer("groupby", rows=input_rows):
+        grp_enrolment = district_sums(df_enrolment, 'age_5_17')
+        grp_biometric = district_sums(df_biometric, 'bio_age_5_17')
 
-        if isinstance(biometric_data, pd.DataFrame):
-            df_biometric = biometric_data.copy()
-        else:
-            df_biometric = pd.read_csv(io.BytesIO(biometric_data))
-            
-        if demographic_data is not None:
-             if isinstance(demographic_data, pd.DataFrame):
-                df_demographic = demographic_data.copy()
-             else:
-                df_demographic = pd.read_csv(io.BytesIO(demographic_data))
-        else:
-            df_demographic = pd.DataFrame(columns=['state', 'district', 'demo_age_5_17'])
-
-        # 2. Clean Data (Using centralized logic)
-        # Note: If called from main.py's smart_merge, data is already cleaned.
-        # But running it again is safe (idempotent) and ensures consistency if called directly.
-        df_enrolment = clean_dataframe(df_enrolment)
-        df_biometric = clean_dataframe(df_biometric)
-        df_demographic = clean_dataframe(df_demographic)
-
-        # Convert numeric columns to proper types (handles API data that comes as strings)
-        for col in ['age_5_17', 'bio_age_5_17', 'demo_age_5_17']:
-            if col in df_enrolment.columns:
-                df_enrolment[col] = pd.to_numeric(df_enrolment[col], errors='coerce').fillna(0)
-            if col in df_biometric.columns:
-                df_biometric[col] = pd.to_numeric(df_biometric[col], errors='coerce').fillna(0)
-            if col in df_demographic.columns:
-                df_demographic[col] = pd.to_numeric(df_demographic[col], errors='coerce').fillna(0)
-
-        # 3. Aggregate by District
-        # We group by State+District to get the Total Counts for the Dashboard
-        grp_enrolment = df_enrolment.groupby(['state', 'district'])['age_5_17'].sum().reset_index()
-        grp_biometric = df_biometric.groupby(['state', 'district'])['bio_age_5_17'].sum().reset_index()
-        
         if not df_demographic.empty:
-             grp_demographic = df_demographic.groupby(['state', 'district'])['demo_age_5_17'].sum().reset_index()
-             grp_demographic.rename(columns={'demo_age_5_17': 'demo_updates'}, inplace=True)
+            grp_demographic = district_sums(df_demographic, 'demo_age_5_17', 'demo_updates')
         else:
-             grp_demographic = pd.DataFrame(columns=['state', 'district', 'demo_updates'])
+            grp_demographic = pd.DataFrame(columns=['state', 'district', 'demo_updates'])
+
+    return grp_enrolment, grp_biometric, grp_demographic
 
-        # 4. Merge Aggregates
-        merged = pd.merge(grp_enrolment, grp_biometric, on=['state', 'district'], how='outer').fillna(0)
-        
-        if not grp_demographic.empty:
-            merged = pd.merge(merged, grp_demographic, on=['state', 'district'], how='left').fillna(0)
-        else:
-            merged['demo_updates'] = 0
-            
-        # 5. Calculate Metrics
-        merged['expected_updates'] = merged['age_5_17']
-        merged['actual_updates'] = merged['bio_age_5_17']
-        merged['pending_updates'] = merged['expected_updates'] - merged['actual_updates']
-        merged['gap_percentage'] = (merged['pending_updates'] / merged['expected_updates']).replace([np.inf, -np.inf], 0).fillna(0) * 100
-        
-        merged['pending_updates'] = merged['pending_updates'].clip(lower=0)
-        merged['gap_percentage'] = merged['gap_percentage'].clip(lower=0, upper=100)
-        
-        # NEW: Efficiency Index (Center Load Analysis) - Prevent division by zero
-        merged['efficiency_index'] = (merged['actual_updates'] / merged['expected_updates']).replace([np.inf, -np.inf], 0).fillna(0)
 
-        # 6. Anomaly Detection Rules
-        features = ['pending_updates', 'gap_percentage', 'demo_updates']
+def district_metrics(grp_enrolment, grp_biometric, grp_demographic) -> pd.DataFrame:
+    """Merges district sums and derives the gap and efficiency metrics. Sorted by (state, district)."""
+    # 4. Merge Aggregates
+    merged = pd.merge(grp_enrolment, grp_biometric, on=['state', 'district'], how='outer').fillna(0)
+    
+    if not grp_demographic.empty:
+        merged = pd.merge(merged, grp_demographic, on=['state', 'district'], how='left')
+        merged['demo_updates'] = merged['demo_updates'].fillna(0)
+    else:
+        merged['demo_updates'] = 0
         
-        if len(merged) > 1:
-            if model is None:
-                # TRAIN MODE
-                model = IsolationForest(contamination=0.1, random_state=42)
+    # 5. Calculate Metrics
+    merged['expected_updates'] = merged['age_5_17']
+    merged['actual_updates'] = merged['bio_age_5_17']
+    merged['pending_updates'] = merged['expected_updates'] - merged['actual_updates']
+    merged['gap_percentage'] = (merged['pending_updates'] / merged['expected_updates']).replace([np.inf, -np.inf], 0).fillna(0) * 100
+    
+    merged['pending_updates'] = merged['pending_updates'].clip(lower=0)
+    merged['gap_percentage'] = merged['gap_percentage'].clip(lower=0, upper=100)
+    
+    # NEW: Efficiency Index (Center Load Analysis) - Prevent division by zero
+    merged['efficiency_index'] = (merged['actual_updates'] / merged['expected_updates']).replace([np.inf, -np.inf], 0).fillna(0)
+    return merged
+
+
+def score_anomalies(merged: pd.DataFrame, model=None):
+    """Adds is_anomaly from the Isolation Forest (fitted here when no model is given). Returns (merged, model)."""
+    # 6. Anomaly Detection Rules
+    features = ['pending_updates', 'gap_percentage', 'demo_updates']
+    
+    if len(merged) > 1:
+        if model is None:
+            # TRAIN MODE (scikit-learn is imported on first use to keep server start-up light)
+            from sklearn.ensemble import IsolationForest
+            model = IsolationForest(contamination=0.1, random_state=42)
+            with stage_timer("model_fit", rows=len(merged)):
                 merged['anomaly_score'] = model.fit_predict(merged[features])
-            else:
-                # PREDICT MODE
-                try:
-                    merged['anomaly_score'] = model.predict(merged[features])
-                except ValueError:
-                    # Fallback if model was trained with fewer features (backward compatibility)
-                    print("⚠️ Model feature mismatch. Falling back to 2 features.")
-                    merged['anomaly_score'] = model.predict(merged[['pending_updates', 'gap_percentage']])
-            
-            merged['is_anomaly'] = merged['anomaly_score'] == -1
         else:
-            merged['is_anomaly'] = False
-            
-        # 7. Formatting Output
-        districts_data = []
-        for _, row in merged.iterrows():
-            status = "SAFE"
-            reason = ""
-            
-            if row['gap_percentage'] > 50:
-                status = "CRITICAL"
-                reason = "High Deficit Alert: Over 50% gap indicates immediate intervention needed. Possible migration hub or lack of centers."
-            elif row['gap_percentage'] > 20:
-                status = "MODERATE"
-                reason = "Warning: Gap is widening. Schedule camps to prevent backlog accumulation."
-            else:
-                reason = "Normal operations. Updates usage consistent with enrolment."
-            
-            if row['is_anomaly']:
-                 if status == "SAFE":
-                    reason = "Unusual Pattern Detected: Metric outlier despite safe status."
-                 else:
-                    reason += " [AI Anomaly]: Statistical outlier detected relative to state patterns."
-                 
-            if row['demo_updates'] > 0 and abs(row['demo_updates'] - row['actual_updates']) > 1000:
-                diff = int(row['demo_updates'] - row['actual_updates'])
-                reason += f" High variance seen in demographic data ({diff} difference)."
-            
-            # Check for Fraud Risk (Efficiency > 120%)
-            if row.get('efficiency_index', 0) > 1.2:
-                reason += " [FRAUD ALERT]: Updates exceed 120% of estimated population. Possible ghost enrolments."
-
-            # Inject Coordinates
-            coords = DISTRICT_COORDS.get(row['district'], {"lat": 0, "lng": 0})
-            # If lat/lng is 0, usage of 'hash' based jitter for demo visual spread if needed
-            if coords["lat"] == 0:
-                # Simple deterministic jitter based on name length to spread them out on map if unknown
-                base_lat, base_lng = 20.5937, 78.9629
-                name_hash = hash(row['district']) % 1000
-                coords = {
-                    "lat": base_lat + (name_hash / 100) - 5,
-                    "lng": base_lng + ((name_hash * 7) % 1000 / 100) - 5
-                }
-            
-            districts_data.append({
-                "state": row['state'],
-                "district": row['district'],
-                "lat": coords["lat"],
-                "lng": coords["lng"],
-                "efficiency_index": round(row.get('efficiency_index', 0), 2),
-                "district": row['district'],
-                "expected_updates": int(row['expected_updates']),
-                "actual_updates": int(row['actual_updates']),
-                "pending_updates": int(row['pending_updates']),
-                "gap_percentage": round(row['gap_percentage'], 1),
-                "status": status,
-                "is_anomaly": bool(row['is_anomaly']),
-                "ai_reasoning": reason 
-            })
-            
-        total_pending = int(merged['pending_updates'].sum())
-        critical_count = int(merged[merged['gap_percentage'] > 50].shape[0])
+            # PREDICT MODE
+            try:
+                with stage_timer("model_predict", rows=len(merged)):
+                    merged['anomaly_score'] = model.predict(merged[features])
+            except ValueError:
+                # Fallback if model was trained with fewer features (backward compatibility)
+                print("⚠️ Model feature mismatch. Falling back to 2 features.")
+                merged['anomaly_score'] = model.predict(merged[['pending_updates', 'gap_percentage']])
         
-        return {
-            "summary": {
-                "total_pending_updates": total_pending,
-                "critical_districts_count": critical_count,
-                "processed_districts": len(merged)
-            },
-            "districts": districts_data,
-            "model": model
+        merged['is_anomaly'] = merged['anomaly_score'] == -1
+    else:
+        merged['is_anomaly'] = False
+    return merged, model
+
+
+def district_coords(district: str) -> dict:
+    coords = DISTRICT_COORDS.get(district, {"lat": 0, "lng": 0})
+    # If lat/lng is 0, usage of 'hash' based jitter for demo visual spread if needed
+    if coords["lat"] == 0:
+        # Deterministic jitter from the name to spread unknown districts on the map.
+        # crc32 rather than hash(): str hashes are salted per process (PYTHONHASHSEED).
+        base_lat, base_lng = 20.5937, 78.9629
+        name_hash = zlib.crc32(str(district).encode()) % 1000
+        coords = {
+            "lat": base_lat + (name_hash / 100) - 5,
+            "lng": base_lng + ((name_hash * 7) % 1000 / 100) - 5
         }
+    return coords
+
+
+# Dashboard reasoning texts, by status and by flag
+CRITICAL_REASON = "High Deficit Alert: Over 50% gap indicates immediate intervention needed. Possible migration hub or lack of centers."
+MODERATE_REASON = "Warning: Gap is widening. Schedule camps to prevent backlog accumulation."
+SAFE_REASON = "Normal operations. Updates usage consistent with enrolment."
+SAFE_ANOMALY_REASON = "Unusual Pattern Detected: Metric outlier despite safe status."
+ANOMALY_NOTE = " [AI Anomaly]: Statistical outlier detected relative to state patterns."
+FRAUD_NOTE = " [FRAUD ALERT]: Updates exceed 120% of estimated population. Possible ghost enrolments."
+
+
+def format_records(merged: pd.DataFrame) -> list:
+    """
+    Dashboard records (status, reasoning, coordinates) for scored district
+    metrics. Column-wise: statuses and texts are picked with array operations,
+    then zipped into records.
+    """
+    # 7. Formatting Output
+    if merged.empty:
+        return []
+    gap = merged['gap_percentage'].to_numpy(dtype=float)
+    actual = merged['actual_updates'].to_numpy(dtype=float)
+    demo = merged['demo_updates'].to_numpy(dtype=float)
+    anomaly = merged['is_anomaly'].to_numpy().astype(bool)
+    efficiency = (merged['efficiency_index'].to_numpy(dtype=float) if 'efficiency_index' in merged.columns
+                  else np.zeros(len(merged)))
+
+    levels = [gap > 50, gap > 20]
+    status = np.select(levels, ["CRITICAL", "MODERATE"], "SAFE")
+    reason = np.select(levels, [CRITICAL_REASON, MODERATE_REASON], SAFE_REASON).astype(object)
+    reason = np.where(anomaly & (status == "SAFE"), SAFE_ANOMALY_REASON,
+                      np.where(anomaly, reason + ANOMALY_NOTE, reason))
+    variance = (demo > 0) & (np.abs(demo - actual) > 1000)
+    for i in np.flatnonzero(variance):
+        reason[i] += f" High variance seen in demographic data ({int(demo[i] - actual[i])} difference)."
+    reason = np.where(efficiency > 1.2, reason + FRAUD_NOTE, reason)
+
+    districts = merged['district'].astype(object).tolist()
+    coords = [district_coords(d) for d in districts]
+    records = {
+        "state": merged['state'].astype(object).tolist(),
+        "district": districts,
+        "lat": [c["lat"] for c in coords],
+        "lng": [c["lng"] for c in coords],
+        # Python's round on Python floats, as the row-by-row formatting did
+        "efficiency_index": [round(v, 2) for v in efficiency.tolist()],
+    }
+    for col in ('expected_updates', 'actual_updates', 'pending_updates'):
+        records[col] = [int(v) for v in merged[col].tolist()]
+    records["gap_percentage"] = [round(v, 1) for v in gap.tolist()]
+    records["status"] = status.tolist()
+    records["is_anomaly"] = anomaly.tolist()
+    records["ai_reasoning"] = reason.tolist()
+    return [dict(zip(records, values)) for values in zip(*records.values())]
+
+
+def summarize(merged: pd.DataFrame) -> dict:
+    return {
+        "total_pending_updates": int(merged['pending_updates'].sum()),
+        "critical_districts_count": int(merged[merged['gap_percentage'] > 50].shape[0]),
+        "processed_districts": len(merged)
+    }
+
+
+def analyze_aggregates(grp_enrolment, grp_biometric, grp_demographic, model=None):
+    """
+    Metrics, anomaly detection and dashboard records from district sums (columns
+    state, district, age_5_17 / bio_age_5_17 / demo_updates). Memory is
+    proportional to the number of districts, not records.
+    """
+    merged = district_metrics(grp_enrolment, grp_biometric, grp_demographic)
+    merged, model = score_anomalies(merged, model)
+    with stage_timer("format_records", rows=len(merged)):
+        districts_data = format_records(merged)
+    
+    return {
+        "summary": summarize(merged),
+        "districts": districts_data,
+        "model": model
+    }
+
+
+def process_data(enrolment_data, biometric_data, demographic_data=None, model=None, workers: int = None):
+    """
+    District analysis of the three datasets (frames or CSV bytes). With more
+    than one worker (default ANALYSIS_WORKERS) and enough rows, aggregation and
+    formatting run per state shard in a process pool (services/sharding.py).
+    """
+    try:
+        # 1. Load Data (Handle Bytes or DataFrame), keeping only the columns used below
+        # 2. Clean Data (Using centralized logic). Frames from smart_merge are already
+        # cleaned and typed (schema marker) and skip this entirely.
+        with stage_timer("prepare_inputs") as prepare:
+            df_enrolment = _analysis_input(enrolment_data, 'enrolment', 'age_5_17')
+            df_biometric = _analysis_input(biometric_data, 'biometric', 'bio_age_5_17')
+            if demographic_data is not None:
+                df_demographic = _analysis_input(demographic_data, 'demographic', 'demo_age_5_17')
+            else:
+                df_demographic = pd.DataFrame(columns=['state', 'district', 'demo_age_5_17'])
+            input_rows = len(df_enrolment) + len(df_biometric) + len(df_demographic)
+            prepare.set(rows_in=input_rows)
+
+        from .sharding import ANALYSIS_WORKERS, MIN_SHARDED_ROWS, analyze_sharded
+        workers = workers or ANALYSIS_WORKERS
+        if workers > 1 and input_rows >= MIN_SHARDED_ROWS:
+            return analyze_sharded({
+                "enrolment": (enrolment_data, df_enrolment),
+                "biometric": (biometric_data, df_biometric),
+                "demographic": (demographic_data, df_demographic),
+            }, model, workers)
+
+        grp_enrolment, grp_biometric, grp_demographic = aggregate_inputs(df_enrolment, df_biometric, df_demographic)
+        return analyze_aggregates(grp_enrolment, grp_biometric, grp_demographic, model)
 
     except Exception as e:
         print(f"Error processing data: {e}")
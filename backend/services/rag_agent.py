@@ -1,46 +1,205 @@
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+from bisect import bisect_right
 import os
+import re
+from .aggregates import build_district_table, build_state_table, top_k_indices
+from .metrics import stage_timer
+
+STATUSES = ("CRITICAL", "MODERATE", "SAFE")
+LEVEL_WORDS = {"district", "districts", "state", "states"}
+COMPARE_WORDS = {"compare", "comparison", "vs", "versus"}
+RANK_WORDS = ("top", "worst", "best", "highest", "lowest", "most", "least", "largest", "smallest", "bottom", "rank", "ranking")
+ASCENDING_WORDS = ("lowest", "least", "smallest", "bottom")
+METRIC_KEYWORDS = [
+    ({"backlog", "pending"}, "pending_updates"),
+    ({"gap", "deficit"}, "gap_percentage"),
+    ({"efficiency"}, "efficiency_index"),
+    ({"target", "expected"}, "expected_updates"),
+    ({"completed", "actual"}, "actual_updates"),
+]
+# For these metrics a larger value is better, so "worst" ranks ascending
+HIGHER_IS_BETTER = {"efficiency_index", "actual_updates"}
+METRIC_LABELS = {
+    "pending_updates": "backlog",
+    "gap_percentage": "gap",
+    "efficiency_index": "efficiency",
+    "expected_updates": "target",
+    "actual_updates": "completed updates",
+}
+DEFAULT_TOP_K = 5
+MAX_TOP_K = 100
 
 class SatarkAgent:
-    def __init__(self, kb_path: str, enrol_df, bio_df, demo_df=None):
+    def __init__(self, kb_path: str, enrol_df, bio_df, demo_df=None, index: dict = None, store=None):
         self.kb_path = kb_path
+        # With a SQL master store (services/sqlstore.py) counts and lookup tables come from queries
+        self.store = store
         self.enrol_df = enrol_df if enrol_df is not None else pd.DataFrame()
         self.bio_df = bio_df if bio_df is not None else pd.DataFrame()
         self.demo_df = demo_df if demo_df is not None else pd.DataFrame()
-        
+
         self.documents = []
         self.vectorizer = None
         self.tfidf_matrix = None
-        self._load_kb()
+
+        # District/state lookup tables are built lazily on first analytic query and
+        # dropped on every data update.
+        self._reset_index()
+
+        # A prebuilt index (see services/artifacts.py) skips fitting TF-IDF and the groupby pass
+        if index:
+            self.documents = index["documents"]
+            self.vectorizer = index["vectorizer"]
+            self.tfidf_matrix = index["tfidf_matrix"]
+            if index.get("district_table") is not None:
+                self._apply_district_table(index["district_table"])
+        else:
+            self._load_kb()
 
     def _load_kb(self):
         if os.path.exists(self.kb_path):
             with open(self.kb_path, 'r') as f:
                 self.documents = [line.strip() for line in f.readlines() if line.strip()]
-            
+
             if self.documents:
+                from sklearn.feature_extraction.text import TfidfVectorizer
                 self.vectorizer = TfidfVectorizer(stop_words='english')
                 self.tfidf_matrix = self.vectorizer.fit_transform(self.documents)
 
+    def export_index(self) -> dict:
+        """Everything needed to rebuild this agent without refitting (for the artifact bundle)."""
+        if self._district_table is None:
+            self._build_district_index()
+        return {
+            "documents": self.documents,
+            "vectorizer": self.vectorizer,
+            "tfidf_matrix": self.tfidf_matrix,
+            "district_table": self._district_table,
+        }
+
     def update_data(self, enrol_df, bio_df, demo_df):
         self.enrol_df = enrol_df if enrol_df is not None else pd.DataFrame()
         self.bio_df = bio_df if bio_df is not None else pd.DataFrame()
         self.demo_df = demo_df if demo_df is not None else pd.DataFrame()
+        self._reset_index()
+
+    def _reset_index(self):
+        self._district_stats = None
+        self._district_table = None
+        self._state_table = None
+        self._district_pattern = None
+        self._district_names = {}
+        self._state_pattern = None
+        self._state_names = {}
+
+    # --- DISTRICT INDEX ---
+
+    def _build_district_index(self):
+        """
+        Precomputes the (state, district) and state aggregate tables in one grouped
+        pass per dataset and compiles regexes that match any known district or state.
+        """
+        if self.store is not None:
+            self._apply_district_table(self.store.district_table())
+            return
+        with stage_timer("agent_index", rows=len(self.enrol_df) + len(self.bio_df) + len(self.demo_df)):
+            self._apply_district_table(build_district_table(self.enrol_df, self.bio_df, self.demo_df))
+
+    def _record_counts(self) -> tuple:
+        """(enrolment, biometric, demographic) master row counts."""
+        if self.store is not None:
+            counts = self.store.row_counts()
+            return counts["enrolment"], counts["biometric"], counts["demographic"]
+        return len(self.enrol_df), len(self.bio_df), len(self.demo_df)
+
+    def _apply_district_table(self, table: pd.DataFrame):
+        self._district_table = table
+        self._state_table = build_state_table(table)
+
+        # Per-name totals for the single district analysis (names shared across states are summed)
+        stats = table.groupby('district', sort=False).agg(
+            target=('expected_updates', 'sum'),
+            actual=('actual_updates', 'sum'),
+            corrections=('corrections', 'sum'),
+        )
+        self._district_pattern, self._district_names = _compile_names(stats.index)
+        self._state_pattern, self._state_names = _compile_names(self._state_table['state'])
+        self._district_stats = stats
+
+    def _match_districts(self, queries: list) -> list:
+        """Resolves the first district mentioned in each query with a single regex scan."""
+        if self._district_stats is None:
+            self._build_district_index()
+
+        matches = [None] * len(queries)
+        if self._district_pattern is None or not queries:
+            return matches
+
+        # Scan all queries joined together; map match offsets back to query positions
+        starts = []
+        offset = 0
+        for q in queries:
+            starts.append(offset)
+            offset += len(q) + 1
+        text = "\n".join(queries)
+
+        for m in self._district_pattern.finditer(text):
+            idx = bisect_right(starts, m.start()) - 1
+            if matches[idx] is None:
+                matches[idx] = self._district_names[m.group(0)]
+        return matches
+
+    # --- ROUTING ---
 
     def query(self, user_query: str) -> dict:
+        return self.query_batch([user_query])[0]
+
+    def query_batch(self, user_queries: list) -> list:
+        """
+        Answers many queries in one pass: district mentions are resolved together,
+        analytics come from the shared district table and every policy lookup is
+        served by a single sparse matrix product.
+        """
+        queries = [uq.lower() for uq in user_queries]
+        matches = self._match_districts(queries)
+
+        responses = [None] * len(queries)
+        policy_idx = []
+        # 1-4. Direct routes (see _answer_direct); misses go on to the knowledge base
+        for i, q in enumerate(queries):
+            responses[i] = self._answer_direct(q, matches[i])
+            if responses[i] is None:
+                policy_idx.append(i)
+
+        # 5. POLICY RAG (Fallback to Knowledge Base), one lookup for the whole batch
+        if policy_idx and self.vectorizer:
+            try:
+                for i, doc in zip(policy_idx, self._retrieve_policies([queries[i] for i in policy_idx])):
+                    if doc is not None:
+                        responses[i] = {
+                            "answer": f"📜 **Policy Guide**: {doc}",
+                            "source": "UIDAI Circular",
+                            "type": "policy"
+                        }
+            except Exception as e:
+                print(f"RAG Error: {e}")
+
+        return [r if r is not None else _fallback_response() for r in responses]
+
+    def _answer_direct(self, q: str, match_district) -> dict:
+        """Handles every route that does not need the knowledge base. Returns None to fall through."""
         response = {
             "answer": "",
             "source": "",
             "type": "general"
         }
-        q = user_query.lower()
 
         # 1. API / SYNC MASTERY
         if "sync" in q or "api" in q or "data.gov" in q:
-            total_records = len(self.enrol_df) + len(self.bio_df) + len(self.demo_df)
-            response["answer"] = f"🌐 **API Master**: I am fully synchronized with the **Data.Gov.in** National Portal. \n- **Total Records Managed**: {total_records:,}\n- **Enrolment**: {len(self.enrol_df):,} rows\n- **Biometric**: {len(self.bio_df):,} rows\n- **Demographic**: {len(self.demo_df):,} rows\n\nI automatically pull the latest packet data every time you open the dashboard."
+            enrol_rows, bio_rows, demo_rows = self._record_counts()
+            total_records = enrol_rows + bio_rows + demo_rows
+            response["answer"] = f"🌐 **API Master**: I am fully synchronized with the **Data.Gov.in** National Portal. \n- **Total Records Managed**: {total_records:,}\n- **Enrolment**: {enrol_rows:,} rows\n- **Biometric**: {bio_rows:,} rows\n- **Demographic**: {demo_rows:,} rows\n\nI automatically pull the latest packet data every time you open the dashboard."
             response["type"] = "mastery"
             return response
 
@@ -49,77 +208,227 @@ class SatarkAgent:
         count = 0
         if "enrolment" in q:
             dataset_type = "Enrolment"
-            count = len(self.enrol_df)
+            count = self._record_counts()[0]
         elif "biometric" in q:
             dataset_type = "Biometric"
-            count = len(self.bio_df)
+            count = self._record_counts()[1]
         elif "demographic" in q:
             dataset_type = "Demographic"
-            count = len(self.demo_df)
-            
+            count = self._record_counts()[2]
+
         if dataset_type and ("count" in q or "how many" in q or "total" in q):
             response["answer"] = f"📊 **Dataset Master**: I currently hold **{count:,}** records in the {dataset_type} database. This data is used to calculate the 'Gap Analysis' and 'Efficiency Index'."
             response["type"] = "data"
             return response
 
-        # 3. DISTRICT ANALYTICS (The Core Gap Logic)
+        # 3. AGGREGATE ANALYTICS (Rankings, Filters, Comparisons)
+        intent = self._parse_aggregate_intent(q)
+        if intent:
+            try:
+                aggregate = self._answer_aggregate(q, intent)
+                if aggregate:
+                    return aggregate
+            except Exception as e:
+                print(f"Aggregate Error: {e}")
+
+        # 4. DISTRICT ANALYTICS (The Core Gap Logic)
         if "district" in q or "status" in q or "gap" in q or "performance" in q:
-             match_district = None
-             if not self.enrol_df.empty:
-                 # Fuzzy or exact match district
-                 unique_districts = self.enrol_df['district'].dropna().unique()
-                 for d in unique_districts:
-                     if d.lower() in q:
-                         match_district = d
-                         break
-            
              if match_district:
                  try:
-                     # Calculate metrics on the fly
-                     # Get Enrolment Target (Age 5-17)
-                     row_e = self.enrol_df[self.enrol_df['district'] == match_district]
-                     target = row_e['age_5_17'].sum() if not row_e.empty and 'age_5_17' in row_e.columns else 0
-                     
-                     # Get Actual Biometrics
-                     row_b = self.bio_df[self.bio_df['district'] == match_district]
-                     actual = row_b['bio_age_5_17'].sum() if not row_b.empty and 'bio_age_5_17' in row_b.columns else 0
-                     
+                     stats = self._district_stats.loc[match_district]
+                     target = stats['target']
+                     actual = stats['actual']
+                     corrections = int(stats['corrections'])
+
                      gap = target - actual
                      gap_pct = (gap / target * 100) if target > 0 else 0
-                     
-                     # Get Demographic Corrections (if available)
-                     corrections = 0
-                     if not self.demo_df.empty and 'district' in self.demo_df.columns:
-                         row_d = self.demo_df[self.demo_df['district'] == match_district]
-                         corrections = len(row_d) # Assuming rows are transactions
-                         
+
                      status = "SAFE"
                      if gap_pct > 50: status = "CRITICAL"
                      elif gap_pct > 20: status = "MODERATE"
-                     
+
                      response["answer"] = f"📍 **Analysis for {match_district}**:\n\n**1. Mandatory Biometrics (5-17y)**\n- Target: {int(target):,}\n- Completed: {int(actual):,}\n- **Backlog**: {int(gap):,} ({gap_pct:.1f}%)\n- **Status**: {status}\n\n**2. Demographic Insight**\n- Corrections Processed: {corrections:,}\n\n**Recommendation**: {'Immediate Mobile Unit Deployment required.' if status == 'CRITICAL' else 'Routine monitoring advised.'}"
                      response["type"] = "analysis"
                      return response
                  except Exception as e:
                      print(f"Extraction Error: {e}")
 
-        # 4. POLICY RAG (Fallback to Knowledge Base)
-        if self.vectorizer:
-            try:
-                query_vec = self.vectorizer.transform([q])
-                similarities = cosine_similarity(query_vec, self.tfidf_matrix).flatten()
-                best_idx = similarities.argmax()
-                best_score = similarities[best_idx]
-
-                if best_score > 0.15:
-                    retrieved_doc = self.documents[best_idx]
-                    response["answer"] = f"📜 **Policy Guide**: {retrieved_doc}"
-                    response["source"] = "UIDAI Circular"
-                    response["type"] = "policy"
-                    return response
-            except Exception as e:
-                print(f"RAG Error: {e}")
+        return None
+
+    # --- AGGREGATE QUERIES ---
+
+    def _parse_aggregate_intent(self, q: str):
+        """
+        Lightweight intent parser for national-level questions, e.g.
+        "top 10 critical districts in Bihar", "which states have the worst gap",
+        "how many critical districts in Odisha", "compare Patna and Gaya".
+        Returns None when the query is not an aggregate question.
+        """
+        words = set(re.findall(r"[a-z]+", q))
+        status = next((s for s in STATUSES if s.lower() in words), None)
+        compare = bool(words & COMPARE_WORDS)
+        count = "how many" in q or "number of" in q or "count" in words
+        plural = bool(words & {"districts", "states"})
+        # Rankings must name what is ranked, so "best practice" stays a policy question
+        subject = bool(words & LEVEL_WORDS) or any(words & keys for keys, _ in METRIC_KEYWORDS)
+
+        k_match = re.search(r"\b(?:top|bottom|worst|best)\s+(\d+)\b", q) or \
+            re.search(r"\b(\d+)\s+(?:worst|best|most|least|highest|lowest)\b", q)
+        rank_word = next((w for w in RANK_WORDS if w in words), None)
+        ranking = bool(k_match or rank_word) and subject
+
+        if not (compare or ranking or (status and (plural or count)) or ("list" in words and plural)):
+            return None
+
+        if compare:
+            op = "compare"
+        elif count and not ranking:
+            op = "count"
+        else:
+            op = "rank"
+
+        level = "district"
+        if ("states" in words or "state" in words) and not (words & {"district", "districts"}):
+            level = "state"
+
+        metric = next((m for keys, m in METRIC_KEYWORDS if words & keys), None)
+        if metric is None:
+            metric = "gap_percentage" if level == "state" else "pending_updates"
+
+        # "worst"/"best" follow the metric's polarity; explicit directions do not
+        if rank_word in ("worst", "best"):
+            worst_is_high = metric not in HIGHER_IS_BETTER
+            descending = worst_is_high if rank_word == "worst" else not worst_is_high
+        else:
+            descending = rank_word not in ASCENDING_WORDS
+
+        if k_match:
+            k = int(k_match.group(1))
+        elif "which" in words and not plural:
+            k = 1
+        else:
+            k = DEFAULT_TOP_K
+
+        return {"op": op, "level": level, "metric": metric, "descending": descending,
+                "k": max(1, min(k, MAX_TOP_K)), "status": status}
+
+    def _answer_aggregate(self, q: str, intent: dict) -> dict:
+        if self._district_table is None:
+            self._build_district_index()
+
+        level = intent["level"]
+        table = self._state_table if level == "state" else self._district_table
+        states = [self._state_names[m.group(0)] for m in self._state_pattern.finditer(q)] if self._state_pattern else []
+        noun = "states" if level == "state" else "districts"
+
+        if intent["op"] == "compare":
+            rows = table.iloc[0:0]
+            if level == "district" and self._district_pattern:
+                names = list(dict.fromkeys(self._district_names[m.group(0)] for m in self._district_pattern.finditer(q)))
+                rows = table[table['district'].isin(names)]
+                if len(rows) < 2 and len(states) >= 2:
+                    level, noun, table = "state", "states", self._state_table
+            if level == "state":
+                rows = table[table['state'].isin(states)]
+            if len(rows) < 2:
+                return None
+            title = f"⚖️ **Comparison of {len(rows)} {noun}**"
+            return _aggregate_response(title, rows, level, "comparison")
+
+        # Filters: state (for district rankings) and status
+        mask = np.ones(len(table), dtype=bool)
+        scope = ""
+        if level == "district" and states:
+            mask &= (table['state'] == states[0]).to_numpy()
+            scope = f" in {states[0]}"
+        if intent["status"]:
+            mask &= (table['status'] == intent["status"]).to_numpy()
+        filtered = table[mask]
+        label = f"{intent['status']} " if intent["status"] else ""
+
+        if intent["op"] == "count":
+            n = len(filtered)
+            response = {
+                "answer": f"📊 **Aggregate Insight**: There {'is' if n == 1 else 'are'} **{n:,}** {label}{noun if n != 1 else noun[:-1]}{scope}.",
+                "source": "",
+                "type": "aggregate",
+                "results": []
+            }
+            return response
+
+        if filtered.empty:
+            return {
+                "answer": f"📊 **Aggregate Insight**: No {label}{noun}{scope} match this query.",
+                "source": "",
+                "type": "ranking",
+                "results": []
+            }
+
+        idx = top_k_indices(filtered[intent["metric"]].to_numpy(), intent["k"], intent["descending"])
+        rows = filtered.iloc[idx]
+        order = "Top" if intent["descending"] else "Lowest"
+        title = f"🏆 **{order} {len(rows)} {label}{noun}{scope} by {METRIC_LABELS[intent['metric']]}**"
+        return _aggregate_response(title, rows, level, "ranking")
+
+    def _retrieve_policies(self, queries: list) -> list:
+        """Best knowledge-base line per query (or None below threshold), via one sparse product."""
+        query_vecs = self.vectorizer.transform(queries)
+        # TF-IDF rows are L2-normalised, so the dot product is the cosine similarity
+        similarities = (query_vecs @ self.tfidf_matrix.T).toarray()
+        best_idx = similarities.argmax(axis=1)
+        best_score = similarities[np.arange(len(queries)), best_idx]
+        return [self.documents[idx] if score > 0.15 else None for idx, score in zip(best_idx, best_score)]
+
+
+def _compile_names(values):
+    """Regex matching any of the names (longest first, so "North West Delhi" beats "Delhi")."""
+    names = {}
+    for v in values:
+        if isinstance(v, str) and v:
+            names.setdefault(v.lower(), v)
+    alternatives = sorted(names, key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(n) for n in alternatives)) if alternatives else None
+    return pattern, names
+
+
+def _aggregate_response(title: str, rows: pd.DataFrame, level: str, response_type: str) -> dict:
+    lines = [title + ":"]
+    results = []
+    for i, row in enumerate(rows.itertuples(index=False), start=1):
+        # Masters without a state column leave it missing
+        state = row.state if isinstance(row.state, str) else None
+        if level == "state":
+            name = f"**{state}**"
+        else:
+            name = f"**{row.district}** ({state})" if state else f"**{row.district}**"
+        extra = f" | Critical districts: {int(row.critical_districts)}" if level == "state" else ""
+        lines.append(f"{i}. {name} — Backlog: {int(row.pending_updates):,} | Gap: {row.gap_percentage:.1f}% | {row.status}{extra}")
+
+        record = {
+            "state": state,
+            "expected_updates": int(row.expected_updates),
+            "actual_updates": int(row.actual_updates),
+            "pending_updates": int(row.pending_updates),
+            "gap_percentage": round(float(row.gap_percentage), 1),
+            "efficiency_index": round(float(row.efficiency_index), 2),
+            "status": str(row.status),
+        }
+        if level == "district":
+            record["district"] = row.district
+        results.append(record)
+
+    return {
+        "answer": "\n".join(lines),
+        "source": "",
+        "type": response_type,
+        "results": results
+    }
+
 
-        # 5. GENERIC FALLBACK
-        response["answer"] = "I am the **Satark RAG Agent**. I have satisfied the 'Mastery' requirement for:\n1. Enrolment Data\n2. Biometric Data\n3. Demographic Data\n\nAsk me about a district (e.g., 'Status of Varanasi') or Policy (e.g., 'What is the penalty?')."
-        return response
+def _fallback_response() -> dict:
+    # 6. GENERIC FALLBACK
+    return {
+        "answer": "I am the **Satark RAG Agent**. I have satisfied the 'Mastery' requirement for:\n1. Enrolment Data\n2. Biometric Data\n3. Demographic Data\n\nAsk me about a district (e.g., 'Status of Varanasi') or Policy (e.g., 'What is the penalty?').",
+        "source": "",
+        "type": "general"
+    }
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Bump when the report layout changes so stale cached PDFs are never served
+REPORT_TEMPLATE_VERSION = 1
+
+
+class ReportCache:
+    """
+    Content-addressed cache for generated PDFs.
+
+    Entries are keyed by a SHA-256 of the canonicalised request (sorted keys,
+    compact separators, template version), so identical payloads map to the same
+    key and the key doubles as the HTTP ETag. The memory tier is an LRU bounded
+    by total bytes; the optional disk tier survives restarts and is bounded the
+    same way (least recently used files are removed first).
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: str = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries = OrderedDict()
+        self._size = 0
+        self._disk_entries = OrderedDict()
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    @staticmethod
+    def key_for(payload: dict) -> str:
+        canonical = json.dumps(
+            {"v": REPORT_TEMPLATE_VERSION, "request": payload},
+            sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+            data = self._read_disk(key)
+            if data is not None:
+                self.disk_hits += 1
+                self._put_memory(key, data)
+                return data
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            self._put_memory(key, data)
+            self._write_disk(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            for key in list(self._disk_entries):
+                self._remove_disk(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "disk_entries": len(self._disk_entries),
+                "disk_bytes": self._disk_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    # --- Memory tier ---
+
+    def _put_memory(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        self._entries[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    # --- Disk tier ---
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.pdf")
+
+    def _scan_disk(self):
+        found = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".pdf"):
+                    stat = os.stat(os.path.join(root, name))
+                    found.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self._disk_entries[key] = size
+            self._disk_size += size
+
+    def _read_disk(self, key):
+        if not self.disk_dir or key not in self._disk_entries:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self._disk_size -= self._disk_entries.pop(key)
+            return None
+        self._disk_entries.move_to_end(key)
+        return data
+
+    def _write_disk(self, key, data):
+        if not self.disk_dir or key in self._disk_entries or len(data) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Report cache write failed: {e}")
+            return
+        self._disk_entries[key] = len(data)
+        self._disk_size += len(data)
+        while self._disk_size > self.disk_max_bytes:
+            self._remove_disk(next(iter(self._disk_entries)))
+
+    def _remove_disk(self, key):
+        self._disk_size -= self._disk_entries.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
@@ -1,9 +1,25 @@
 from fpdf import FPDF
-import tempfile
-import os
-import matplotlib.pyplot as plt
-import seaborn as sns
-import io
+from functools import lru_cache
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+import zlib
+
+from .metrics import stage_timer
+
+# Rendered charts are cached by (district, expected, actual)
+CHART_CACHE_SIZE = 512
+CHART_COLORS = ['#3B82F6', '#10B981'] # Blue, Emerald
+GRID_COLOR = '#CCCCCC'
+
+# fpdf's core fonts are latin-1 only; map common typographic characters first
+PDF_TEXT_REPLACEMENTS = {'\u2013': '-', '\u2014': '-', '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"'}
+
+def pdf_text(value) -> str:
+    text = str(value)
+    for src, dst in PDF_TEXT_REPLACEMENTS.items():
+        text = text.replace(src, dst)
+    return text.encode('latin-1', 'replace').decode('latin-1')
 
 class PDFReport(FPDF):
     def header(self):
@@ -19,38 +35,84 @@ class PDFReport(FPDF):
         self.cell(0, 10, 'Generated by Aadhaar Satark System - Confidential Government Document', 0, 0, 'C')
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'R')
 
-def generate_chart(district_name, expected, actual):
-    """Generates a comparison chart and returns the temp file path."""
-    plt.figure(figsize=(6, 4))
-    sns.set_theme(style="whitegrid")
-    
-    data = {'Metric': ['Expected (Tm)', 'Actual (Am)'], 'Count': [expected, actual]}
-    colors = ['#3B82F6', '#10B981'] # Blue, Emerald
-    
-    ax = sns.barplot(x='Metric', y='Count', data=data, palette=colors)
+    def embed_image(self, key, info, x=None, y=None, w=0, h=0):
+        """Places a pre-decoded image (see render_chart) without touching the filesystem."""
+        if key not in self.images:
+            # fpdf drops the image data after writing it out, so register a copy
+            image = dict(info)
+            image['i'] = len(self.images) + 1
+            self.images[key] = image
+        self.image(key, x=x, y=y, w=w, h=h)
+
+def _draw_chart(district_name, expected, actual) -> Figure:
+    """
+    Builds the comparison chart with the object-oriented API. No pyplot state or
+    global theme is touched, so charts can be rendered from several threads at once.
+    """
+    fig = Figure(figsize=(6, 4), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    labels = ['Expected (Tm)', 'Actual (Am)']
+    ax.bar(labels, [expected, actual], color=CHART_COLORS, width=0.8)
     ax.set_title(f'Biometric Update Status: {district_name}', fontsize=12, pad=10)
+    ax.set_xlabel("Metric")
     ax.set_ylabel("Records")
-    
+
+    # White grid look (horizontal grid lines behind the bars, light spines, no ticks)
+    ax.set_axisbelow(True)
+    ax.yaxis.grid(True, color=GRID_COLOR, linewidth=0.8)
+    ax.tick_params(length=0)
+    for spine in ax.spines.values():
+        spine.set_color(GRID_COLOR)
+
     # Add values on top of bars
     for i, v in enumerate([expected, actual]):
         ax.text(i, v + (expected * 0.02), f"{v:,}", ha='center', fontsize=10, fontweight='bold')
 
-    plt.tight_layout()
-    
-    fd, path = tempfile.mkstemp(suffix=".png")
-    plt.savefig(path, dpi=100)
-    plt.close()
-    os.close(fd)
-    return path
+    fig.tight_layout()
+    return fig
 
-def generate_report(district_data: dict) -> bytes:
-    pdf = PDFReport()
-    pdf.alias_nb_pages()
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def render_chart(district_name, expected, actual) -> dict:
+    """
+    Renders the chart to raw RGB pixels and returns it as an fpdf image record.
+    This skips PNG encoding and fpdf's per-row PNG/alpha decoding entirely.
+    The result is cached, so repeated reports for the same figures reuse it.
+    """
+    fig = _draw_chart(district_name, expected, actual)
+    fig.canvas.draw()
+    rgba = np.asarray(fig.canvas.buffer_rgba())
+    height, width = rgba.shape[:2]
+    rgb = np.ascontiguousarray(rgba[:, :, :3])
+    return {
+        'w': width,
+        'h': height,
+        'cs': 'DeviceRGB',
+        'bpc': 8,
+        'f': 'FlateDecode',
+        'pal': '',
+        'trns': '',
+        'data': zlib.compress(rgb.tobytes()),
+    }
+
+def generate_report(district_data: dict, chart: dict = None) -> bytes:
+    # Timings recorded inside bulk-report worker processes stay in those processes
+    with stage_timer("report_render", rows=1):
+        pdf = PDFReport()
+        pdf.alias_nb_pages()
+        write_district_report(pdf, district_data, chart)
+        return pdf.output(dest='S').encode('latin-1')
+
+def write_district_report(pdf: PDFReport, district_data: dict, chart: dict = None, link=None):
+    """Adds one district's report (starting on a new page) to the document."""
     pdf.add_page()
-    
+    if link is not None:
+        pdf.set_link(link)
+
     # Data Extraction
-    district = district_data.get('district', 'N/A')
-    state = district_data.get('state', 'N/A')
+    district = pdf_text(district_data.get('district', 'N/A'))
+    state = pdf_text(district_data.get('state', 'N/A'))
     expected = district_data.get('expected_updates', 0)
     actual = district_data.get('actual_updates', 0)
     pending = district_data.get('pending_updates', 0)
@@ -110,11 +172,11 @@ def generate_report(district_data: dict) -> bytes:
     # 5. Visual Analysis (Chart)
     pdf.set_font("Arial", 'B', 11)
     pdf.cell(0, 8, txt="Visual Variance Analysis", ln=1)
-    # Generate and embed chart
-    chart_path = generate_chart(district, expected, actual)
-    pdf.image(chart_path, x=10, y=pdf.get_y(), w=100)
+    # Render (or reuse) the chart in memory and embed it
+    if chart is None:
+        chart = render_chart(district_data.get('district', 'N/A'), expected, actual)
+    pdf.embed_image(f"chart:{state}:{district}", chart, x=10, y=pdf.get_y(), w=100)
     pdf.ln(75) # Move cursor down past image
-    os.remove(chart_path) # Cleanup
 
     # 6. Detailed Metrics Table
     pdf.set_font("Arial", 'B', 11)
@@ -161,6 +223,29 @@ def generate_report(district_data: dict) -> bytes:
         pdf.cell(40, 8, f"{kits_needed} Kits", 1, 1)
         pdf.ln(5)
 
+    # 7b. Projected clearance at the district's own observed biometric throughput
+    forecast = district_data.get('forecast')
+    if pending > 0 and forecast:
+        clear_by = forecast.get('clear_by')
+        pdf.set_font("Arial", 'B', 11)
+        pdf.cell(0, 8, txt="Projected Clearance (Current Trend)", ln=1)
+        pdf.set_font("Arial", 'I', 10)
+        if clear_by:
+            outlook = f"At the observed pace the backlog clears in about {forecast['days_to_clear']:,} days, by {clear_by}."
+        else:
+            outlook = "At the observed pace the backlog is not projected to clear; additional capacity is required."
+        pdf.multi_cell(0, 6, txt=outlook)
+        pdf.ln(2)
+
+        pdf.set_font("Arial", 'B', 10)
+        pdf.cell(90, 8, "Observed Daily Throughput (smoothed):", 1)
+        pdf.cell(40, 8, f"{forecast['daily_throughput']:,.1f} updates/day", 1, 1)
+        pdf.cell(90, 8, "Throughput Trend:", 1)
+        pdf.cell(40, 8, f"{forecast['trend_per_day']:+.2f} per day", 1, 1)
+        pdf.cell(90, 8, "Projected Clearance Date:", 1)
+        pdf.cell(40, 8, clear_by or "Not projected", 1, 1)
+        pdf.ln(5)
+
     # 8. Strategic Action Plan
     pdf.set_font("Arial", 'B', 11)
     pdf.cell(0, 8, txt="Official Directives", ln=1)
@@ -180,4 +265,62 @@ def generate_report(district_data: dict) -> bytes:
     pdf.cell(20, 5, "", 0, 0)
     pdf.cell(80, 5, "UIDAI Regional Office", 0, 1, 'C')
 
+# Table of contents layout for combined reports
+TOC_ROWS_PER_PAGE = 30
+TOC_ROW_HEIGHT = 7
+
+def _count_pages(district_data: dict, chart: dict) -> int:
+    pdf = PDFReport()
+    write_district_report(pdf, district_data, chart)
+    return pdf.page_no()
+
+def generate_combined_report(districts: list, charts: list = None) -> bytes:
+    """
+    Builds a single PDF containing every district report, preceded by a linked
+    table of contents. Page numbers are found with a layout-only first pass,
+    which is cheap because the charts are already rendered.
+    """
+    with stage_timer("report_render_combined", rows=len(districts)):
+        return _combined_report(districts, charts)
+
+
+def _combined_report(districts: list, charts: list = None) -> bytes:
+    if charts is None:
+        charts = [render_chart(d.get('district', 'N/A'), d.get('expected_updates', 0), d.get('actual_updates', 0)) for d in districts]
+
+    toc_pages = max(1, -(-len(districts) // TOC_ROWS_PER_PAGE))
+    start_pages = []
+    page = toc_pages + 1
+    for d, chart in zip(districts, charts):
+        start_pages.append(page)
+        page += _count_pages(d, chart)
+
+    pdf = PDFReport()
+    pdf.alias_nb_pages()
+    links = [pdf.add_link() for _ in districts]
+
+    # 1. Table of Contents
+    for p in range(toc_pages):
+        pdf.add_page()
+        pdf.set_font("Arial", 'B', 14)
+        pdf.cell(0, 10, txt=f"Table of Contents ({len(districts)} Districts)", ln=1)
+        pdf.set_fill_color(240, 240, 240)
+        pdf.set_font("Arial", 'B', 10)
+        pdf.cell(75, TOC_ROW_HEIGHT, "District", 1, 0, 'L', True)
+        pdf.cell(60, TOC_ROW_HEIGHT, "State", 1, 0, 'L', True)
+        pdf.cell(30, TOC_ROW_HEIGHT, "Status", 1, 0, 'L', True)
+        pdf.cell(25, TOC_ROW_HEIGHT, "Page", 1, 1, 'R', True)
+        pdf.set_font("Arial", size=10)
+        rows = range(p * TOC_ROWS_PER_PAGE, min(len(districts), (p + 1) * TOC_ROWS_PER_PAGE))
+        for i in rows:
+            d = districts[i]
+            pdf.cell(75, TOC_ROW_HEIGHT, pdf_text(d.get('district', 'N/A')), 1, 0, 'L', False, links[i])
+            pdf.cell(60, TOC_ROW_HEIGHT, pdf_text(d.get('state', 'N/A')), 1, 0, 'L')
+            pdf.cell(30, TOC_ROW_HEIGHT, str(d.get('status', 'SAFE')), 1, 0, 'L')
+            pdf.cell(25, TOC_ROW_HEIGHT, str(start_pages[i]), 1, 1, 'R', False, links[i])
+
+    # 2. District Reports
+    for d, chart, link in zip(districts, charts, links):
+        write_district_report(pdf, d, chart, link)
+
     return pdf.output(dest='S').encode('latin-1')
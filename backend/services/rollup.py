@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from .aggregates import add_metrics, rollup_districts
+from .metrics import stage_timer
+
+# Level -> the columns that identify one of its rows
+LEVELS = {
+    "nation": [],
+    "state": ['state'],
+    "district": ['state', 'district'],
+    "pincode": ['state', 'district', 'pincode'],
+}
+PINCODE_KEYS = LEVELS["pincode"]
+# Page size bounds for the pincode drilldown
+DEFAULT_PINCODE_LIMIT = 50
+MAX_PINCODE_LIMIT = 1000
+
+
+def _pincode_sum(df: pd.DataFrame, col: str) -> pd.Series:
+    if df is None or df.empty or col not in df.columns or any(k not in df.columns for k in ('state', 'district')):
+        return pd.Series(dtype=float)
+    keys = [df['state'], df['district'],
+            df['pincode'] if 'pincode' in df.columns else pd.Series(np.nan, index=df.index, name='pincode')]
+    # Rows without a pincode are kept (as a null pincode) so the district totals stay complete
+    return pd.to_numeric(df[col], errors='coerce').fillna(0).groupby(keys, dropna=False, observed=True).sum()
+
+
+def pincode_sums(enrol_df, bio_df) -> pd.DataFrame:
+    """Expected (enrolment) and actual (biometric) totals per (state, district, pincode)."""
+    return combine_pincode_sums(_pincode_sum(enrol_df, 'age_5_17'), _pincode_sum(bio_df, 'bio_age_5_17'))
+
+
+def combine_pincode_sums(expected: pd.Series, actual: pd.Series) -> pd.DataFrame:
+    """One frame from the per-pincode enrolment and biometric series (outer join, missing side 0)."""
+    table = pd.concat([expected.rename('expected_updates'), actual.rename('actual_updates')], axis=1).fillna(0)
+    if table.empty:
+        return pd.DataFrame(columns=PINCODE_KEYS + ['expected_updates', 'actual_updates'])
+    table.index.names = PINCODE_KEYS
+    return table.reset_index().sort_values(PINCODE_KEYS, ignore_index=True)
+
+
+class RollupCube:
+    """
+    Expected, actual, pending, gap and efficiency at nation, state, district
+    and pincode level. Pincode and district rows are computed from their own
+    totals (district rows match the dashboard records); state and nation
+    rows sum district backlogs, as the dashboard summary does.
+
+    Also holds the pincode drilldown: pincode rows grouped by district and
+    sorted by pending (largest first), with each district's slice bounds in a
+    dict, so a page costs O(page size) whatever the size of the masters.
+    """
+
+    def __init__(self, tables: dict):
+        self.tables = tables
+        self._build_drilldown()
+
+    def _build_drilldown(self):
+        pincodes = self.tables["pincode"]
+        order = pincodes.sort_values(['state', 'district', 'pending_updates', 'pincode'],
+                                     ascending=[True, True, False, True], kind="stable").index
+        self._drilldown = pincodes.loc[order].reset_index(drop=True)
+        self._district_slices = {}
+        if len(self._drilldown):
+            states = self._drilldown['state'].astype(str).to_numpy()
+            districts = self._drilldown['district'].astype(str).to_numpy()
+            starts = np.flatnonzero(np.r_[True, (states[1:] != states[:-1]) | (districts[1:] != districts[:-1])])
+            ends = np.r_[starts[1:], len(states)]
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                self._district_slices[_name_key(states[start], districts[start])] = (start, end)
+
+    @classmethod
+    def from_pincode_sums(cls, sums: pd.DataFrame) -> "RollupCube":
+        with stage_timer("rollup_build", rows=len(sums)):
+            pincodes = add_metrics(sums.copy())
+            districts = sums.groupby(LEVELS["district"], sort=True, observed=True)[
+                ['expected_updates', 'actual_updates']].sum().reset_index()
+            districts['pincodes'] = sums.groupby(LEVELS["district"], sort=True, observed=True).size().to_numpy()
+            districts = add_metrics(districts)
+            return cls({
+                "nation": rollup_districts(districts, LEVELS["nation"]),
+                "state": rollup_districts(districts, LEVELS["state"]),
+                "district": districts,
+                "pincode": pincodes,
+            })
+
+    def records(self, level: str, state: str = None, district: str = None) -> list:
+        """One level's rows, optionally only those under a state and/or district (case-insensitive)."""
+        table = self.tables[level]
+        for col, value in (('state', state), ('district', district)):
+            if value is not None and col in table.columns:
+                table = table[table[col].astype(str).str.casefold() == value.strip().casefold()]
+        return _format(table, level)
+
+    def pincodes(self, state: str, district: str, offset: int = 0, limit: int = DEFAULT_PINCODE_LIMIT):
+        """
+        (number of pincodes, one page of them by descending pending) for a
+        district, or None if the district is unknown. Names are case-insensitive.
+        """
+        bounds = self._district_slices.get(_name_key(state, district))
+        if bounds is None:
+            return None
+        start, end = bounds
+        first = min(start + max(offset, 0), end)
+        return end - start, _format(self._drilldown.iloc[first:min(first + limit, end)], "pincode")
+
+
+def _name_key(state: str, district: str) -> tuple:
+    return str(state).strip().casefold(), str(district).strip().casefold()
+
+
+def _format(table: pd.DataFrame, level: str) -> list:
+    """JSON records of one level's rows, with the dashboard records' types and rounding."""
+    records = {col: table[col].astype(object).tolist() for col in LEVELS[level] if col != 'pincode'}
+    if level == "pincode":
+        records['pincode'] = [None if pd.isna(p) else int(p) for p in table['pincode']]
+    for col in ('expected_updates', 'actual_updates', 'pending_updates'):
+        records[col] = table[col].to_numpy(dtype=float).astype(np.int64).tolist()
+    # Python's round (not ndarray.round) rounds like the dashboard records do
+    records['gap_percentage'] = [round(v, 1) for v in table['gap_percentage'].to_numpy(dtype=float).tolist()]
+    records['efficiency_index'] = [round(v, 2) for v in table['efficiency_index'].to_numpy(dtype=float).tolist()]
+    records['status'] = table['status'].astype(str).tolist()
+    for col in ('critical_districts', 'districts', 'pincodes'):
+        if col in table.columns:
+            records[col] = table[col].astype(np.int64).tolist()
+    return [dict(zip(records, values)) for values in zip(*records.values())]
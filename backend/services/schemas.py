@@ -0,0 +1,166 @@
+import importlib.util
+import io
+import os
+
+import pandas as pd
+
+# "pyarrow" when installed (multi-threaded), else pandas' C parser. Chunked reads always use "c".
+PARSER_ENGINE = os.getenv("CSV_ENGINE") or ("pyarrow" if importlib.util.find_spec("pyarrow") else "c")
+
+KEY_DTYPES = {
+    "date": "str",
+    "state": "str",
+    "district": "str",
+    # float64, not int64: a blank pincode (common in the data.gov.in drops) is NaN
+    # instead of failing the typed parse
+    "pincode": "float64",
+}
+
+
+class SchemaError(ValueError):
+    """A file's header does not match its dataset schema."""
+
+
+def normalize_column(name) -> str:
+    # Same normalisation as clean_dataframe
+    return str(name).lower().strip()
+
+
+class DatasetSchema:
+    """
+    Columns, dtypes and date format of one data.gov.in dataset. Reading with
+    the schema parses only its columns, straight into their final dtypes, so
+    cleaning does not need a to_numeric pass afterwards.
+    """
+
+    def __init__(self, name: str, count_columns: list, required: list, date_format: str = "%d-%m-%Y"):
+        self.name = name
+        self.count_columns = list(count_columns)
+        self.dtypes = {**KEY_DTYPES, **{c: "int64" for c in self.count_columns}}
+        self.columns = list(self.dtypes)
+        self.required = list(required)
+        self.date_column = "date"
+        self.date_format = date_format
+
+    def match_header(self, header) -> dict:
+        """Raw header name -> schema column. Raises SchemaError when a required column is missing."""
+        mapping = {}
+        for raw in header:
+            column = normalize_column(raw)
+            if column in self.dtypes and column not in mapping.values():
+                mapping[raw] = column
+        missing = [c for c in self.required if c not in mapping.values()]
+        if missing:
+            raise SchemaError(f"{self.name} file is missing required column(s) {', '.join(missing)}; "
+                              f"expected columns: {', '.join(self.columns)}")
+        return mapping
+
+    def read_options(self, mapping: dict, columns: list = None, typed: bool = True) -> dict:
+        """usecols/dtype for read_csv, keyed by the file's own header names."""
+        wanted = [raw for raw, column in mapping.items() if columns is None or column in columns]
+        dtype = {raw: self.dtypes[mapping[raw]] for raw in wanted}
+        if not typed:
+            # Tolerant fallback: numeric columns inferred as before; coerce_counts repairs counts after cleaning
+            dtype = {raw: d for raw, d in dtype.items() if d == "str"}
+        return {"usecols": wanted, "dtype": dtype}
+
+    def parse_dates(self, df: pd.DataFrame) -> pd.Series:
+        """The date column as datetimes (unparseable values become NaT)."""
+        return pd.to_datetime(df[self.date_column], format=self.date_format, errors="coerce")
+
+
+SCHEMAS = {
+    "enrolment": DatasetSchema("enrolment", ["age_0_5", "age_5_17", "age_18_greater"],
+                               required=["state", "district", "age_5_17"]),
+    "biometric": DatasetSchema("biometric", ["bio_age_5_17", "bio_age_17_"],
+                               required=["state", "district", "bio_age_5_17"]),
+    "demographic": DatasetSchema("demographic", ["demo_age_5_17", "demo_age_17_"],
+                                 required=["state", "district", "demo_age_5_17"]),
+}
+
+
+def get_schema(kind: str) -> DatasetSchema:
+    if kind not in SCHEMAS:
+        raise ValueError(f"Unknown dataset: {kind}")
+    return SCHEMAS[kind]
+
+
+def detect_dataset(header) -> str:
+    """The dataset whose required columns the header has. Raises SchemaError when none or several match."""
+    columns = {normalize_column(c) for c in header}
+    matches = [kind for kind, schema in SCHEMAS.items() if set(schema.required) <= columns]
+    if len(matches) != 1:
+        found = ", ".join(matches) if matches else "no dataset"
+        raise SchemaError(f"Cannot tell the dataset from the header ({found} matched); "
+                          f"expected the columns of one of: {', '.join(SCHEMAS)}")
+    return matches[0]
+
+
+def _source(source):
+    """read_csv argument for bytes, a path or a seekable buffer; re-readable for the header check."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def read_header(source) -> list:
+    return list(pd.read_csv(_source(source), nrows=0).columns)
+
+
+def read_dataset(source, kind: str, columns: list = None, chunksize: int = None, engine: str = None):
+    """
+    Parses a dataset CSV (bytes, path or buffer) with its schema: the header is
+    validated first (SchemaError before any rows are parsed), then only schema
+    columns are read, typed on the way in, and renamed to their schema names.
+    columns narrows the projection further. With chunksize, returns an iterator
+    of frames.
+
+    Files whose count columns hold blanks or text fall back to inferring
+    those columns; prepare_frame coerces them as before.
+    """
+    schema = get_schema(kind)
+    mapping = schema.match_header(read_header(source))
+    if chunksize:
+        return _read_chunks(source, schema, mapping, columns, chunksize)
+
+    engine = engine or PARSER_ENGINE
+    try:
+        df = pd.read_csv(_source(source), engine=engine, **schema.read_options(mapping, columns))
+    except ValueError:
+        df = pd.read_csv(_source(source), engine=engine, **schema.read_options(mapping, columns, typed=False))
+    return df.rename(columns=mapping)
+
+
+def _read_chunks(source, schema, mapping, columns, chunksize):
+    rows = 0
+    try:
+        for chunk in pd.read_csv(_source(source), engine="c", chunksize=chunksize,
+                                 **schema.read_options(mapping, columns)):
+            rows += len(chunk)
+            yield chunk.rename(columns=mapping)
+        return
+    except ValueError:
+        pass
+    # Typed parse failed: resume after the rows already yielded, numeric columns inferred
+    for chunk in pd.read_csv(_source(source), engine="c", chunksize=chunksize, skiprows=range(1, rows + 1),
+                             **schema.read_options(mapping, columns, typed=False)):
+        yield chunk.rename(columns=mapping)
+
+
+def apply_schema(df: pd.DataFrame, kind: str) -> pd.DataFrame:
+    """
+    Types a frame built from API records, where every field arrives as a string:
+    schema columns only, counts as int64 (or float64 when values are missing)
+    and pincodes as float64, so it matches a frame parsed from CSV.
+    """
+    schema = get_schema(kind)
+    mapping = schema.match_header(df.columns)
+    df = df[list(mapping)].rename(columns=mapping)
+    for column in df.columns:
+        if schema.dtypes[column] == "str":
+            continue
+        values = pd.to_numeric(df[column], errors="coerce")
+        df[column] = values.astype("int64") if schema.dtypes[column] == "int64" and not values.hasnans else values.astype("float64")
+    return df
@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .metrics import stage_timer
+from .processing import KEY_COLUMNS, district_metrics, format_records, score_anomalies, summarize
+
+# Worker processes for process_data's state-sharded mode; 1 keeps the serial path
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", 1))
+# Below this many input rows the pool round trips cost more than they save
+MIN_SHARDED_ROWS = int(os.getenv("MIN_SHARDED_ROWS", 200_000))
+
+# (dataset, count column in the input, column name district_metrics expects)
+DATASETS = (
+    ("enrolment", "age_5_17", "age_5_17"),
+    ("biometric", "bio_age_5_17", "bio_age_5_17"),
+    ("demographic", "demo_age_5_17", "demo_updates"),
+)
+
+_lock = threading.Lock()
+_encodings = {}
+_POOL = None
+_POOL_WORKERS = 0
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _POOL, _POOL_WORKERS
+    with _lock:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False)
+            # spawn: forking a threaded server process is not safe
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def encode(source, df: pd.DataFrame, count_col: str):
+    """
+    (state codes, district codes, counts, states, districts) for one prepared
+    input. Cached per source frame object, so repeated analyses of the same
+    masters factorize the names once.
+    """
+    key = (id(source), count_col)
+    with _lock:
+        cached = _encodings.get(key)
+        if cached is not None and cached[0]() is source and cached[1] == source.shape:
+            return cached[2]
+    state_codes, states = pd.factorize(df['state'])
+    district_codes, districts = pd.factorize(df['district'])
+    encoded = (state_codes.astype(np.int32), district_codes.astype(np.int32),
+               df[count_col].to_numpy(dtype=np.float64), list(states), list(districts))
+    if isinstance(source, pd.DataFrame):
+        with _lock:
+            _encodings[key] = (weakref.ref(source, lambda _, k=key: _encodings.pop(k, None)), source.shape, encoded)
+    return encoded
+
+
+def assign_shards(state_rows: dict, n_shards: int) -> list:
+    """Greedy balance of states over shards by row count (largest first). Returns lists of state names."""
+    shards = [[] for _ in range(n_shards)]
+    loads = [0] * n_shards
+    for state, rows in sorted(state_rows.items(), key=lambda item: (-item[1], item[0])):
+        i = loads.index(min(loads))
+        shards[i].append(state)
+        loads[i] += rows
+    return [s for s in shards if s]
+
+
+def _views(buf, layout: dict):
+    n, offset, bounds = layout["rows"], layout["offset"], layout["bounds"]
+    state_codes = np.ndarray(n, dtype=np.int32, buffer=buf, offset=offset)
+    district_codes = np.ndarray(n, dtype=np.int32, buffer=buf, offset=offset + 4 * n)
+    counts = np.ndarray(n, dtype=np.float64, buffer=buf, offset=offset + 8 * n)
+    return state_codes, district_codes, counts, bounds
+
+
+def aggregate_shard(shm_name: str, layouts: list, shard: int) -> pd.DataFrame:
+    """
+    Worker: district sums and metrics for one shard's states. Reads only the
+    shard's rows of each dataset from the shared block (the parent grouped
+    rows by shard), so no record data is pickled.
+    """
+    # Spawned workers share the parent's resource tracker, so attaching does not claim the block
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        grps = {}
+        for layout in layouts:
+            state_codes, district_codes, counts, bounds = _views(shm.buf, layout)
+            start, end = bounds[shard]
+            sc, dc, values = state_codes[start:end], district_codes[start:end], counts[start:end]
+            n_districts = max(len(layout["districts"]), 1)
+            pair, inverse = np.unique(sc.astype(np.int64) * n_districts + dc, return_inverse=True)
+            sums = np.bincount(inverse, weights=values, minlength=len(pair))
+            grps[layout["dataset"]] = pd.DataFrame({
+                'state': np.asarray(layout["states"], dtype=object)[pair // n_districts] if len(pair) else [],
+                'district': np.asarray(layout["districts"], dtype=object)[pair % n_districts] if len(pair) else [],
+                layout["value"]: sums,
+            })
+            # Views must go before the block can be closed
+            del state_codes, district_codes, counts, sc, dc, values
+        return district_metrics(grps["enrolment"], grps["biometric"], grps["demographic"])
+    finally:
+        shm.close()
+
+
+def _format_shard(positions: np.ndarray, merged: pd.DataFrame):
+    return positions, format_records(merged)
+
+
+def analyze_sharded(inputs: dict, model=None, workers: int = None) -> dict:
+    """
+    process_data's parallel mode. inputs: dataset -> (source frame, prepared
+    projection). Rows are grouped by a state shard into one shared-memory block;
+    workers aggregate and compute metrics per shard, the parent scores anomalies
+    over all districts (the model is global), then workers format the records.
+    Output equals the serial path.
+    """
+    workers = workers or ANALYSIS_WORKERS
+    encoded = {}
+    with stage_timer("shard_encode", rows=sum(len(df) for _, df in inputs.values())):
+        for dataset, count_col, _ in DATASETS:
+            source, df = inputs[dataset]
+            encoded[dataset] = encode(source, df, count_col)
+
+        # Rows per state over all datasets, then states balanced over shards
+        state_rows = {}
+        for state_codes, _, _, states, _ in encoded.values():
+            valid = state_codes[state_codes >= 0]
+            for state, n in zip(states, np.bincount(valid, minlength=len(states))):
+                state_rows[state] = state_rows.get(state, 0) + int(n)
+        shards = assign_shards(state_rows, workers)
+        shard_of = {state: i for i, states in enumerate(shards) for state in states}
+
+        # One block: per dataset, state codes | district codes | counts, rows grouped by shard
+        sizes = {dataset: len(e[0]) for dataset, e in encoded.items()}
+        shm = shared_memory.SharedMemory(create=True, size=max(16 * sum(sizes.values()), 16))
+    try:
+        layouts = []
+        offset = 0
+        with stage_timer("shard_handoff"):
+            for dataset, _, value in DATASETS:
+                state_codes, district_codes, counts, states, districts = encoded[dataset]
+                # Rows with a missing state or district are dropped, as groupby does
+                lookup = np.array([shard_of[s] for s in states] + [len(shards)], dtype=np.int16)
+                row_shard = lookup[np.where((state_codes >= 0) & (district_codes >= 0), state_codes, -1)]
+                order = np.argsort(row_shard, kind="stable")
+                bounds = np.searchsorted(row_shard[order], np.arange(len(shards) + 1))
+                layout = {"dataset": dataset, "value": value, "rows": len(state_codes), "offset": offset,
+                          "bounds": list(zip(bounds[:-1].tolist(), bounds[1:].tolist())),
+                          "states": states, "districts": districts}
+                target_states, target_districts, target_counts, _ = _views(shm.buf, layout)
+                np.take(state_codes, order, out=target_states)
+                np.take(district_codes, order, out=target_districts)
+                np.take(counts, order, out=target_counts)
+                del target_states, target_districts, target_counts
+                layouts.append(layout)
+                offset += 16 * len(state_codes)
+
+        pool = _get_pool(workers)
+        with stage_timer("shard_aggregate"):
+            futures = [pool.submit(aggregate_shard, shm.name, layouts, i) for i in range(len(shards))]
+            parts = [f.result() for f in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Shards hold disjoint states; sorting restores the serial merge's (state, district) order
+    merged = pd.concat(parts, ignore_index=True).sort_values(KEY_COLUMNS, ignore_index=True)
+    merged, model = score_anomalies(merged, model)
+
+    with stage_timer("format_records", rows=len(merged)):
+        shard_ids = merged['state'].map(shard_of).to_numpy()
+        futures = []
+        for i in range(len(shards)):
+            positions = np.flatnonzero(shard_ids == i)
+            futures.append(pool.submit(_format_shard, positions, merged.iloc[positions]))
+        districts_data = [None] * len(merged)
+        for future in futures:
+            positions, records = future.result()
+            for position, record in zip(positions, records):
+                districts_data[position] = record
+
+    return {
+        "summary": summarize(merged),
+        "districts": districts_data,
+        "model": model
+    }
@@ -0,0 +1,151 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .processing import SCHEMA_MARKER, SCHEMA_VERSION
+
+SHARED_MASTERS_DIR = os.getenv("SHARED_MASTERS_DIR", os.path.join("data", "shared"))
+VERSION_FILE = "VERSION"
+LOCK_FILE = ".lock"
+# Published versions kept on disk; older ones are deleted (workers still mapping them keep their pages)
+KEEP_VERSIONS = 2
+
+
+class SharedMasters:
+    """
+    The master datasets as memory-mapped column files that every uvicorn worker
+    process maps read-only, so N workers hold one copy in the page cache. Each
+    mutation publishes a new version directory (string columns as categorical codes
+    plus sorted categories, numeric columns as .npy) and then atomically
+    rewrites the VERSION file; workers stat that file per request and remap
+    when it changed. Writers serialize on a file lock.
+    """
+
+    def __init__(self, path: str = SHARED_MASTERS_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.version = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    # --- VERSIONS ---
+
+    def _read_version(self):
+        """(stamp, VERSION contents) or (None, None) before anything was published."""
+        version_path = os.path.join(self.path, VERSION_FILE)
+        try:
+            stat = os.stat(version_path)
+            with open(version_path) as f:
+                return (stat.st_ino, stat.st_mtime_ns), json.load(f)
+        except (OSError, ValueError):
+            return None, None
+
+    def changed(self) -> bool:
+        """True if another process published since this one last mapped (one stat call)."""
+        try:
+            stat = os.stat(os.path.join(self.path, VERSION_FILE))
+        except OSError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns) != self._stamp
+
+    def map(self) -> dict:
+        """
+        Maps the published version. Returns dataset -> read-only prepared frame
+        (datasets that were never published are absent), or None if nothing is.
+        """
+        with self._lock:
+            stamp, current = self._read_version()
+            if current is None:
+                return None
+            version_dir = os.path.join(self.path, current["dir"])
+            frames = {dataset: _map_frame(version_dir, dataset, layout)
+                      for dataset, layout in current["datasets"].items()}
+            self.version, self._stamp = current["version"], stamp
+            return frames
+
+    @contextmanager
+    def writer(self):
+        """Cross-process write lock. Re-map inside it before merging so no other worker's write is lost."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield self
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def publish(self, masters: dict) -> int:
+        """
+        Writes masters (dataset -> frame or None) as the next version and
+        switches the VERSION file to it. Call while holding writer().
+        """
+        with self._lock:
+            _, current = self._read_version()
+            version = (current["version"] if current else 0) + 1
+            name = f"v{version:06d}"
+            version_dir = os.path.join(self.path, name)
+            tmp_dir = version_dir + ".tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            datasets = {dataset: _write_frame(tmp_dir, dataset, df)
+                        for dataset, df in masters.items() if df is not None}
+            os.replace(tmp_dir, version_dir)
+
+            tmp = os.path.join(self.path, VERSION_FILE + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump({"version": version, "dir": name, "datasets": datasets,
+                           "published_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f)
+            os.replace(tmp, os.path.join(self.path, VERSION_FILE))
+            self._prune(version)
+            return version
+
+    def _prune(self, version: int):
+        for entry in os.listdir(self.path):
+            if entry.startswith("v") and entry[1:7].isdigit() and int(entry[1:7]) <= version - KEEP_VERSIONS:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+
+def _write_frame(directory: str, dataset: str, df: pd.DataFrame) -> dict:
+    """One .npy per column. Returns the layout stored in VERSION."""
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        entry = {"name": str(col), "file": f"{dataset}.{i}.npy"}
+        if pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+            array = values.to_numpy()
+        else:
+            # Sorted categories keep groupby output in the same order as on plain strings
+            codes, categories = pd.factorize(values, sort=True)
+            array = codes.astype(_codes_dtype(len(categories)))
+            entry["categories"] = [str(c) for c in categories]
+        np.save(os.path.join(directory, entry["file"]), array, allow_pickle=False)
+        columns.append(entry)
+    return {"rows": len(df), "columns": columns}
+
+
+def _codes_dtype(n_categories: int):
+    # The width pandas gives categorical codes, so from_codes keeps the mapped array instead of copying it
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _map_frame(directory: str, dataset: str, layout: dict) -> pd.DataFrame:
+    data = {}
+    for entry in layout["columns"]:
+        array = np.load(os.path.join(directory, entry["file"]), mmap_mode="r")
+        if "categories" in entry:
+            array = pd.Categorical.from_codes(array, categories=entry["categories"], validate=False)
+        # Series first: a dict of bare arrays would be consolidated into one (copied) block
+        data[entry["name"]] = pd.Series(array, copy=False)
+    df = pd.DataFrame(data, copy=False)
+    df.attrs[SCHEMA_MARKER] = SCHEMA_VERSION
+    return df
@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import district_table_from_sums
+from .metrics import stage_timer
+from .processing import KEY_COLUMNS, SCHEMA_MARKER, SCHEMA_VERSION, analyze_aggregates, prepare_frame
+from .rollup import combine_pincode_sums
+from .timeline import parse_daily
+from .schemas import SCHEMAS
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join("data", "satark.db"))
+# Rows per executemany batch on upsert
+UPSERT_BATCH_ROWS = 50_000
+
+# smart_merge's dedup subset. Stored NOT NULL with these fillers so a missing
+# pincode or date is one key value, as drop_duplicates treats NaN
+RECORD_KEY = ['state', 'district', 'pincode', 'date']
+KEY_FILLERS = {'pincode': -1, 'date': ''}
+
+# (dataset, count column summed per district, name analyze_aggregates expects)
+ANALYSIS_COUNTS = (
+    ("enrolment", "age_5_17", "age_5_17"),
+    ("biometric", "bio_age_5_17", "bio_age_5_17"),
+    ("demographic", "demo_age_5_17", "demo_updates"),
+)
+
+
+class SqlStore:
+    """
+    The master datasets in a local SQLite file: one table per dataset keyed on
+    (state, district, pincode, date), upserted with smart_merge's keep-last
+    policy. Analysis sums per district in SQL, so only district-level results
+    are loaded into memory and datasets larger than RAM can be analyzed; the
+    results equal process_data over the pandas masters the same uploads give.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection shared by the request threads, serialized by the lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            for dataset, schema in SCHEMAS.items():
+                self._conn.execute(self._table_sql(dataset, schema))
+
+    @staticmethod
+    def _table_sql(dataset: str, schema) -> str:
+        counts = ", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in schema.count_columns)
+        # WITHOUT ROWID clusters rows on the key, so (state, district) groups are read in index order
+        return (f"CREATE TABLE IF NOT EXISTS {dataset} ("
+                f"state TEXT NOT NULL, district TEXT NOT NULL, "
+                f"pincode INTEGER NOT NULL DEFAULT -1, date TEXT NOT NULL DEFAULT '', {counts}, "
+                f"PRIMARY KEY (state, district, pincode, date)) WITHOUT ROWID")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params=()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    # --- WRITES ---
+
+    def upsert(self, dataset: str, df: pd.DataFrame) -> int:
+        """
+        smart_merge into the dataset's table: rows are inserted in order and a
+        row whose key already exists overwrites it, so the last one wins.
+        Returns the number of rows written.
+        """
+        schema = SCHEMAS[dataset]
+        df = prepare_frame(df)
+        if df is None or df.empty:
+            return 0
+        df = df.dropna(subset=[c for c in KEY_COLUMNS if c in df.columns])
+        if any(c not in df.columns for c in KEY_COLUMNS):
+            return 0
+
+        columns = KEY_COLUMNS + [c for c in ('pincode', 'date') + tuple(schema.count_columns) if c in df.columns]
+        rows = pd.DataFrame({c: df[c] for c in columns})
+        for col, filler in KEY_FILLERS.items():
+            if col in rows.columns:
+                rows[col] = rows[col].fillna(filler)
+        if 'pincode' in rows.columns:
+            rows['pincode'] = pd.to_numeric(rows['pincode'], errors='coerce').fillna(-1).astype('int64')
+        if 'date' in rows.columns:
+            rows['date'] = rows['date'].astype(str)
+
+        updates = [c for c in columns if c not in RECORD_KEY]
+        sql = (f"INSERT INTO {dataset} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT ({', '.join(RECORD_KEY)}) DO "
+               + (f"UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in updates)}" if updates else "NOTHING"))
+
+        with stage_timer("sql_upsert", rows=len(rows)):
+            with self._lock, self._conn:
+                for start in range(0, len(rows), UPSERT_BATCH_ROWS):
+                    batch = rows.iloc[start:start + UPSERT_BATCH_ROWS]
+                    self._conn.executemany(sql, _records(batch))
+        return len(rows)
+
+    # --- READS ---
+
+    def row_count(self, dataset: str) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {dataset}").fetchone()[0]
+
+    def row_counts(self) -> dict:
+        return {dataset: self.row_count(dataset) for dataset in SCHEMAS}
+
+    def load_frame(self, dataset: str) -> pd.DataFrame:
+        """The whole dataset as a prepared frame (missing pincodes/dates back as NaN)."""
+        df = self._query(f"SELECT * FROM {dataset}")
+        df['pincode'] = df['pincode'].where(df['pincode'] >= 0)
+        df['date'] = df['date'].replace('', np.nan)
+        df.attrs[SCHEMA_MARKER] = SCHEMA_VERSION
+        return df
+
+    def district_sums(self, dataset: str, count_col: str, name: str = None) -> pd.DataFrame:
+        """(state, district) totals of one count column, ordered like the pandas groupby."""
+        name = name or count_col
+        return self._query(f"SELECT state, district, SUM({count_col}) AS {name} FROM {dataset} "
+                           f"GROUP BY state, district ORDER BY state, district")
+
+    def pincode_sums(self) -> pd.DataFrame:
+        """rollup.pincode_sums over the stored masters, grouped in SQL."""
+        def series(sql: str) -> pd.Series:
+            df = self._query(sql)
+            df['pincode'] = df['pincode'].where(df['pincode'] >= 0)
+            return df.set_index(['state', 'district', 'pincode']).iloc[:, 0]
+
+        with stage_timer("sql_aggregate"):
+            return combine_pincode_sums(
+                series("SELECT state, district, pincode, SUM(age_5_17) AS expected_updates FROM enrolment "
+                       "GROUP BY state, district, pincode"),
+                series("SELECT state, district, pincode, SUM(bio_age_5_17) AS actual_updates FROM biometric "
+                       "GROUP BY state, district, pincode"))
+
+    def daily_sums(self, dataset: str, count_col: str) -> pd.DataFrame:
+        """timeline.daily_sums over a stored master, grouped in SQL."""
+        with stage_timer("sql_aggregate"):
+            return parse_daily(self._query(
+                f"SELECT state, district, date, SUM({count_col}) AS total, COUNT(*) AS \"rows\" FROM {dataset} "
+                f"GROUP BY state, district, date"))
+
+    def analyze(self, model=None) -> dict:
+        """process_data over the stored masters, with the aggregation pushed down to SQL."""
+        try:
+            with stage_timer("sql_aggregate"):
+                grps = [self.district_sums(dataset, count_col, name) for dataset, count_col, name in ANALYSIS_COUNTS]
+            return analyze_aggregates(*grps, model)
+        except Exception as e:
+            print(f"Error processing data: {e}")
+            return {"error": str(e)}
+
+    def district_table(self) -> pd.DataFrame:
+        """build_district_table's agent lookup table from indexed GROUP BY queries."""
+        def series(sql: str) -> pd.Series:
+            return self._query(sql).set_index(KEY_COLUMNS).iloc[:, 0]
+
+        with stage_timer("agent_index"):
+            expected = series("SELECT state, district, SUM(age_5_17) AS expected_updates FROM enrolment "
+                              "GROUP BY state, district ORDER BY state, district")
+            actual = series("SELECT state, district, SUM(bio_age_5_17) AS actual_updates FROM biometric "
+                            "GROUP BY state, district ORDER BY state, district")
+            corrections = series("SELECT state, district, COUNT(*) AS corrections FROM demographic "
+                                 "GROUP BY state, district ORDER BY state, district")
+            return district_table_from_sums(expected, actual, corrections if len(corrections) else None)
+
+
+def _records(df: pd.DataFrame):
+    # tolist() gives plain Python values: sqlite3 cannot bind numpy scalars
+    return zip(*(df[c].tolist() for c in df.columns))
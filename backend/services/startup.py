@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class StartupTracker:
+    """
+    Records the progress of the staged background start-up. Each stage is
+    pending -> running -> done | failed | skipped, with its duration and any
+    error, so /ready can report exactly what is (and is not) loaded.
+    """
+
+    def __init__(self, stage_names):
+        self._lock = threading.Lock()
+        self.started_at = None
+        self.finished_at = None
+        self.stages = OrderedDict(
+            (name, {"status": "pending", "duration_ms": None, "error": None}) for name in stage_names
+        )
+
+    def begin(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.finished_at = None
+            for info in self.stages.values():
+                info.update(status="pending", duration_ms=None, error=None)
+
+    def finish(self):
+        with self._lock:
+            self.finished_at = time.time()
+
+    @contextmanager
+    def stage(self, name):
+        """Times a stage. Exceptions are recorded as a failed stage and not re-raised."""
+        with self._lock:
+            self.stages[name]["status"] = "running"
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            print(f"⚠️ Startup stage '{name}' failed: {e}")
+            self._set(name, "failed", start, str(e))
+        else:
+            self._set(name, "done", start)
+
+    def skip(self, name, reason):
+        with self._lock:
+            self.stages[name].update(status="skipped", duration_ms=0, error=reason)
+
+    def _set(self, name, status, start, error=None):
+        with self._lock:
+            self.stages[name].update(
+                status=status,
+                duration_ms=round((time.perf_counter() - start) * 1000, 2),
+                error=error
+            )
+
+    @property
+    def loading(self) -> bool:
+        """True while the background loader is running."""
+        return self.started_at is not None and self.finished_at is None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            failed = [n for n, s in self.stages.items() if s["status"] == "failed"]
+            if self.ready:
+                status = "degraded" if failed else "ready"
+            else:
+                status = "loading" if self.started_at is not None else "not_started"
+            total = None
+            if self.started_at is not None:
+                total = round(((self.finished_at or time.time()) - self.started_at) * 1000, 2)
+            return {
+                "status": status,
+                "elapsed_ms": total,
+                "stages": {n: dict(s) for n, s in self.stages.items()},
+            }
@@ -0,0 +1,133 @@
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from .metrics import stage_timer
+from .processing import KEY_COLUMNS, analyze_aggregates
+from .schemas import SCHEMAS
+from .sharding import DATASETS
+
+DATE_FORMAT = SCHEMAS["enrolment"].date_format
+# Days covered by the cube, counted back from the latest date (bounds memory if a stray date is decades old)
+MAX_TIMELINE_DAYS = int(os.getenv("MAX_TIMELINE_DAYS", 3660))
+DAILY_COLUMNS = KEY_COLUMNS + ['date', 'total', 'rows']
+
+
+def parse_day(value: str) -> date:
+    """A window bound: YYYY-MM-DD or the datasets' DD-MM-YYYY. Raises ValueError otherwise."""
+    for fmt in ("%Y-%m-%d", DATE_FORMAT):
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date '{value}': use YYYY-MM-DD or DD-MM-YYYY")
+
+
+def daily_sums(df: pd.DataFrame, count_col: str) -> pd.DataFrame:
+    """Per (state, district, day) total of count_col and number of records, from a prepared master."""
+    if df is None or df.empty or any(c not in df.columns for c in KEY_COLUMNS + ['date', count_col]):
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+    # Grouped on the raw date strings first, so only the distinct values are parsed
+    grouped = df.groupby(KEY_COLUMNS + ['date'], observed=True)[count_col].agg(total='sum', rows='size')
+    return parse_daily(grouped.reset_index())
+
+
+def parse_daily(grouped: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parses the date column of per-(state, district, date string) totals and
+    re-sums them per day. Rows whose date does not parse are dropped.
+    """
+    if grouped.empty:
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+    codes, uniques = pd.factorize(grouped['date'])
+    parsed = pd.to_datetime(pd.Series(np.asarray(uniques, dtype=object)), format=DATE_FORMAT, errors='coerce')
+    days = parsed.to_numpy()[np.maximum(codes, 0)]
+    days[codes < 0] = np.datetime64('NaT')
+    grouped = grouped.assign(date=days).dropna(subset=['date'])
+    return grouped.groupby(KEY_COLUMNS + ['date'], observed=True)[['total', 'rows']].sum().reset_index()
+
+
+class DailyCube:
+    """
+    Per-district cumulative daily totals (enrolment, biometric, demographic)
+    and record counts: row d holds the sums of every day before day d. Any
+    [from, to] window's district sums are two row lookups and a subtraction,
+    then go through the same metrics, anomaly and formatting steps as
+    process_data. The result equals process_data over the records in the window.
+    """
+
+    def __init__(self, daily: dict):
+        """daily: dataset -> daily_sums() frame."""
+        frames = [d for d in daily.values() if not d.empty]
+        self.districts = pd.MultiIndex.from_frame(
+            pd.concat([d[KEY_COLUMNS].astype(object) for d in frames]).drop_duplicates().sort_values(KEY_COLUMNS)
+        ) if frames else pd.MultiIndex.from_arrays([[], []], names=KEY_COLUMNS)
+        self._states = np.asarray(self.districts.get_level_values('state'), dtype=object)
+        self._names = np.asarray(self.districts.get_level_values('district'), dtype=object)
+
+        if frames:
+            dates = pd.concat([d['date'] for d in frames])
+            self.last = dates.max().date()
+            self.first = max(dates.min().date(), date.fromordinal(self.last.toordinal() - MAX_TIMELINE_DAYS + 1))
+        else:
+            self.first = self.last = None
+        n_days = (self.last - self.first).days + 1 if frames else 0
+        n_districts = len(self.districts)
+
+        self.prefix = {}
+        with stage_timer("timeline_build", rows=sum(len(d) for d in frames)):
+            for dataset, _, _ in DATASETS:
+                totals = np.zeros((n_days + 1, n_districts))
+                counts = np.zeros((n_days + 1, n_districts), dtype=np.int64)
+                d = daily.get(dataset)
+                if d is not None and not d.empty and n_days:
+                    day = (d['date'].to_numpy(dtype='datetime64[D]') - np.datetime64(self.first, 'D')).astype(np.int64)
+                    keep = day >= 0
+                    d, day = d[keep], day[keep]
+                    column = self.districts.get_indexer(pd.MultiIndex.from_frame(d[KEY_COLUMNS].astype(object)))
+                    flat = day * n_districts + column
+                    size = n_days * n_districts
+                    np.cumsum(np.bincount(flat, weights=d['total'].to_numpy(dtype=float), minlength=size)
+                              .reshape(n_days, n_districts), axis=0, out=totals[1:])
+                    np.cumsum(np.bincount(flat, weights=d['rows'].to_numpy(dtype=float), minlength=size)
+                              .reshape(n_days, n_districts).astype(np.int64), axis=0, out=counts[1:])
+                self.prefix[dataset] = (totals, counts)
+
+    def _bounds(self, start: date = None, end: date = None):
+        """Prefix rows for [start, end], clipped to the cube's days."""
+        if self.first is None:
+            return 0, 0
+        n_days = (self.last - self.first).days + 1
+        lo = 0 if start is None else min(max((start - self.first).days, 0), n_days)
+        hi = n_days if end is None else min(max((end - self.first).days + 1, 0), n_days)
+        return lo, max(hi, lo)
+
+    def daily(self, dataset: str, end: date = None):
+        """(days, districts) per-day totals of one dataset from the first day through end, and that last day."""
+        _, hi = self._bounds(None, end)
+        totals, _ = self.prefix[dataset]
+        last = date.fromordinal(self.first.toordinal() + hi - 1) if hi else None
+        return np.diff(totals[:hi + 1], axis=0), last
+
+    def window(self, start: date = None, end: date = None):
+        """District sums for the window, shaped like aggregate_inputs' output (districts with records only)."""
+        lo, hi = self._bounds(start, end)
+        grps = []
+        for dataset, _, name in DATASETS:
+            totals, counts = self.prefix[dataset]
+            present = (counts[hi] - counts[lo]) > 0
+            grps.append(pd.DataFrame({
+                'state': self._states[present],
+                'district': self._names[present],
+                name: (totals[hi] - totals[lo])[present],
+            }))
+        return tuple(grps)
+
+    def analyze(self, start: date = None, end: date = None, model=None) -> dict:
+        with stage_timer("timeline_window"):
+            grp_enrolment, grp_biometric, grp_demographic = self.window(start, end)
+        if grp_demographic.empty:
+            grp_demographic = pd.DataFrame(columns=['state', 'district', 'demo_updates'])
+        return analyze_aggregates(grp_enrolment, grp_biometric, grp_demographic, model)
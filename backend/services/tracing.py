@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# "none" (default), "console" or "file"; file traces are appended as one JSON object per line
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "none").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_HEADER = "X-Trace-Id"
+
+_CURRENT_SPAN = ContextVar("satark_current_span", default=None)
+_EXPORT_LOCK = threading.Lock()
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, trace, name: str, parent_id: str = None, attributes: dict = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.time()
+        return round((end - self.start) * 1000, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """All spans of one request (or background job). Exported once the root span ends."""
+
+    def __init__(self, trace_id: str = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = [s.to_dict() for s in self.spans]
+        return {"trace_id": self.trace_id, "spans": spans}
+
+
+def current_span():
+    return _CURRENT_SPAN.get()
+
+
+def current_trace_id():
+    span = _CURRENT_SPAN.get()
+    return span.trace.trace_id if span is not None else None
+
+
+@contextmanager
+def start_trace(name: str, trace_id: str = None, **attributes):
+    """Opens a root span in a fresh trace; the trace is exported when it closes."""
+    trace = Trace(trace_id)
+    try:
+        with _enter(Span(trace, name, None, attributes)) as root:
+            yield root
+    finally:
+        export(trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Nested span under the current one. Outside a trace this is a no-op that
+    still yields a span object, so callers can always call .set().
+    """
+    parent = _CURRENT_SPAN.get()
+    if parent is None:
+        yield Span(None, name, None, attributes)
+        return
+    with _enter(Span(parent.trace, name, parent.span_id, attributes)) as child:
+        yield child
+
+
+@contextmanager
+def _enter(new_span: Span):
+    new_span.trace.add(new_span)
+    token = _CURRENT_SPAN.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        new_span.end = time.time()
+        _CURRENT_SPAN.reset(token)
+
+
+def export(trace: Trace):
+    if TRACE_EXPORT == "none":
+        return
+    record = trace.to_dict()
+    if TRACE_EXPORT == "console":
+        _print_trace(record)
+    elif TRACE_EXPORT == "file":
+        line = json.dumps(record, default=str)
+        with _EXPORT_LOCK:
+            with open(TRACE_FILE, "a") as f:
+                f.write(line + "\n")
+
+
+def _print_trace(record: dict):
+    depth = {None: -1}
+    lines = [f"🔎 Trace {record['trace_id']}"]
+    for s in record["spans"]:
+        depth[s["span_id"]] = depth.get(s["parent_id"], -1) + 1
+        attrs = " ".join(f"{k}={v}" for k, v in s["attributes"].items())
+        error = f" ERROR {s['error']}" if s["error"] else ""
+        lines.append(f"{'  ' * (depth[s['span_id']] + 1)}{s['name']} {s['duration_ms']}ms {attrs}{error}".rstrip())
+    print("\n".join(lines))
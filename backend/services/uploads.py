@@ -0,0 +1,117 @@
+import contextvars
+import hashlib
+import io
+import os
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .schemas import SchemaError, detect_dataset, read_dataset, read_header
+from .tracing import span
+
+# Threads, not processes: parsed frames stay in-process (no pickling back), and
+# pandas' C tokenizer releases the GIL while it parses
+UPLOAD_PARSE_WORKERS = int(os.getenv("UPLOAD_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+# Guards against archive bombs; checked from the ZIP directory before anything is extracted
+MAX_ARCHIVE_BYTES = int(float(os.getenv("UPLOAD_MAX_ARCHIVE_MB", 4096)) * 1024 * 1024)
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadFileEntry:
+    """One CSV to ingest: a plain upload or a member of an uploaded ZIP."""
+
+    __slots__ = ("name", "data", "dataset", "fingerprint")
+
+    def __init__(self, name: str, data: bytes, dataset: str = None, fingerprint: str = None):
+        self.name = name
+        self.data = data
+        self.dataset = dataset
+        self.fingerprint = fingerprint or hashlib.sha256(data).hexdigest()
+
+
+async def read_upload(upload, chunk_size: int = READ_CHUNK_BYTES):
+    """Reads an UploadFile in chunks, hashing as it goes. Returns (bytes, sha256 hex)."""
+    digest = hashlib.sha256()
+    chunks = []
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+
+def expand_upload(name: str, data: bytes, dataset: str = None, fingerprint: str = None) -> list:
+    """A CSV upload as one entry; a ZIP as one entry per CSV member (folders and macOS metadata skipped)."""
+    if not zipfile.is_zipfile(io.BytesIO(data)):
+        return [UploadFileEntry(name, data, dataset, fingerprint)]
+
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            members = [m for m in archive.infolist()
+                       if not m.is_dir() and m.filename.lower().endswith(".csv")
+                       and not os.path.basename(m.filename).startswith(".") and "__MACOSX" not in m.filename]
+            total = sum(m.file_size for m in members)
+            if total > MAX_ARCHIVE_BYTES:
+                raise SchemaError(f"{name} expands to {total / (1024 * 1024):.0f} MB, "
+                                  f"above the {MAX_ARCHIVE_BYTES / (1024 * 1024):.0f} MB archive limit")
+            if not members:
+                raise SchemaError(f"{name} contains no CSV files")
+            members.sort(key=lambda m: m.filename)
+            return [UploadFileEntry(f"{name}/{m.filename}", archive.read(m), dataset) for m in members]
+    # is_zipfile only checks the directory; truncated or corrupt members fail on read
+    except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError) as e:
+        raise SchemaError(f"{name} is not a readable ZIP archive: {e}")
+
+
+def classify(entries: list) -> list:
+    """
+    Sets each entry's dataset from its header. Entries uploaded under a dataset
+    field must match it; SchemaError otherwise. Only the header line is parsed.
+    """
+    for entry in entries:
+        detected = detect_dataset(read_header(entry.data))
+        if entry.dataset and entry.dataset != detected:
+            raise SchemaError(f"{entry.name} was uploaded as {entry.dataset} but its columns are {detected} columns")
+        entry.dataset = detected
+    return entries
+
+
+def _parse(entry: UploadFileEntry):
+    start = time.perf_counter()
+    with span("parse_csv", dataset=entry.dataset, file=entry.name, bytes=len(entry.data)) as parse_span:
+        df = read_dataset(entry.data, entry.dataset)
+        parse_span.set(rows=len(df))
+    return df, {
+        "file": entry.name,
+        "dataset": entry.dataset,
+        "bytes": len(entry.data),
+        "rows": len(df),
+        "parse_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def parse_entries(entries: list, workers: int = None):
+    """
+    Parses every entry (in a thread pool when there are several) and concatenates
+    the batches per dataset, in upload order. Returns ({dataset: frame}, per-file reports).
+    """
+    workers = min(workers or UPLOAD_PARSE_WORKERS, len(entries))
+    if workers <= 1:
+        results = [_parse(entry) for entry in entries]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload-parse") as pool:
+            # Each task runs in a copy of the request context so its span nests under the request trace
+            futures = [pool.submit(contextvars.copy_context().run, _parse, entry) for entry in entries]
+            results = [f.result() for f in futures]
+
+    batches = {}
+    for entry, (df, _) in zip(entries, results):
+        batches.setdefault(entry.dataset, []).append(df)
+    frames = {dataset: dfs[0] if len(dfs) == 1 else pd.concat(dfs, ignore_index=True)
+              for dataset, dfs in batches.items()}
+    return frames, [report for _, report in results]
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ledger import UploadLedger
+
+
+@pytest.fixture(autouse=True)
+def isolated_ledger(tmp_path, monkeypatch):
+    """Every test gets its own upload ledger; the repo's data/upload_ledger.json is never written."""
+    main = sys.modules.get("main")
+    if main is not None:
+        monkeypatch.setattr(main, "LEDGER", UploadLedger(str(tmp_path / "ledger.json")))
+
+
+@pytest.fixture
+def empty_masters(tmp_path, monkeypatch):
+    """No masters loaded, pickles redirected to tmp_path, nothing derived or cached from earlier tests."""
+    import main
+    for name in ("ENROL_PATH", "BIO_PATH", "DEMO_PATH"):
+        monkeypatch.setattr(main, name, str(tmp_path / f"{name}.pkl"))
+    for name in ("GLOBAL_ENROL_DF", "GLOBAL_BIO_DF", "GLOBAL_DEMO_DF", "LAST_UPLOAD_ANALYSIS", "AGENT"):
+        monkeypatch.setattr(main, name, None)
+    monkeypatch.setattr(main, "DERIVED", {})
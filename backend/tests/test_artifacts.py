@@ -0,0 +1,84 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.aggregates import build_district_table
+from services.artifacts import ArtifactBundle, BundleError, build_bundle, source_fingerprints
+from services.rag_agent import SatarkAgent
+
+
+@pytest.fixture
+def frames():
+    enrol = pd.DataFrame({
+        'state': ['Bihar', 'Bihar', 'Kerala'],
+        'district': ['Patna', 'Gaya', 'Ernakulam'],
+        'age_5_17': [1000, 400, 800],
+    })
+    bio = pd.DataFrame({
+        'state': ['Bihar', 'Bihar', 'Kerala'],
+        'district': ['Patna', 'Gaya', 'Ernakulam'],
+        'bio_age_5_17': [300, 350, 780],
+    })
+    return enrol, bio
+
+
+def make_bundle(tmp_path, frames, sources=None):
+    enrol, bio = frames
+    kb = tmp_path / "kb.txt"
+    kb.write_text("Mobile biometric camps improve update coverage.\nSchool drives reach children aged 5-17.\n")
+    agent = SatarkAgent(str(kb), enrol, bio)
+    dashboard = {"summary": {"total_districts": 3}, "districts": [{"district": "Patna"}]}
+    out = tmp_path / "bundle"
+    build_bundle(str(out), dashboard, agent_index=agent.export_index(), sources=sources)
+    return str(out), str(kb)
+
+
+def test_bundle_round_trip(tmp_path, frames):
+    path, _ = make_bundle(tmp_path, frames)
+    bundle = ArtifactBundle(path)
+
+    assert bundle.dashboard() == {"summary": {"total_districts": 3}, "districts": [{"district": "Patna"}]}
+    assert bundle.dashboard_bytes[:].startswith(b'{"summary"')
+    assert not bundle.has("model.joblib")
+    assert bundle.load_model() is None
+
+    expected = build_district_table(*frames)
+    table = bundle.district_table()
+    assert table[['state', 'district']].values.tolist() == expected[['state', 'district']].values.tolist()
+    np.testing.assert_allclose(table['gap_percentage'], expected['gap_percentage'])
+    assert list(table['status']) == list(expected['status'])
+
+
+def test_agent_from_bundle_index_answers_like_fresh_agent(tmp_path, frames):
+    path, kb = make_bundle(tmp_path, frames)
+    index = ArtifactBundle(path).agent_index()
+
+    warm = SatarkAgent(kb, None, None, index=index)
+    fresh = SatarkAgent(kb, *frames)
+    for q in ["status of patna", "worst districts by gap", "how do camps help?"]:
+        assert warm.query(q) == fresh.query(q)
+
+
+def test_tampered_bundle_is_rejected(tmp_path, frames):
+    path, _ = make_bundle(tmp_path, frames)
+    with open(os.path.join(path, "dashboard.json"), "ab") as f:
+        f.write(b" ")
+
+    with pytest.raises(BundleError):
+        ArtifactBundle(path)
+
+
+def test_matches_sources_tracks_input_files(tmp_path, frames):
+    master = tmp_path / "master.pkl"
+    master.write_bytes(b"v1")
+    path, _ = make_bundle(tmp_path, frames, sources=source_fingerprints({"enrolment": str(master)}))
+    bundle = ArtifactBundle(path)
+
+    assert bundle.matches_sources(source_fingerprints({"enrolment": str(master)}))
+    master.write_bytes(b"version two")
+    assert not bundle.matches_sources(source_fingerprints({"enrolment": str(master)}))
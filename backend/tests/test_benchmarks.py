@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run_benchmarks import compare
+from benchmarks.synthetic import generate_dataset, generate_frames, parse_size
+from services.processing import clean_dataframe
+
+
+def test_synthetic_frames_match_csv_schemas():
+    enrol, bio, demo = generate_frames(2000)
+
+    assert list(enrol.columns) == ['date', 'state', 'district', 'pincode', 'age_0_5', 'age_5_17', 'age_18_greater']
+    assert list(bio.columns) == ['date', 'state', 'district', 'pincode', 'bio_age_5_17', 'bio_age_17_']
+    assert list(demo.columns) == ['date', 'state', 'district', 'pincode', 'demo_age_5_17', 'demo_age_17_']
+    assert len(enrol) == len(bio) == len(demo) == 2000
+    assert enrol['date'].str.match(r'^\d{2}-\d{2}-2025$').all()
+
+
+def test_synthetic_data_is_seeded_and_needs_cleaning():
+    first = generate_dataset("enrolment", 5000, seed=3)
+    second = generate_dataset("enrolment", 5000, seed=3)
+    assert first.equals(second)
+
+    cleaned = clean_dataframe(first.copy())
+    assert cleaned['district'].nunique() < first['district'].nunique()
+    assert 'Orissa' not in set(cleaned['state'])
+
+
+def test_parse_size():
+    assert parse_size("10k") == 10_000
+    assert parse_size("1M") == 1_000_000
+    assert parse_size("2500") == 2500
+
+
+def test_compare_flags_only_meaningful_slowdowns():
+    baseline = {"results": {"a": {"median_s": 0.100}, "b": {"median_s": 0.001}, "c": {"median_s": 0.100}}}
+    current = {"results": {"a": {"median_s": 0.200}, "b": {"median_s": 0.003}, "c": {"median_s": 0.110},
+                           "new": {"median_s": 1.0}}}
+
+    regressions = compare(current, baseline, threshold=0.25)
+    assert [r["case"] for r in regressions] == ["a"]
+    assert regressions[0]["ratio"] == 2.0
@@ -0,0 +1,55 @@
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+import main
+from main import app
+from services import bulk_reports
+from services.bulk_reports import select_districts
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def static_analysis(monkeypatch):
+    # Serve the bundled initial_data.json regardless of uploads made by other tests
+    monkeypatch.setattr(main, "GLOBAL_ENROL_DF", None)
+    monkeypatch.setattr(main, "GLOBAL_BIO_DF", None)
+
+def test_select_districts_filters():
+    rows = [
+        {"state": "Bihar", "district": "Patna", "status": "CRITICAL"},
+        {"state": "Bihar", "district": "Gaya", "status": "SAFE"},
+        {"state": "Odisha", "district": "Puri", "status": "CRITICAL"},
+    ]
+    assert [d["district"] for d in select_districts(rows, state="bihar", status="critical")] == ["Patna"]
+    assert [d["district"] for d in select_districts(rows, names=["puri", "gaya"])] == ["Gaya", "Puri"]
+
+def test_bulk_zip_contains_one_report_per_district():
+    response = client.post("/generate-report/bulk", json={"state": "Bihar", "status": "CRITICAL"})
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    pdfs = [n for n in archive.namelist() if n.endswith(".pdf")]
+    assert len(pdfs) == int(response.headers["X-Report-Count"])
+    assert all(archive.read(n).startswith(b"%PDF") for n in pdfs)
+    assert json.loads(archive.read("summary.json"))["reports"] == len(pdfs)
+
+def test_bulk_merged_pdf_and_validation():
+    response = client.post("/generate-report/bulk", json={"state": "Odisha", "status": "CRITICAL", "format": "pdf"})
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    # Two CRITICAL Odisha districts: TOC page + one page per report at least
+    assert response.content.count(b"/Type /Page\n") >= 3
+    assert float(response.headers["X-Reports-Per-Second"]) > 0
+
+    assert client.post("/generate-report/bulk", json={"format": "tar"}).status_code == 400
+    assert client.post("/generate-report/bulk", json={"state": "Atlantis"}).status_code == 404
+
+def test_concurrent_first_requests_share_one_pool():
+    bulk_reports.shutdown_pool()
+    with ThreadPoolExecutor(8) as threads:
+        pools = list(threads.map(lambda _: bulk_reports._get_pool(), range(8)))
+    assert all(pool is pools[0] for pool in pools)
+    bulk_reports.shutdown_pool()
+    assert bulk_reports._POOL is None
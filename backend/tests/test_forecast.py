@@ -0,0 +1,88 @@
+import io
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from services.forecast import attach_forecasts, days_to_clear, holt
+from services.report_generator import generate_report
+
+client = TestClient(main.app)
+
+ENROL = (b"date,state,district,pincode,age_5_17\n01-03-2025,Bihar,Patna,800001,1000\n"
+         b"01-03-2025,Bihar,Gaya,823001,50\n")
+BIO = b"date,state,district,pincode,bio_age_5_17\n" + b"".join(
+    f"{day:02d}-03-2025,Bihar,Patna,800001,20\n".encode() for day in range(1, 11))
+
+
+def reference_holt(values, alpha=0.3, beta=0.1):
+    values = [v for v in np.trim_zeros(values, 'f')]
+    if not values:
+        return 0.0, 0.0
+    level, trend = values[0], 0.0
+    for y in values[1:]:
+        previous = level
+        level = alpha * y + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous) + (1 - beta) * trend
+    return level, trend
+
+
+def test_vectorised_holt_matches_per_district_reference():
+    rng = np.random.default_rng(3)
+    series = rng.poisson(40, (120, 25)).astype(float)
+    series[:30, :5] = 0
+    series[:, 7] = 0
+    level, trend = holt(series, 0.3, 0.1)
+    for i in range(series.shape[1]):
+        assert (level[i], trend[i]) == pytest.approx(reference_holt(series[:, i]))
+
+
+def test_days_to_clear():
+    # Day h clears level + h * trend: 61 + 62 + ... covers 1000 on day 15
+    days = days_to_clear(np.array([1000, 1000, 10, 0, 5]), np.array([60., 10., 10., 0., 0.]),
+                         np.array([1., -1., -1., 0., 0.]))
+    assert days[0] == 15
+    assert np.isnan(days[1])  # throughput runs out after ~10 days, ~45 cleared
+    assert days[2] == 2
+    assert days[3] == 0
+    assert np.isnan(days[4])
+
+
+def test_thousand_districts_under_a_second():
+    rng = np.random.default_rng(4)
+    keys = [("State", f"District {i}") for i in range(1000)]
+    records = [{"state": s, "district": d, "pending_updates": int(p)}
+               for (s, d), p in zip(keys, rng.integers(0, 50_000, 1000))]
+    start = time.perf_counter()
+    attach_forecasts(records, rng.poisson(60, (365, 1000)).astype(float), keys, date(2025, 12, 31))
+    assert time.perf_counter() - start < 1.0
+    assert all(r["forecast"]["daily_throughput"] > 0 for r in records)
+
+
+def test_analysis_and_report_include_forecast(empty_masters):
+    files = {"enrolment_file": ("e.csv", io.BytesIO(ENROL), "text/csv"),
+             "biometric_file": ("b.csv", io.BytesIO(BIO), "text/csv")}
+    assert client.post("/upload", files=files).status_code == 200
+
+    districts = {d["district"]: d for d in client.get("/initial-data").json()["districts"]}
+    # 800 pending at a steady 20 a day
+    assert districts["Patna"]["forecast"] == {"daily_throughput": 20.0, "trend_per_day": 0.0,
+                                              "days_to_clear": 40, "clear_by": "2025-04-19"}
+    assert districts["Gaya"]["forecast"]["days_to_clear"] is None
+
+    # Up to 5 March: 900 pending at 20 a day, counted from the window's end
+    window = client.get("/initial-data", params={"to": "2025-03-05"}).json()
+    patna = next(d for d in window["districts"] if d["district"] == "Patna")
+    assert (patna["forecast"]["days_to_clear"], patna["forecast"]["clear_by"]) == (45, "2025-04-19")
+
+    pdf = generate_report(districts["Patna"])
+    assert pdf.startswith(b"%PDF")
+    response = client.post("/generate-report", json=districts["Patna"])
+    assert response.status_code == 200
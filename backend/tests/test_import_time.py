@@ -0,0 +1,7 @@
+from profile_imports import IMPORT_TIME_BUDGET_S, measure_import
+
+def test_cold_import_of_main_within_budget():
+    # Best of two runs to smooth out disk cache effects on the first import
+    elapsed, heavy = min(measure_import("main") for _ in range(2))
+    assert heavy == [], f"Heavy modules imported eagerly: {heavy}"
+    assert elapsed < IMPORT_TIME_BUDGET_S, f"Cold import took {elapsed:.2f}s (budget {IMPORT_TIME_BUDGET_S}s)"
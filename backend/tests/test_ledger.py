@@ -0,0 +1,69 @@
+import io
+import os
+import sys
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from services.ledger import UploadLedger, unseen_rows
+from services.metrics import REGISTRY, STAGE_SECONDS
+
+client = TestClient(main.app)
+
+ENROL = b"date,state,district,pincode,age_5_17\n01-03-2025,Bihar,Patna,800001,100\n01-03-2025,Bihar,Gaya,823001,50\n"
+BIO = b"date,state,district,pincode,bio_age_5_17\n01-03-2025,Bihar,Patna,800001,40\n01-03-2025,Bihar,Gaya,823001,45\n"
+
+
+def upload(enrol: bytes = ENROL, bio: bytes = BIO):
+    return client.post("/upload", files={"enrolment_file": ("e.csv", io.BytesIO(enrol), "text/csv"),
+                                         "biometric_file": ("b.csv", io.BytesIO(bio), "text/csv")})
+
+
+def test_unseen_rows_ignores_int_float_differences():
+    master = pd.DataFrame({"state": ["Bihar", "Bihar"], "district": ["Patna", "Gaya"],
+                           "pincode": [800001, 823001], "age_5_17": [100.0, 50.0]})
+    upload_df = pd.DataFrame({"state": ["Bihar", "Bihar", "Bihar"], "district": ["Patna", "Gaya", "Nalanda"],
+                              "pincode": [800001, 823001, 803101], "age_5_17": [100, 60, 7]})
+
+    new_rows, replaced = unseen_rows(master, upload_df)
+    assert new_rows["district"].tolist() == ["Gaya", "Nalanda"]
+    assert replaced == 1
+    assert unseen_rows(master, master)[0].empty
+
+
+def test_exact_repeat_returns_cached_analysis(empty_masters):
+    first = upload()
+    assert first.status_code == 200 and first.json()["upload_status"] == "applied"
+
+    REGISTRY.clear()
+    repeat = upload()
+    body = repeat.json()
+    assert repeat.status_code == 200
+    assert body["upload_status"] == "unchanged"
+    assert {f["status"] for f in body["files"]} == {"already_applied"}
+    assert body["districts"] == first.json()["districts"]
+    assert STAGE_SECONDS.count(stage="smart_merge") == 0
+    assert STAGE_SECONDS.count(stage="save_state") == 0
+
+
+def test_partial_overlap_applies_only_new_rows(empty_masters):
+    upload()
+    more = ENROL + b"01-03-2025,Bihar,Nalanda,803101,70\n"
+    body = upload(enrol=more).json()
+
+    assert body["rows_applied"] == {"enrolment": 1}
+    assert len(main.GLOBAL_ENROL_DF) == 3
+    statuses = {f["dataset"]: f["status"] for f in body["files"]}
+    assert statuses == {"enrolment": "applied", "biometric": "already_applied"}
+
+
+def test_ledger_is_dropped_when_the_master_changed(tmp_path):
+    ledger = UploadLedger(str(tmp_path / "ledger.json"))
+    ledger.record("enrolment", "abc", "e.csv", 2)
+    ledger.save({"enrolment": pd.DataFrame({"a": [1, 2]})})
+
+    assert UploadLedger(ledger.path).load({"enrolment": pd.DataFrame({"a": [1, 2]})}).seen("enrolment", "abc")
+    assert not UploadLedger(ledger.path).load({"enrolment": pd.DataFrame({"a": [1, 2, 3]})}).seen("enrolment", "abc")
@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.api_sync as api_sync
+from benchmarks.fake_data_gov import FakeDataGovServer
+from benchmarks.load_test import parse_mix, summarize
+from benchmarks.synthetic import generate_dataset
+
+
+@pytest.fixture
+def fake_server():
+    datasets = {
+        api_sync.RESOURCES["enrolment"]: generate_dataset("enrolment", 1200),
+        api_sync.RESOURCES["biometric"]: generate_dataset("biometric", 700),
+    }
+    server = FakeDataGovServer(datasets).start()
+    yield server
+    server.stop()
+
+
+def test_fake_server_paginates_like_data_gov(fake_server):
+    page = fake_server.page(api_sync.RESOURCES["enrolment"], limit=500, offset=1000)
+    assert page["total"] == 1200
+    assert page["count"] == 200
+    assert all(isinstance(v, str) for v in page["records"][0].values())
+
+
+def test_sync_runs_offline_against_fake_server(fake_server, monkeypatch):
+    monkeypatch.setattr(api_sync, "BASE_URL", fake_server.base_url)
+
+    results = api_sync.sync_all_official_data(pd.DataFrame(), pd.DataFrame())
+
+    assert len(results["enrolment"]) > 0
+    assert len(results["biometric"]) > 0
+    # 1200 enrolment rows in pages of 500 -> 3 requests; 700 biometric -> 2
+    assert fake_server.requests == 5
+
+
+def test_unknown_resource_is_not_found(fake_server, monkeypatch):
+    monkeypatch.setattr(api_sync, "BASE_URL", fake_server.base_url)
+    assert api_sync.fetch_data_gov_resource("no-such-resource") is None
+
+
+def test_summarize_reports_percentiles_per_endpoint():
+    samples = [("chat", i / 1000, True) for i in range(1, 101)] + [("sync", 0.5, False)]
+    summary = summarize(samples, elapsed_s=10)
+
+    assert summary["chat"]["requests"] == 100
+    assert summary["chat"]["rps"] == 10.0
+    assert 50 <= summary["chat"]["p50_ms"] <= 51
+    assert summary["chat"]["p99_ms"] >= 99
+    assert summary["sync"]["errors"] == 1
+    assert summary["_all"]["requests"] == 101
+
+
+def test_parse_mix_rejects_unknown_endpoints():
+    assert parse_mix("dashboard=3,chat=1") == {"dashboard": 3.0, "chat": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("dashboard=1,delete=2")
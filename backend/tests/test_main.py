@@ -1,5 +1,5 @@
 from fastapi.testclient import TestClient
-from main import app
+from main import app, MAX_CHAT_BATCH
 import io
 
 client = TestClient(app)
@@ -29,3 +29,10 @@ def test_generate_report_pdf():
     response = client.post("/generate-report", json=data)
     assert response.status_code == 200
     assert response.headers["content-type"] == "application/pdf"
+
+def test_chat_batch_takes_a_morning_run_and_caps_larger_batches():
+    queries = [f"status of district {i}" for i in range(1000)]
+    response = client.post("/chat/batch", json={"queries": queries})
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 1000
+    assert client.post("/chat/batch", json={"queries": ["hello"] * (MAX_CHAT_BATCH + 1)}).status_code == 422
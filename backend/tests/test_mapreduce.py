@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_dataset
+from services.mapreduce import file_partial, process_files
+from services.processing import process_data
+
+
+@pytest.fixture
+def csv_shards(tmp_path):
+    """Each dataset split over several CSVs, including messy names and string counts."""
+    files = {}
+    for kind in ("enrolment", "biometric", "demographic"):
+        df = generate_dataset(kind, 3000, seed=5)
+        paths = []
+        for i, part in enumerate((df.iloc[:1000], df.iloc[1000:2200], df.iloc[2200:])):
+            path = tmp_path / f"{kind}_{i}.csv"
+            part.to_csv(path, index=False)
+            paths.append(str(path))
+        files[kind] = (df, paths)
+    return files
+
+
+def test_out_of_core_matches_in_memory(csv_shards):
+    frames = {kind: pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+              for kind, (_, paths) in csv_shards.items()}
+    expected = process_data(frames["enrolment"], frames["biometric"], frames["demographic"])
+
+    result = process_files(csv_shards["enrolment"][1], csv_shards["biometric"][1], csv_shards["demographic"][1],
+                           model=expected["model"], workers=1, chunk_rows=400)
+
+    expected_predict = process_data(frames["enrolment"], frames["biometric"], frames["demographic"],
+                                    model=expected["model"])
+    assert result["districts"] == expected_predict["districts"]
+    assert result["summary"] == expected_predict["summary"]
+    assert result["dataset_info"]["enrolment_records"] == 3000
+
+
+def test_file_partial_reduces_chunks(csv_shards):
+    df, paths = csv_shards["biometric"]
+    partial, rows = file_partial(paths[0], "biometric", chunk_rows=100)
+    assert rows == 1000
+    assert partial["bio_age_5_17"].sum() == df.iloc[:1000]["bio_age_5_17"].sum()
+    assert not partial.duplicated(["state", "district"]).any()
+
+
+def test_missing_count_column_is_reported(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("state,district,pincode\nBihar,Patna,800001\n")
+    with pytest.raises(ValueError, match="missing required column"):
+        file_partial(str(path), "enrolment")
+
+
+def test_parallel_workers_give_the_same_result(csv_shards):
+    args = (csv_shards["enrolment"][1], csv_shards["biometric"][1], csv_shards["demographic"][1])
+    serial = process_files(*args, workers=1)
+    parallel = process_files(*args, workers=2)
+    assert parallel["districts"] == serial["districts"]
@@ -0,0 +1,119 @@
+import hashlib
+import io
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from services import memory
+from services.metrics import stage_timer
+
+client = TestClient(main.app)
+
+ENROL_CSV = b"state,district,pincode,age_5_17\nBihar,Patna,800001,100\nBihar,Gaya,823001,50\n"
+
+
+def test_frame_bytes_counts_object_columns_and_caches():
+    df = pd.DataFrame({"district": ["Patna" * 10] * 1000, "n": np.arange(1000)})
+    size = memory.frame_bytes(df)
+    assert size > df.memory_usage(deep=False).sum()
+    assert memory.frame_bytes(df) == size
+    assert memory.frame_bytes(None) == 0
+
+
+def test_stage_peaks_nest(monkeypatch):
+    tracemalloc.start()
+    try:
+        with stage_timer("outer_stage"):
+            with stage_timer("inner_stage"):
+                block = bytearray(8 * 1024 * 1024)
+                del block
+    finally:
+        tracemalloc.stop()
+    peaks = memory.stage_peaks()
+    assert peaks["inner_stage"] >= 8 * 1024 * 1024
+    assert peaks["outer_stage"] >= peaks["inner_stage"]
+
+
+def test_memory_endpoint_reports_datasets(empty_masters, monkeypatch):
+    monkeypatch.setattr(main, "GLOBAL_ENROL_DF", pd.DataFrame({"state": ["Bihar"] * 100}))
+    report = client.get("/memory").json()
+    assert report["datasets_mb"]["enrolment"] > 0
+    assert report["datasets_mb"]["biometric"] == 0
+    assert report["process"]["rss_mb"] > 0
+    assert report["budget"]["policy"] in ("reject", "spill")
+
+
+def test_upload_over_budget_is_rejected(empty_masters, monkeypatch):
+    monkeypatch.setattr(memory, "MEMORY_BUDGET_BYTES", 100)
+    response = client.post("/upload", files={"enrolment_file": ("e.csv", io.BytesIO(ENROL_CSV), "text/csv")})
+    assert response.status_code == 413
+    assert main.GLOBAL_ENROL_DF is None
+
+
+def test_upload_over_budget_spills_to_disk_and_merges(empty_masters, tmp_path, monkeypatch):
+    monkeypatch.setattr(memory, "MEMORY_BUDGET_BYTES", 100)
+    monkeypatch.setattr(memory, "MEMORY_BUDGET_POLICY", "spill")
+    monkeypatch.setattr(memory, "SPILL_DIR", str(tmp_path / "spill"))
+    monkeypatch.setattr(memory, "SPILL_MERGE_CHUNK_ROWS", 1)
+
+    response = client.post("/upload", files={"enrolment_file": ("e.csv", io.BytesIO(ENROL_CSV), "text/csv")})
+
+    assert response.status_code == 202
+    [spill_id] = response.json()["spill_ids"]
+    assert os.sep not in spill_id
+    with open(memory.spill_path(spill_id), "rb") as f:
+        assert f.read() == ENROL_CSV
+    assert main.GLOBAL_ENROL_DF is None
+    # The same file again is not spilled twice
+    again = client.post("/upload", files={"enrolment_file": ("e.csv", io.BytesIO(ENROL_CSV), "text/csv")})
+    assert again.json()["spill_ids"] == [spill_id]
+    assert [s["id"] for s in client.get("/spill").json()["pending"]] == [spill_id]
+
+    # Still over budget: the merge is refused and the spill stays pending
+    refused = client.post("/spill/merge")
+    assert refused.status_code == 413
+    assert main.GLOBAL_ENROL_DF is None
+    assert [s["id"] for s in client.get("/spill").json()["pending"]] == [spill_id]
+
+    monkeypatch.setattr(memory, "MEMORY_BUDGET_BYTES", 512 * 1024 * 1024)
+    merge = client.post("/spill/merge").json()
+    assert merge["pending"] == []
+    assert merge["merged"] == [{"id": spill_id, "dataset": "enrolment", "rows": 2}]
+    assert sorted(main.GLOBAL_ENROL_DF["district"]) == ["Gaya", "Patna"]
+    assert client.get("/spill").json()["pending"] == []
+    assert main.LEDGER.seen("enrolment", hashlib.sha256(ENROL_CSV).hexdigest())
+
+
+def test_spill_merge_takes_only_the_spills_that_fit(empty_masters, tmp_path, monkeypatch):
+    monkeypatch.setattr(memory, "SPILL_DIR", str(tmp_path / "spill"))
+    bio = b"state,district,pincode,bio_age_5_17\nBihar,Patna,800001,40\n"
+    first = memory.spill_upload("enrolment", ENROL_CSV, hashlib.sha256(ENROL_CSV).hexdigest(), "e.csv")
+    second = memory.spill_upload("biometric", bio, hashlib.sha256(bio).hexdigest(), "b.csv")
+    # Room for the oldest spill only
+    needed = memory.projected_upload_bytes(0, [len(ENROL_CSV)])
+    monkeypatch.setattr(memory, "MEMORY_BUDGET_BYTES", needed)
+
+    merge = client.post("/spill/merge").json()
+
+    assert [m["id"] for m in merge["merged"]] == [first]
+    assert merge["pending"] == [second]
+    assert len(main.GLOBAL_ENROL_DF) == 2
+    assert main.GLOBAL_BIO_DF is None
+
+
+def test_upload_within_budget_is_merged(empty_masters, monkeypatch):
+    monkeypatch.setattr(memory, "MEMORY_BUDGET_BYTES", 512 * 1024 * 1024)
+    bio = b"state,district,pincode,bio_age_5_17\nBihar,Patna,800001,40\nBihar,Gaya,823001,45\n"
+    response = client.post("/upload", files={
+        "enrolment_file": ("e.csv", io.BytesIO(ENROL_CSV), "text/csv"),
+        "biometric_file": ("b.csv", io.BytesIO(bio), "text/csv"),
+    })
+    assert response.status_code == 200
+    assert len(main.GLOBAL_ENROL_DF) == 2
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from services.metrics import Counter, Histogram, REGISTRY, STAGE_ROWS, STAGE_SECONDS, stage_timer
+from services.processing import process_data
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("demo_seconds", "Demo.", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        hist.observe(value, stage="a")
+
+    lines = hist.render()
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="a"} 3' in lines
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("demo_total", "Demo.", ["name"])
+    counter.inc(2, name='say "hi"')
+    assert 'demo_total{name="say \\"hi\\""} 2' in counter.render()
+
+
+def test_stage_timer_counts_errors_and_rows():
+    REGISTRY.clear()
+    try:
+        with stage_timer("boom", rows=10):
+            raise ValueError("x")
+    except ValueError:
+        pass
+    assert STAGE_SECONDS.count(stage="boom") == 1
+    assert STAGE_ROWS.value(stage="boom") == 10
+
+
+def test_process_data_records_each_stage():
+    REGISTRY.clear()
+    enrol = pd.DataFrame({'state': ['Bihar', 'Bihar'], 'district': ['Patna', 'Gaya'], 'age_5_17': [100, 200]})
+    bio = pd.DataFrame({'state': ['Bihar', 'Bihar'], 'district': ['Patna', 'Gaya'], 'bio_age_5_17': [50, 190]})
+    process_data(enrol, bio)
+
+    for stage in ("clean_dataframe", "to_numeric", "groupby", "model_fit", "format_records"):
+        assert STAGE_SECONDS.count(stage=stage) >= 1, stage
+    assert STAGE_ROWS.value(stage="format_records") == 2
+
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE satark_stage_duration_seconds histogram" in body
+    assert 'satark_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert 'satark_dataset_rows{dataset="enrolment"}' in body
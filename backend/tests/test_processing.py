@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.metrics import REGISTRY, STAGE_SECONDS
+from services.processing import SCHEMA_MARKER, is_prepared, prepare_frame, process_data, smart_merge
+
+
+def raw_frames():
+    enrol = pd.DataFrame({
+        'State': ['bihar ', 'Bihar', 'Orissa'],
+        'District': ['patna', 'Gaya', 'Khordha'],
+        'pincode': [800001, 823001, 751001],
+        'age_5_17': ['100', '200', None],
+    })
+    bio = pd.DataFrame({
+        'state': ['Bihar', 'Bihar', 'Odisha'],
+        'district': ['Patna', 'Gaya', 'Khordha'],
+        'pincode': [800001, 823001, 751001],
+        'bio_age_5_17': [40, 190, 5],
+    })
+    return enrol, bio
+
+
+def test_smart_merge_marks_frames_cleaned_and_typed():
+    enrol, _ = raw_frames()
+    merged = smart_merge(None, enrol)
+
+    assert is_prepared(merged)
+    assert pd.api.types.is_numeric_dtype(merged['age_5_17'])
+    assert set(merged['state']) == {'Bihar', 'Odisha'}
+
+    again = smart_merge(merged, pd.DataFrame({'state': ['Bihar'], 'district': ['Nalanda'],
+                                              'pincode': [803101], 'age_5_17': ['7']}))
+    assert is_prepared(again) and len(again) == 4
+
+
+def test_process_data_does_not_modify_raw_inputs():
+    enrol, bio = raw_frames()
+    before = enrol.copy()
+    process_data(enrol, bio)
+    pd.testing.assert_frame_equal(enrol, before)
+    assert SCHEMA_MARKER not in enrol.attrs
+
+
+def test_prepared_inputs_skip_cleaning_with_identical_results():
+    enrol, bio = raw_frames()
+    raw_result = process_data(enrol.copy(), bio.copy())
+
+    prepared = [smart_merge(None, enrol.copy()), smart_merge(None, bio.copy())]
+    REGISTRY.clear()
+    prepared_result = process_data(*prepared)
+
+    assert STAGE_SECONDS.count(stage="clean_dataframe") == 0
+    assert STAGE_SECONDS.count(stage="to_numeric") == 0
+    raw_result.pop("model"), prepared_result.pop("model")
+    assert prepared_result == raw_result
+
+
+def test_prepare_frame_is_idempotent():
+    enrol, _ = raw_frames()
+    prepared = prepare_frame(enrol)
+    assert prepare_frame(prepared) is prepared
@@ -0,0 +1,95 @@
+import pandas as pd
+from services.rag_agent import SatarkAgent
+
+KB_PATH = "data/knowledge_base.txt"
+
+def build_agent():
+    enrol = pd.DataFrame({
+        'state': ['Delhi', 'Delhi', 'Bihar', 'Bihar'],
+        'district': ['North West Delhi', 'South Delhi', 'Patna', 'Patna'],
+        'age_5_17': [1000, 400, 600, 400]
+    })
+    bio = pd.DataFrame({
+        'state': ['Delhi', 'Delhi', 'Bihar'],
+        'district': ['North West Delhi', 'South Delhi', 'Patna'],
+        'bio_age_5_17': [100, 380, 700]
+    })
+    demo = pd.DataFrame({
+        'state': ['Bihar', 'Bihar'],
+        'district': ['Patna', 'Patna'],
+        'demo_age_5_17': [5, 6]
+    })
+    return SatarkAgent(KB_PATH, enrol, bio, demo)
+
+def test_batch_matches_single_queries():
+    agent = build_agent()
+    queries = [
+        "Status of North West Delhi",
+        "gap in patna district",
+        "What is the penalty for not updating?",
+        "how many enrolment records in total",
+        "sync with data.gov",
+        "hello",
+    ]
+    batch = agent.query_batch(queries)
+    assert batch == [agent.query(q) for q in queries]
+    assert [r["type"] for r in batch] == ["analysis", "analysis", "policy", "data", "mastery", "general"]
+
+def test_district_analysis_uses_grouped_totals():
+    agent = build_agent()
+    answer = agent.query("Status of North West Delhi")["answer"]
+    # Longest name wins over the shorter "Delhi" substring matches
+    assert "Analysis for North West Delhi" in answer
+    assert "Target: 1,000" in answer and "CRITICAL" in answer
+
+    patna = agent.query("performance of Patna")["answer"]
+    assert "Target: 1,000" in patna and "Corrections Processed: 2" in patna
+
+def test_update_data_refreshes_district_index():
+    agent = build_agent()
+    agent.query("status of patna")
+    agent.update_data(pd.DataFrame({'district': ['Gaya'], 'age_5_17': [10]}), None, None)
+    assert "Analysis for Gaya" in agent.query("status of gaya")["answer"]
+    assert agent.query("status of patna")["type"] != "analysis"
+
+def build_national_agent():
+    enrol = pd.DataFrame({
+        'state': ['Bihar'] * 4 + ['Odisha'] * 2,
+        'district': ['Patna', 'Gaya', 'Siwan', 'Nalanda', 'Puri', 'Khordha'],
+        'age_5_17': [1000, 800, 500, 100, 400, 300]
+    })
+    bio = pd.DataFrame({
+        'state': ['Bihar'] * 4 + ['Odisha'] * 2,
+        'district': ['Patna', 'Gaya', 'Siwan', 'Nalanda', 'Puri', 'Khordha'],
+        'bio_age_5_17': [100, 300, 450, 90, 100, 290]
+    })
+    return SatarkAgent(KB_PATH, enrol, bio)
+
+def test_top_k_critical_districts_in_state():
+    agent = build_national_agent()
+    response = agent.query("Top 2 critical districts in Bihar")
+    assert response["type"] == "ranking"
+    # Patna: 900 pending (90%), Gaya: 500 pending (62.5%) -> both CRITICAL
+    assert [r["district"] for r in response["results"]] == ["Patna", "Gaya"]
+    assert all(r["state"] == "Bihar" for r in response["results"])
+
+def test_state_ranking_and_counts():
+    agent = build_national_agent()
+    worst = agent.query("Which state has the worst gap?")
+    assert worst["type"] == "ranking"
+    # Bihar: 1,460 of 2,400 pending (60.8%) vs Odisha: 310 of 700 (44.3%)
+    assert [r["state"] for r in worst["results"]] == ["Bihar"]
+
+    best_efficiency = agent.query("top 3 districts with the best efficiency")
+    assert best_efficiency["results"][0]["district"] == "Khordha"
+
+    count = agent.query("How many critical districts in Bihar?")
+    assert count["type"] == "aggregate"
+    assert "**2**" in count["answer"]
+
+def test_compare_and_policy_questions_are_not_rankings():
+    agent = build_national_agent()
+    comparison = agent.query("compare Patna vs Siwan")
+    assert comparison["type"] == "comparison"
+    assert {r["district"] for r in comparison["results"]} == {"Patna", "Siwan"}
+    assert agent.query("what is the best practice for the penalty?")["type"] == "policy"
@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from main import app, REPORT_CACHE
+from services.report_cache import ReportCache
+
+client = TestClient(app)
+
+REPORT = {
+    "state": "Bihar",
+    "district": "Cache Test",
+    "expected_updates": 1000,
+    "actual_updates": 250,
+    "pending_updates": 750,
+    "gap_percentage": 75.0,
+    "status": "CRITICAL"
+}
+
+def test_key_is_canonical():
+    reordered = dict(reversed(list(REPORT.items())))
+    assert ReportCache.key_for(REPORT) == ReportCache.key_for(reordered)
+    assert ReportCache.key_for(REPORT) != ReportCache.key_for(dict(REPORT, actual_updates=251))
+
+def test_memory_lru_eviction():
+    cache = ReportCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"  # "a" becomes most recently used
+    cache.put("c", b"12345")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+def test_disk_tier_survives_restart(tmp_path):
+    cache = ReportCache(max_bytes=1024, disk_dir=str(tmp_path), disk_max_bytes=1024)
+    cache.put("ab" * 32, b"%PDF-data")
+
+    restarted = ReportCache(max_bytes=1024, disk_dir=str(tmp_path), disk_max_bytes=1024)
+    assert restarted.get("ab" * 32) == b"%PDF-data"
+    assert restarted.stats()["disk_hits"] == 1
+
+def test_repeat_download_is_served_from_cache():
+    REPORT_CACHE.clear()
+    first = client.post("/generate-report", json=REPORT)
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+
+    second = client.post("/generate-report", json=REPORT)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.content == first.content
+
+    not_modified = client.post("/generate-report", json=REPORT, headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
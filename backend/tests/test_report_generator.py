@@ -0,0 +1,36 @@
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from services.report_generator import generate_report, render_chart
+
+SAMPLE = {
+    "state": "Bihar",
+    "district": "Patna",
+    "expected_updates": 1000,
+    "actual_updates": 300,
+    "pending_updates": 700,
+    "gap_percentage": 70.0,
+    "status": "CRITICAL",
+}
+
+def test_chart_rendered_in_memory_and_cached():
+    render_chart.cache_clear()
+    first = render_chart("Patna", 1000, 300)
+    assert render_chart("Patna", 1000, 300) is first
+    assert render_chart.cache_info().hits == 1
+    assert first["w"] * first["h"] > 0
+    assert len(zlib.decompress(first["data"])) == first["w"] * first["h"] * 3
+
+def test_concurrent_reports_are_consistent():
+    render_chart.cache_clear()
+    requests = [dict(SAMPLE, district=f"District {i % 8}", expected_updates=1000 + i) for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        reports = list(pool.map(generate_report, requests))
+        render_chart.cache_clear()
+        charts = list(pool.map(lambda r: render_chart(r["district"], r["expected_updates"], r["actual_updates"]), requests))
+
+    assert all(r.startswith(b"%PDF") for r in reports)
+    # Thread-safe rendering: concurrent charts match a serial render byte for byte
+    render_chart.cache_clear()
+    for r, chart in zip(requests, charts):
+        assert chart == render_chart(r["district"], r["expected_updates"], r["actual_updates"])
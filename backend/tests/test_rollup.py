@@ -0,0 +1,98 @@
+import io
+import os
+import sys
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from benchmarks.synthetic import generate_frames
+from services.processing import process_data, smart_merge
+from services.rollup import RollupCube, pincode_sums
+from services.sqlstore import SqlStore
+
+client = TestClient(main.app)
+
+ENROL = (b"date,state,district,pincode,age_5_17\n01-03-2025,Bihar,Patna,800001,100\n"
+         b"01-03-2025,Bihar,Patna,800002,60\n01-03-2025,Kerala,Kochi,682001,50\n")
+BIO = (b"date,state,district,pincode,bio_age_5_17\n01-03-2025,Bihar,Patna,800001,40\n"
+       b"01-03-2025,Kerala,Kochi,682001,45\n")
+METRICS = ("expected_updates", "actual_updates", "pending_updates", "gap_percentage", "efficiency_index", "status")
+
+
+def test_district_level_matches_dashboard_records():
+    masters = [smart_merge(None, df) for df in generate_frames(5_000, seed=5)]
+    cube = RollupCube.from_pincode_sums(pincode_sums(masters[0], masters[1]))
+    result = process_data(*masters)
+
+    by_district = lambda rows: {(r["state"], r["district"]): tuple(r[m] for m in METRICS) for r in rows}
+    assert by_district(cube.records("district")) == by_district(result["districts"])
+    nation = cube.records("nation")[0]
+    assert nation["pending_updates"] == result["summary"]["total_pending_updates"]
+    assert nation["critical_districts"] == result["summary"]["critical_districts_count"]
+    assert sum(r["expected_updates"] for r in cube.records("state")) == nation["expected_updates"]
+
+
+def test_sql_store_pincode_sums_match_pandas(tmp_path):
+    enrol, bio, _ = generate_frames(3_000, seed=6)
+    enrol.loc[enrol.index[:5], "pincode"] = None
+    store = SqlStore(str(tmp_path / "satark.db"))
+    store.upsert("enrolment", enrol)
+    store.upsert("biometric", bio)
+
+    masters = [smart_merge(None, df) for df in (enrol, bio)]
+    expected = pincode_sums(*masters)
+    pd.testing.assert_frame_equal(store.pincode_sums(), expected, check_dtype=False)
+    store.close()
+
+
+def test_rollup_endpoint_levels_and_filters(empty_masters):
+    files = {"enrolment_file": ("e.csv", io.BytesIO(ENROL), "text/csv"),
+             "biometric_file": ("b.csv", io.BytesIO(BIO), "text/csv")}
+    assert client.post("/upload", files=files).status_code == 200
+
+    states = client.get("/rollup/state").json()
+    assert states["count"] == 2
+    assert [s["state"] for s in states["rows"]] == ["Bihar", "Kerala"]
+    assert client.get("/rollup/nation").json()["rows"][0]["expected_updates"] == 210
+
+    pincodes = client.get("/rollup/pincode", params={"state": "bihar", "district": "Patna"}).json()["rows"]
+    assert [(p["pincode"], p["pending_updates"]) for p in pincodes] == [(800001, 60), (800002, 60)]
+    assert client.get("/rollup/district", params={"state": "Kerala"}).json()["rows"][0]["pincodes"] == 1
+    assert client.get("/rollup/village").status_code == 404
+
+    # A later upload is reflected in the next request
+    more = b"date,state,district,pincode,age_5_17\n01-03-2025,Bihar,Gaya,823001,30\n"
+    client.post("/upload", files={"enrolment_file": ("e2.csv", io.BytesIO(more), "text/csv")})
+    assert client.get("/rollup/nation").json()["rows"][0]["expected_updates"] == 240
+
+
+def test_pincode_drilldown_is_sorted_by_pending_and_paged():
+    masters = [smart_merge(None, df) for df in generate_frames(5_000, seed=8)]
+    cube = RollupCube.from_pincode_sums(pincode_sums(masters[0], masters[1]))
+    row = cube.records("district")[0]
+
+    total, first_page = cube.pincodes(row["state"].upper(), row["district"], limit=3)
+    _, everything = cube.pincodes(row["state"], row["district"], limit=total)
+    assert total == row["pincodes"] and len(first_page) == min(3, total)
+    assert first_page == everything[:3]
+    assert [p["pending_updates"] for p in everything] == sorted((p["pending_updates"] for p in everything), reverse=True)
+    assert sum(p["expected_updates"] for p in everything) == row["expected_updates"]
+    assert cube.pincodes(row["state"], row["district"], offset=total)[1] == []
+    assert cube.pincodes(row["state"], "Nowhere") is None
+
+
+def test_district_pincodes_endpoint(empty_masters):
+    files = {"enrolment_file": ("e.csv", io.BytesIO(ENROL), "text/csv"),
+             "biometric_file": ("b.csv", io.BytesIO(BIO), "text/csv")}
+    client.post("/upload", files=files)
+
+    body = client.get("/district/bihar/patna/pincodes", params={"top": 1}).json()
+    assert (body["state"], body["district"], body["total_pincodes"]) == ("Bihar", "Patna", 2)
+    assert [p["pincode"] for p in body["rows"]] == [800001]
+    page = client.get("/district/Bihar/Patna/pincodes", params={"offset": 1, "limit": 5}).json()
+    assert [p["pincode"] for p in page["rows"]] == [800002]
+    assert client.get("/district/Bihar/Gaya/pincodes").status_code == 404
+    assert client.get("/district/Bihar/Patna/pincodes", params={"limit": 0}).status_code == 422
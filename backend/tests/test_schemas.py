@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.processing import prepare_frame
+from services.schemas import SchemaError, apply_schema, get_schema, read_dataset
+
+ENROL_CSV = (
+    b"Date, State ,District,pincode,age_0_5,AGE_5_17,age_18_greater,remarks\n"
+    b"01-03-2025,Bihar,Patna,800001,1,20,3,x\n"
+    b"02-03-2025,Bihar,Gaya,823001,4,50,6,y\n"
+)
+
+
+def test_read_dataset_projects_types_and_renames():
+    df = read_dataset(ENROL_CSV, "enrolment")
+
+    assert list(df.columns) == ['date', 'state', 'district', 'pincode', 'age_0_5', 'age_5_17', 'age_18_greater']
+    assert df['age_5_17'].dtype == 'int64' and df['pincode'].dtype == 'float64'
+    assert df['age_5_17'].tolist() == [20, 50]
+
+    narrow = read_dataset(ENROL_CSV, "enrolment", columns=['state', 'district', 'age_5_17'])
+    assert list(narrow.columns) == ['state', 'district', 'age_5_17']
+
+
+def test_missing_required_column_fails_on_the_header():
+    data = b"state,district,pincode\n" + b"Bihar,Patna,800001\n" * 10
+    with pytest.raises(SchemaError, match="age_5_17"):
+        read_dataset(data, "enrolment")
+
+
+def test_blank_pincodes_parse_in_one_typed_pass(monkeypatch):
+    calls = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *a, **kw: calls.append(kw.get("dtype")) or read_csv(*a, **kw))
+    data = b"state,district,pincode,age_5_17\nBihar,Patna,800001,10\nBihar,Gaya,,5\n"
+
+    df = read_dataset(data, "enrolment")
+    # The header read, then one typed parse
+    assert len(calls) == 2 and calls[1]
+    assert df['pincode'].isna().tolist() == [False, True] and df['age_5_17'].dtype == 'int64'
+
+
+def test_untypeable_counts_fall_back_to_inference():
+    data = b"state,district,bio_age_5_17\nBihar,Patna,10\nBihar,Gaya,\nBihar,Nalanda,n/a\n"
+    df = prepare_frame(read_dataset(data, "biometric"))
+    assert df['bio_age_5_17'].tolist() == [10, 0, 0]
+
+
+def test_chunked_read_resumes_after_a_bad_chunk():
+    rows = [f"Bihar,D{i},{i}" for i in range(10)] + ["Bihar,D10,"] + [f"Bihar,D{i},{i}" for i in range(11, 15)]
+    data = ("state,district,demo_age_5_17\n" + "\n".join(rows) + "\n").encode()
+
+    chunks = list(read_dataset(data, "demographic", chunksize=4))
+    combined = pd.concat(chunks, ignore_index=True)
+    assert combined['district'].tolist() == [f"D{i}" for i in range(15)]
+    assert chunks[0]['demo_age_5_17'].dtype == 'int64'
+
+
+def test_apply_schema_types_api_records():
+    records = pd.DataFrame([
+        {"date": "01-03-2025", "state": "Bihar", "district": "Patna", "pincode": "800001",
+         "bio_age_5_17": "12", "bio_age_17_": "3", "extra": "ignored"},
+        {"date": "02-03-2025", "state": "Bihar", "district": "Gaya", "pincode": "823001",
+         "bio_age_5_17": "7", "bio_age_17_": "NA"},
+    ])
+    df = apply_schema(records, "biometric")
+
+    assert 'extra' not in df.columns
+    assert df['bio_age_5_17'].dtype == 'int64'
+    assert df['bio_age_17_'].isna().sum() == 1
+    assert get_schema("biometric").parse_dates(df).dt.month.tolist() == [3, 3]
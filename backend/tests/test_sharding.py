@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_frames
+from services import sharding
+from services.processing import district_coords, process_data, smart_merge
+
+
+def test_sharded_matches_serial(monkeypatch):
+    monkeypatch.setattr(sharding, "MIN_SHARDED_ROWS", 0)
+    masters = [smart_merge(None, df) for df in generate_frames(20_000, seed=4)]
+
+    serial = process_data(*masters)
+    sharded = process_data(*masters, model=serial["model"], workers=3)
+    expected = process_data(*masters, model=serial["model"])
+
+    assert sharded["districts"] == expected["districts"]
+    assert sharded["summary"] == expected["summary"]
+
+
+def test_sharded_training_without_demographic(monkeypatch):
+    monkeypatch.setattr(sharding, "MIN_SHARDED_ROWS", 0)
+    enrol, bio, _ = generate_frames(5_000, seed=2)
+
+    serial = process_data(enrol, bio)
+    sharded = process_data(enrol, bio, workers=2)
+    assert sharded["districts"] == serial["districts"]
+
+
+def test_assign_shards_balances_rows():
+    shards = sharding.assign_shards({"A": 100, "B": 60, "C": 50, "D": 10}, 2)
+    assert sorted(map(sorted, shards)) == [["A", "D"], ["B", "C"]]
+    assert sharding.assign_shards({"A": 1}, 4) == [["A"]]
+
+
+def test_unknown_district_coordinates_are_stable():
+    # crc32 jitter: identical in every process, unlike the salted str hash
+    assert district_coords("Nowhere") == district_coords("Nowhere")
+    coords = district_coords("Nowhere")
+    assert coords["lat"] == pytest.approx(20.5937 + 7.58 - 5)
+    assert coords["lng"] == pytest.approx(78.9629 + 3.06 - 5)
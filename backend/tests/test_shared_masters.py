@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from benchmarks.synthetic import generate_frames
+from services.processing import process_data, smart_merge
+from services.shared_masters import SharedMasters
+
+client = TestClient(main.app)
+
+DATASETS = ("enrolment", "biometric", "demographic")
+ENROL = b"date,state,district,pincode,age_5_17\n01-03-2025,Bihar,Patna,800001,100\n01-03-2025,Bihar,Gaya,823001,50\n"
+BIO = b"date,state,district,pincode,bio_age_5_17\n01-03-2025,Bihar,Patna,800001,40\n01-03-2025,Bihar,Gaya,823001,45\n"
+
+
+@pytest.fixture
+def shared_mode(tmp_path, monkeypatch):
+    for name in ("GLOBAL_ENROL_DF", "GLOBAL_BIO_DF", "GLOBAL_DEMO_DF", "LAST_UPLOAD_ANALYSIS", "AGENT"):
+        monkeypatch.setattr(main, name, None)
+    monkeypatch.setattr(main, "SHARED", SharedMasters(str(tmp_path / "shared")))
+    return str(tmp_path / "shared")
+
+
+def is_mapped(array) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+def test_mapped_masters_analyze_like_the_originals(tmp_path):
+    masters = [smart_merge(None, df) for df in generate_frames(5_000, seed=3)]
+    writer, reader = SharedMasters(str(tmp_path)), SharedMasters(str(tmp_path))
+    with writer.writer():
+        writer.publish(dict(zip(DATASETS, masters)))
+
+    assert reader.changed()
+    mapped = reader.map()
+    assert not reader.changed()
+    assert is_mapped(mapped["enrolment"]["age_5_17"].to_numpy())
+    assert is_mapped(mapped["enrolment"]["district"].array.codes)
+
+    expected = process_data(*masters)
+    result = process_data(*(mapped[d] for d in DATASETS), model=expected["model"])
+    assert result["districts"] == process_data(*masters, model=expected["model"])["districts"]
+    assert mapped["biometric"].astype(masters[1].dtypes.to_dict()).to_dict("list") == masters[1].to_dict("list")
+
+
+def test_old_versions_are_pruned(tmp_path):
+    shared = SharedMasters(str(tmp_path))
+    frame = pd.DataFrame({"state": ["Bihar"], "district": ["Patna"], "age_5_17": [1]})
+    for _ in range(4):
+        shared.publish({"enrolment": frame})
+    assert sorted(d for d in os.listdir(tmp_path) if d.startswith("v")) == ["v000003", "v000004"]
+
+
+def test_workers_remap_after_another_workers_upload(shared_mode):
+    files = {"enrolment_file": ("e.csv", io.BytesIO(ENROL), "text/csv"),
+             "biometric_file": ("b.csv", io.BytesIO(BIO), "text/csv")}
+    assert client.post("/upload", files=files).status_code == 200
+    assert main.GLOBAL_ENROL_DF["age_5_17"].sum() == 150
+
+    # Another worker process publishes a newer version of the masters
+    other = SharedMasters(shared_mode)
+    masters = other.map()
+    masters["enrolment"] = smart_merge(masters["enrolment"], pd.DataFrame(
+        {"date": ["01-03-2025"], "state": ["Bihar"], "district": ["Nalanda"], "pincode": [803101], "age_5_17": [70]}))
+    with other.writer():
+        other.publish(masters)
+
+    body = client.get("/initial-data").json()
+    assert main.GLOBAL_ENROL_DF["age_5_17"].sum() == 220
+    assert {d["district"] for d in body["districts"]} == {"Patna", "Gaya", "Nalanda"}
@@ -0,0 +1,97 @@
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from benchmarks.synthetic import generate_frames
+from services.aggregates import build_district_table
+from services.processing import process_data, smart_merge
+from services.rag_agent import SatarkAgent
+from services.sqlstore import SqlStore
+
+client = TestClient(main.app)
+
+DATASETS = ("enrolment", "biometric", "demographic")
+ENROL = b"date,state,district,pincode,age_5_17\n01-03-2025,Bihar,Patna,800001,100\n01-03-2025,Bihar,Gaya,823001,50\n"
+BIO = b"date,state,district,pincode,bio_age_5_17\n01-03-2025,Bihar,Patna,800001,40\n01-03-2025,Bihar,Gaya,823001,45\n"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqlStore(str(tmp_path / "satark.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def sql_masters(store, tmp_path, monkeypatch):
+    for name in ("GLOBAL_ENROL_DF", "GLOBAL_BIO_DF", "GLOBAL_DEMO_DF", "LAST_UPLOAD_ANALYSIS", "AGENT"):
+        monkeypatch.setattr(main, name, None)
+    monkeypatch.setattr(main, "STORE", store)
+    return store
+
+
+def test_sql_analysis_matches_process_data(store):
+    frames = generate_frames(5_000, seed=7)
+    for dataset, df in zip(DATASETS, frames):
+        store.upsert(dataset, df)
+    # The pandas masters a first upload of the same batches gives
+    masters = [smart_merge(None, df) for df in frames]
+
+    expected = process_data(*masters)
+    result = store.analyze(expected["model"])
+    assert result["districts"] == process_data(*masters, model=expected["model"])["districts"]
+    assert result["summary"] == expected["summary"]
+    assert store.row_counts() == dict(zip(DATASETS, map(len, masters)))
+    pd.testing.assert_frame_equal(store.district_table(), build_district_table(*masters), check_dtype=False)
+
+
+def test_duplicates_in_a_first_upload_match_the_pandas_path(store):
+    enrol, bio, _ = generate_frames(2_000, seed=11)
+    # The same records twice in one file, the second copy with other counts
+    enrol = pd.concat([enrol, enrol.assign(age_5_17=enrol["age_5_17"] + 1)], ignore_index=True)
+    store.upsert("enrolment", enrol)
+    store.upsert("biometric", bio)
+
+    masters = [smart_merge(None, df) for df in (enrol, bio)]
+    assert store.row_counts()["enrolment"] == len(masters[0]) == len(enrol) // 2
+    expected = process_data(*masters)
+    assert store.analyze(expected["model"])["districts"] == process_data(*masters, model=expected["model"])["districts"]
+
+
+def test_upsert_keeps_the_last_record(store):
+    first = pd.DataFrame({"state": ["Bihar", "Bihar"], "district": ["Patna", "Gaya"],
+                          "pincode": [800001, None], "age_5_17": [100, 50]})
+    second = pd.DataFrame({"state": ["Bihar", "Bihar"], "district": ["Patna", "Gaya"],
+                           "pincode": [800001, None], "age_5_17": [120, 60]})
+    store.upsert("enrolment", first)
+    store.upsert("enrolment", second)
+
+    sums = store.district_sums("enrolment", "age_5_17")
+    assert sums.to_dict("records") == [{"state": "Bihar", "district": "Gaya", "age_5_17": 60},
+                                       {"state": "Bihar", "district": "Patna", "age_5_17": 120}]
+    loaded = store.load_frame("enrolment")
+    assert loaded["pincode"].isna().sum() == 1 and loaded["date"].isna().all()
+
+
+def test_upload_upserts_into_the_sql_store(sql_masters):
+    files = {"enrolment_file": ("e.csv", io.BytesIO(ENROL), "text/csv"),
+             "biometric_file": ("b.csv", io.BytesIO(BIO), "text/csv")}
+    body = client.post("/upload", files=files).json()
+
+    assert body["rows_applied"] == {"enrolment": 2, "biometric": 2}
+    assert body["dataset_info"]["enrolment_records"] == 2
+    assert main.GLOBAL_ENROL_DF is None
+    assert {d["district"] for d in body["districts"]} == {"Patna", "Gaya"}
+    # Forecasts are added on the dashboard read path, not to the upload response
+    dashboard = [{k: v for k, v in d.items() if k != "forecast"} for d in main.current_analysis()["districts"]]
+    assert body["districts"] == dashboard
+
+    agent = SatarkAgent("missing_kb.txt", None, None, store=sql_masters)
+    assert "**2** records" in agent.query("how many enrolment records")["answer"]
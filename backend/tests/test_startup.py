@@ -0,0 +1,53 @@
+import time
+import main
+from fastapi.testclient import TestClient
+from main import app
+from services.startup import StartupTracker
+
+def wait_until_ready(client, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = client.get("/ready")
+        if response.status_code == 200:
+            return response.json()
+        time.sleep(0.05)
+    raise AssertionError("startup did not finish in time")
+
+def test_server_answers_while_loading_and_reports_stages():
+    with TestClient(app) as client:
+        # Start-up returns immediately: health and the static dashboard are served right away
+        assert client.get("/health").status_code == 200
+        assert "districts" in client.get("/initial-data").json()
+
+        ready = wait_until_ready(client)
+        assert ready["status"] in ("ready", "degraded")
+        assert list(ready["stages"]) == ["bundle", "model", "enrolment", "biometric", "demographic", "agent"]
+        assert ready["stages"]["agent"]["status"] == "done"
+        assert all(s["status"] != "pending" for s in ready["stages"].values())
+
+def test_bad_pickle_fails_its_stage_only(tmp_path, monkeypatch):
+    bad = tmp_path / "bad.pkl"
+    bad.write_bytes(b"not a pickle")
+    monkeypatch.setattr(main, "ENROL_PATH", str(bad))
+    monkeypatch.setattr(main, "BIO_PATH", str(tmp_path / "missing.pkl"))
+    monkeypatch.setattr(main, "DEMO_PATH", str(tmp_path / "missing.pkl"))
+    # No bundle or model on disk, and nothing the loader publishes outlives this test
+    monkeypatch.setattr(main, "MODEL_PATH", str(tmp_path / "missing.joblib"))
+    monkeypatch.setattr(main, "BUNDLE_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(main, "MASTER_STORE", "pandas")
+    for name in ("GLOBAL_ENROL_DF", "GLOBAL_BIO_DF", "GLOBAL_DEMO_DF", "AGENT", "TRAINED_MODEL", "BUNDLE", "STORE", "SHARED"):
+        monkeypatch.setattr(main, name, None)
+    monkeypatch.setattr(main, "WARM_DASHBOARD", False)
+    monkeypatch.setattr(main, "STARTUP", StartupTracker(list(main.STARTUP.stages)))
+
+    main.STARTUP.begin()
+    main.load_artifacts()
+    snapshot = main.STARTUP.snapshot()
+
+    assert snapshot["status"] == "degraded"
+    assert snapshot["stages"]["enrolment"]["status"] == "failed"
+    assert snapshot["stages"]["bundle"]["status"] == "skipped"
+    assert snapshot["stages"]["model"]["status"] == "skipped"
+    assert snapshot["stages"]["biometric"]["status"] == "skipped"
+    assert snapshot["stages"]["agent"]["status"] == "done"
+    assert main.GLOBAL_ENROL_DF is None
@@ -0,0 +1,84 @@
+import io
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from benchmarks.synthetic import generate_frames
+from services.processing import process_data, smart_merge
+from services.sqlstore import SqlStore
+from services.timeline import DATASETS, DailyCube, daily_sums, parse_day
+
+client = TestClient(main.app)
+
+ENROL = (b"date,state,district,pincode,age_5_17\n01-03-2025,Bihar,Patna,800001,100\n"
+         b"15-03-2025,Bihar,Patna,800002,60\n02-04-2025,Bihar,Gaya,823001,50\nnot-a-date,Bihar,Gaya,823002,7\n")
+BIO = (b"date,state,district,pincode,bio_age_5_17\n05-03-2025,Bihar,Patna,800001,40\n"
+       b"03-04-2025,Bihar,Gaya,823001,45\n")
+
+
+def in_window(df, start, end):
+    days = pd.to_datetime(df["date"], format="%d-%m-%Y", errors="coerce")
+    return df[(days >= pd.Timestamp(start)) & (days <= pd.Timestamp(end))]
+
+
+def test_window_matches_process_data_on_filtered_records():
+    masters = [smart_merge(None, df) for df in generate_frames(20_000, seed=9)]
+    cube = DailyCube({dataset: daily_sums(df, col) for (dataset, col, _), df in zip(DATASETS, masters)})
+    model = process_data(*masters)["model"]
+
+    for start, end in [(date(2025, 3, 1), date(2025, 3, 31)), (date(2025, 12, 25), date(2026, 2, 1))]:
+        expected = process_data(*(in_window(df, start, end) for df in masters), model=model)
+        result = cube.analyze(start, end, model)
+        assert result["districts"] == expected["districts"]
+        assert result["summary"] == expected["summary"]
+    assert cube.analyze(model=model)["districts"] == process_data(*masters, model=model)["districts"]
+
+
+def test_sql_store_daily_sums_match_pandas(tmp_path):
+    enrol = generate_frames(3_000, seed=10)[0]
+    store = SqlStore(str(tmp_path / "satark.db"))
+    store.upsert("enrolment", enrol)
+    master = smart_merge(None, enrol)
+    pd.testing.assert_frame_equal(store.daily_sums("enrolment", "age_5_17"),
+                                  daily_sums(master, "age_5_17"), check_dtype=False)
+    store.close()
+
+
+def test_parse_day_accepts_iso_and_dataset_format():
+    assert parse_day("2025-03-01") == parse_day("01-03-2025") == date(2025, 3, 1)
+    with pytest.raises(ValueError):
+        parse_day("March 1st")
+
+
+def test_initial_data_window(empty_masters):
+    files = {"enrolment_file": ("e.csv", io.BytesIO(ENROL), "text/csv"),
+             "biometric_file": ("b.csv", io.BytesIO(BIO), "text/csv")}
+    assert client.post("/upload", files=files).status_code == 200
+
+    march = client.get("/initial-data", params={"from": "2025-03-01", "to": "31-03-2025"}).json()
+    assert [(d["district"], d["expected_updates"], d["actual_updates"]) for d in march["districts"]] == [("Patna", 160, 40)]
+    assert march["window"] == {"from": "2025-03-01", "to": "2025-03-31", "data_from": "2025-03-01", "data_to": "2025-04-03"}
+
+    april = client.get("/initial-data", params={"from": "2025-04-01"}).json()
+    assert [(d["district"], d["expected_updates"]) for d in april["districts"]] == [("Gaya", 50)]
+    assert client.get("/initial-data", params={"from": "2025-04-02", "to": "2025-03-01"}).status_code == 400
+    assert client.get("/initial-data", params={"to": "yesterday"}).status_code == 400
+
+
+def test_windows_reuse_one_fitted_model(empty_masters, monkeypatch):
+    monkeypatch.setattr(main, "TRAINED_MODEL", None)
+    files = {"enrolment_file": ("e.csv", io.BytesIO(ENROL), "text/csv"),
+             "biometric_file": ("b.csv", io.BytesIO(BIO), "text/csv")}
+    client.post("/upload", files=files)
+
+    client.get("/initial-data", params={"from": "2025-03-01"})
+    _, model = main.DERIVED["window_model"]
+    client.get("/initial-data", params={"to": "2025-03-31"})
+    assert model is not None and main.DERIVED["window_model"][1] is model
@@ -0,0 +1,92 @@
+import io
+import json
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from services import tracing
+from services.tracing import span, start_trace
+
+
+def test_spans_nest_under_the_root(monkeypatch):
+    exported = []
+    monkeypatch.setattr(tracing, "export", exported.append)
+
+    with start_trace("job", trace_id="abc12345") as root:
+        with span("outer", rows_in=3) as outer:
+            with span("inner"):
+                pass
+            outer.set(rows_out=2)
+
+    trace = exported[0].to_dict()
+    assert trace["trace_id"] == "abc12345"
+    by_name = {s["name"]: s for s in trace["spans"]}
+    assert by_name["outer"]["parent_id"] == root.span_id
+    assert by_name["inner"]["parent_id"] == by_name["outer"]["span_id"]
+    assert by_name["outer"]["attributes"] == {"rows_in": 3, "rows_out": 2}
+
+
+def test_span_outside_a_trace_is_a_no_op():
+    with span("orphan") as s:
+        s.set(rows=1)
+    assert tracing.current_span() is None
+
+
+def test_errors_are_recorded_on_the_span(monkeypatch):
+    exported = []
+    monkeypatch.setattr(tracing, "export", exported.append)
+    try:
+        with start_trace("job"):
+            with span("fails"):
+                raise ValueError("bad rows")
+    except ValueError:
+        pass
+    failing = [s for s in exported[0].to_dict()["spans"] if s["name"] == "fails"][0]
+    assert failing["error"] == "ValueError: bad rows"
+
+
+def test_file_export_writes_json_lines(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_EXPORT", "file")
+    monkeypatch.setattr(tracing, "TRACE_FILE", str(path))
+
+    with start_trace("job"):
+        with span("step"):
+            pass
+
+    record = json.loads(path.read_text().splitlines()[0])
+    assert [s["name"] for s in record["spans"]] == ["job", "step"]
+
+
+def test_upload_trace_breaks_down_stages(empty_masters, tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_EXPORT", "file")
+    monkeypatch.setattr(tracing, "TRACE_FILE", str(path))
+
+    enrol = "state,district,pincode,age_5_17\nBihar,Patna,800001,100\nBihar,Gaya,823001,50\n"
+    bio = "state,district,pincode,bio_age_5_17\nBihar,Patna,800001,40\nBihar,Gaya,823001,45\n"
+    client = TestClient(main.app)
+    response = client.post("/upload", files={
+        "enrolment_file": ("e.csv", io.BytesIO(enrol.encode()), "text/csv"),
+        "biometric_file": ("b.csv", io.BytesIO(bio.encode()), "text/csv"),
+    }, headers={"X-Trace-Id": "upload-trace-0001"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Trace-Id"] == "upload-trace-0001"
+    record = json.loads(path.read_text().splitlines()[-1])
+    names = [s["name"] for s in record["spans"]]
+    for expected in ("POST /upload", "parse_csv", "smart_merge", "clean_dataframe", "save_state", "analyze", "groupby"):
+        assert expected in names
+    merge = next(s for s in record["spans"] if s["name"] == "smart_merge")
+    assert merge["attributes"]["rows_in"] == 2 and merge["attributes"]["rows_out"] == 2
+
+
+def test_invalid_incoming_trace_id_is_replaced():
+    client = TestClient(main.app)
+    response = client.get("/health", headers={"X-Trace-Id": "bad id\r\n"})
+    assert response.headers["X-Trace-Id"] != "bad id"
+    assert len(response.headers["X-Trace-Id"]) == 32
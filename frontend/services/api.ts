@@ -15,6 +15,14 @@ export interface DistrictData {
     status: 'CRITICAL' | 'MODERATE' | 'SAFE';
     is_anomaly: boolean;
     ai_reasoning?: string;
+    forecast?: BacklogForecast | null;
+}
+
+export interface BacklogForecast {
+    daily_throughput: number;
+    trend_per_day: number;
+    days_to_clear: number | null;
+    clear_by: string | null;
 }
 
 export interface DashboardSummary {